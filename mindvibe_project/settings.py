@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 import dj_database_url
 from dotenv import load_dotenv
@@ -86,6 +87,11 @@ DATABASES = {
     )
 }
 
+# SQLite test database on disk, so the multi-process checkout test can share it;
+# in the temp directory rather than the source tree
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['TEST'] = {'NAME': os.path.join(tempfile.gettempdir(), 'mindvibe_test.sqlite3')}
+
 # ✅ Auth backends
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
@@ -166,4 +172,32 @@ BANK_NAME = os.getenv('BANK_NAME', '')
 PROMPTPAY_ID = os.getenv('PROMPTPAY_ID', '')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-CART_SESSION_ID = 'cart'
+CART_SESSION_ID = 'cart'  # the session holds only the id of an anonymous visitor's Cart
+ANONYMOUS_CART_TTL_DAYS = 30  # purge_abandoned_carts deletes anonymous carts idle this long
+
+# ✅ Pending payment holds
+# Unpaid orders stop holding stock after this many minutes
+PENDING_ORDER_TTL_MINUTES = int(os.getenv('PENDING_ORDER_TTL_MINUTES', 24 * 60))
+# Expired by the expire_pending_orders command (cron, or --every N)
+
+# ✅ Homepage featured outfits
+# Seconds the candidate pool is cached before it is rebuilt
+FEATURED_POOL_TTL = int(os.getenv('FEATURED_POOL_TTL', 600))
+
+# ✅ Cache (local memory by default; e.g. CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache
+# with CACHE_LOCATION=outfits_cache after `python manage.py createcachetable`, or FileBasedCache with a directory)
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'mindvibe'),
+    }
+}
+# Seconds catalog reference data (category menu, counts) stays fresh in the cache
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', 300))
+
+# ✅ Slip uploads (payment and return slips)
+SLIP_UPLOAD_MAX_BYTES = int(os.getenv('SLIP_UPLOAD_MAX_BYTES', 10 * 1024 * 1024))
+# Slips are stored re-encoded as JPEG no larger than this on either side
+SLIP_MAX_DIMENSION = int(os.getenv('SLIP_MAX_DIMENSION', 1600))
+# Images with more pixels than this (after JPEG draft scaling) are refused undecoded
+SLIP_MAX_PIXELS = int(os.getenv('SLIP_MAX_PIXELS', 25_000_000))
@@ -1,12 +1,15 @@
 # outfits/admin.py
+from collections import Counter
+
 from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
 from django.utils.html import format_html
 from django.urls import reverse
-from django.utils import timezone
 from django.utils.translation import ngettext
-from .models import Outfit, Category, Order, OrderItem, UserProfile
+from .models import Outfit, OutfitUnit, Category, Order, OrderItem, OrderStatusEvent, UserProfile
+from .images import derivative_url
+from . import pricing, transitions
 
 # --- Category Admin ---
 @admin.register(Category)
@@ -15,38 +18,46 @@ class CategoryAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
     search_fields = ('name',)
 
+# --- OutfitUnit Inline ---
+class OutfitUnitInline(admin.TabularInline):
+    model = OutfitUnit
+    fields = ('code', 'is_active')
+    extra = 0
+
 # --- Outfit Admin ---
 @admin.register(Outfit)
 class OutfitAdmin(admin.ModelAdmin):
-    list_display = ('name', 'category', 'price', 'is_active', 'image_thumbnail')
-    list_filter = ('category', 'is_active')
+    list_display = ('name', 'category', 'price', 'stock', 'is_active', 'is_featured', 'image_thumbnail')
+    list_filter = ('category', 'is_active', 'is_featured')
+    list_select_related = ('category',)
     search_fields = ('name', 'description', 'category__name')
-    list_editable = ('price', 'is_active')
+    list_editable = ('price', 'stock', 'is_active', 'is_featured')
     autocomplete_fields = ('category',)
     readonly_fields = ('image_preview',)
+    inlines = [OutfitUnitInline]
     fieldsets = (
         (None, {'fields': ('name', 'category', 'description')}),
-        ('Pricing & Status', {'fields': ('price', 'is_active')}),
+        ('Pricing & Status', {'fields': ('price', 'stock', 'is_active', 'is_featured')}),
         ('Image', {'fields': ('image', 'image_preview')}),
     )
 
     @admin.display(description='Thumbnail')
     def image_thumbnail(self, obj):
         if obj.image:
-            return format_html('<img src="{}" style="max-height: 40px; max-width: 40px;" />', obj.image.url)
+            return format_html('<img src="{}" style="max-height: 40px; max-width: 40px;" />', derivative_url(obj, 'thumb'))
         return "(No image)"
 
     @admin.display(description='Image Preview')
     def image_preview(self, obj):
         if obj.image:
-            return format_html('<a href="{0}" target="_blank"><img src="{0}" style="max-height: 200px;" /></a>', obj.image.url)
+            return format_html('<a href="{}" target="_blank"><img src="{}" style="max-height: 200px;" /></a>', obj.image.url, derivative_url(obj, 'card'))
         return "(No image)"
 
 # --- OrderItem Inline ---
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
-    fields = ('outfit_link', 'quantity', 'price_per_day', 'get_item_total_cost_display')
-    readonly_fields = ('outfit_link','price_per_day', 'get_item_total_cost_display')
+    fields = ('outfit_link', 'quantity', 'allocated_units', 'price_per_day', 'get_item_total_cost_display')
+    readonly_fields = ('outfit_link', 'allocated_units', 'price_per_day', 'get_item_total_cost_display')
     extra = 0
     can_delete = False
 
@@ -57,22 +68,46 @@ class OrderItemInline(admin.TabularInline):
             return format_html('<a href="{}">{}</a>', url, obj.outfit.name)
         return "-"
 
+    @admin.display(description='Units')
+    def allocated_units(self, obj):
+        return ", ".join(unit.code for unit in obj.units.all()) or "-"
+
     @admin.display(description='Item Total Cost')
     def get_item_total_cost_display(self, obj):
-        return f"{obj.item_rental_subtotal:,.2f}"
+        return f"{obj.line_total:,.2f}"
+
+# --- OrderStatusEvent Inline ---
+class OrderStatusEventInline(admin.TabularInline):
+    model = OrderStatusEvent
+    fields = ('at', 'from_status', 'status', 'user', 'note')
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+    verbose_name_plural = 'Status History'
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 # --- Order Admin ---
+# Why bulk_transition() skipped an order, for one message per reason
+SKIP_REASONS = {
+    transitions.WRONG_STATUS: ('its status does not allow this action', 'their status does not allow this action'),
+    transitions.MISSING_SLIP: ('it has no payment slip', 'they have no payment slip'),
+    transitions.NOT_FOUND: ('it no longer exists', 'they no longer exist'),
+}
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ('id', 'user_display', 'created_at', 'rental_start_date', 'status', 'total_amount_display', 'payment_slip_thumbnail')
     list_filter = ('status', 'created_at', 'rental_start_date')
+    list_select_related = ('user',)
     search_fields = ('id', 'first_name', 'last_name', 'email', 'phone', 'user__username')
     readonly_fields = (
         'id', 'user_link', 'created_at', 'updated_at', 'total_amount_display',
         'payment_method', 'payment_datetime', 'payment_slip_display',
         'return_slip_display', 'return_initiated_at'
     )
-    inlines = [OrderItemInline]
+    inlines = [OrderItemInline, OrderStatusEventInline]
     actions = ['mark_payment_approved', 'mark_payment_rejected', 'mark_shipped', 'mark_return_received']
 
     fieldsets = (
@@ -120,70 +155,56 @@ class OrderAdmin(admin.ModelAdmin):
         readonly = list(super().get_readonly_fields(request, obj))
         if obj:
             readonly.extend(['user_link', 'payment_method'])
-            if obj.status not in ['pending', 'waiting_for_approval', 'failed']:
+            if obj.status not in [Order.STATUS_PENDING, Order.STATUS_WAITING_FOR_APPROVAL, Order.STATUS_FAILED]:
                 readonly.extend(['payment_datetime', 'payment_slip_display', 'admin_payment_note'])
-            if obj.status in ['return_received', 'completed']:
+            if obj.status in [Order.STATUS_RETURN_RECEIVED, Order.STATUS_COMPLETED]:
                 readonly.extend(['return_tracking_number', 'return_slip_display', 'return_initiated_at'])
         return tuple(readonly)
 
+    def save_model(self, request, obj, form, change):
+        # Recorded on the OrderStatusEvent if the status changes
+        obj._status_event = {'user': request.user, 'note': "Changed in admin."}
+        super().save_model(request, obj, form, change)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Dates, shipping or quantities may have changed
+        pricing.recalculate(Order.objects.filter(pk=form.instance.pk))
+
     # --- Actions ---
-    @admin.action(description='Mark selected orders as Payment Approved')
-    def mark_payment_approved(self, request, queryset):
-        valid_queryset = queryset.filter(status='waiting_for_approval', payment_slip__isnull=False)
-        updated_count = 0
-        for order in valid_queryset:
-            order.status = 'processing'
-            order.admin_payment_note = f"Approved by {request.user.username} on {timezone.now().strftime('%Y-%m-%d %H:%M')}."
-            order.save()
-            updated_count += 1
+    def _transition(self, request, queryset, name, done, level=messages.SUCCESS):
+        result = transitions.bulk_transition(name, queryset.values_list('pk', flat=True), user=request.user)
+        updated_count = len(result)
         self.message_user(request, ngettext(
-            f'{updated_count} order was successfully marked as payment approved.',
-            f'{updated_count} orders were successfully marked as payment approved.',
+            f'{updated_count} order was successfully marked as {done}.',
+            f'{updated_count} orders were successfully marked as {done}.',
             updated_count
-        ), messages.SUCCESS)
+        ), level)
+        skipped = Counter(result.skipped.values())
+        for reason, (singular, plural) in SKIP_REASONS.items():
+            skipped_count = skipped[reason]
+            if skipped_count:
+                self.message_user(request, ngettext(
+                    f'{skipped_count} order was skipped because {singular}.',
+                    f'{skipped_count} orders were skipped because {plural}.',
+                    skipped_count
+                ), messages.WARNING)
+
+    @admin.action(description='Mark selected orders as Payment Approved')
+    def mark_payment_approved(self, request, queryset):
+        self._transition(request, queryset, 'approve_payment', 'payment approved')
 
     @admin.action(description='Mark selected orders as Payment Rejected')
     def mark_payment_rejected(self, request, queryset):
-        valid_queryset = queryset.filter(status='waiting_for_approval')
-        updated_count = 0
-        for order in valid_queryset:
-            order.status = 'failed'
-            order.admin_payment_note = f"Rejected by {request.user.username} on {timezone.now().strftime('%Y-%m-%d %H:%M')}."
-            order.save()
-            updated_count += 1
-        self.message_user(request, ngettext(
-            f'{updated_count} order was successfully marked as payment rejected.',
-            f'{updated_count} orders were successfully marked as payment rejected.',
-            updated_count
-        ), messages.WARNING)
+        self._transition(request, queryset, 'reject_payment', 'payment rejected', messages.WARNING)
 
     @admin.action(description='Mark selected orders as Shipped')
     def mark_shipped(self, request, queryset):
-        valid_queryset = queryset.filter(status='processing')
-        updated_count = 0
-        for order in valid_queryset:
-            order.status = 'shipped'
-            order.save()
-            updated_count += 1
-        self.message_user(request, ngettext(
-            f'{updated_count} order was successfully marked as shipped.',
-            f'{updated_count} orders were successfully marked as shipped.',
-            updated_count
-        ), messages.SUCCESS)
+        self._transition(request, queryset, 'ship', 'shipped')
 
     @admin.action(description='Mark selected orders as Return Received')
     def mark_return_received(self, request, queryset):
-        valid_queryset = queryset.filter(status='return_shipped')
-        updated_count = 0
-        for order in valid_queryset:
-            order.status = 'return_received'
-            order.save()
-            updated_count += 1
-        self.message_user(request, ngettext(
-            f'{updated_count} order was successfully marked as return received.',
-            f'{updated_count} orders were successfully marked as return received.',
-            updated_count
-        ), messages.SUCCESS)
+        self._transition(request, queryset, 'receive_return', 'return received')
 
 # --- User Profile Inline ---
 class UserProfileInline(admin.StackedInline):
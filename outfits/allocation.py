@@ -0,0 +1,73 @@
+# outfits/allocation.py
+"""
+Assigns concrete OutfitUnits to order items for a rental period.
+
+Outfits without recorded units are tracked by their stock count alone and
+are skipped here. For the rest, a fixed number of queries is used no matter
+how many units or items are involved: one for the candidate units, one for
+the units already busy in the period, and one bulk insert of the assignments.
+"""
+from collections import defaultdict
+
+from .models import Order, OrderItem, OutfitUnit
+
+
+class NotEnoughUnits(Exception):
+    """Raised when an outfit has fewer free units than the items require."""
+
+    def __init__(self, outfit_ids):
+        self.outfit_ids = outfit_ids
+        super().__init__(f"Not enough free units for outfit(s): {sorted(outfit_ids)}")
+
+
+def busy_unit_ids(outfit_ids, start_date, end_date, exclude_order=None):
+    """Ids of units already allocated to booking orders overlapping the span."""
+    allocations = OrderItem.units.through.objects.filter(
+        outfitunit__outfit_id__in=outfit_ids,
+        orderitem__order__status__in=Order.BOOKING_STATUSES,
+        orderitem__order__rental_start_date__lte=end_date,
+        orderitem__order__rental_end_date__gte=start_date,
+    )
+    if exclude_order is not None:
+        allocations = allocations.exclude(orderitem__order=exclude_order)
+    return set(allocations.values_list('outfitunit_id', flat=True))
+
+
+def allocate_units(order, order_items):
+    """
+    Allocates free units to each of the order's items (saved OrderItems) and
+    returns {order_item_id: [unit_id, ...]}. Raises NotEnoughUnits if an outfit
+    with recorded units cannot cover its items.
+    """
+    outfit_ids = {item.outfit_id for item in order_items}
+    free_units = defaultdict(list)
+    for unit_id, outfit_id in OutfitUnit.objects.filter(
+        outfit_id__in=outfit_ids, is_active=True
+    ).order_by('code').values_list('pk', 'outfit_id'):
+        free_units[outfit_id].append(unit_id)
+    if not free_units:
+        return {}
+
+    busy = busy_unit_ids(free_units.keys(), order.rental_start_date, order.rental_end_date, exclude_order=order)
+    for outfit_id in free_units:
+        free_units[outfit_id] = [unit_id for unit_id in free_units[outfit_id] if unit_id not in busy]
+
+    Allocation = OrderItem.units.through
+    allocations = {}
+    rows = []
+    short = set()
+    for item in order_items:
+        if item.outfit_id not in free_units:
+            continue
+        pool = free_units[item.outfit_id]
+        if len(pool) < item.quantity:
+            short.add(item.outfit_id)
+            continue
+        assigned, free_units[item.outfit_id] = pool[:item.quantity], pool[item.quantity:]
+        allocations[item.pk] = assigned
+        rows.extend(Allocation(orderitem_id=item.pk, outfitunit_id=unit_id) for unit_id in assigned)
+    if short:
+        raise NotEnoughUnits(short)
+
+    Allocation.objects.bulk_create(rows)
+    return allocations
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class OutfitsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'outfits'
+
+    def ready(self):
+        from . import autocomplete, cache, carts, fuzzy, images, ledger, search, transitions  # noqa: F401  (register their signal handlers)
@@ -0,0 +1,150 @@
+# outfits/autocomplete.py
+"""
+In-process prefix index for search-as-you-type.
+
+Active outfit names and category names are kept in a sorted array of
+(key, kind, id) tuples and looked up with bisect, so a keystroke costs a
+binary search plus a short scan and never touches the database. Every word
+start of a name is a key, so "red" finds "Evening Red Dress"; Thai names are
+also keyed at each word the search tokenizer finds (or at every consonant
+when PyThaiNLP is not installed).
+
+Each process keeps its own index: it is built on first use, patched by
+Outfit/Category signals in the process that made the change (once the change
+commits, so a rolled-back save never shows up), and rebuilt after
+AUTOCOMPLETE_INDEX_TTL seconds to pick up changes made elsewhere.
+"""
+import bisect
+import re
+import threading
+import time
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Category, Outfit
+from .search import THAI_RUN, thai_tokens, thai_word_tokenize
+
+OUTFIT = 'outfit'
+CATEGORY = 'category'
+
+_THAI_WORD_START = re.compile(r'[\u0E01-\u0E2E\u0E40-\u0E44]')
+
+
+def normalize(text):
+    return ' '.join((text or '').lower().split())
+
+
+def prefix_keys(name):
+    """Every suffix of the name that starts at a word (or Thai segment) boundary."""
+    name = normalize(name)
+    starts = {0}
+    starts.update(match.start() + 1 for match in re.finditer(r'[\s\-/(]', name))
+    for run in THAI_RUN.finditer(name):
+        if thai_word_tokenize is None:
+            # No word segmenter: any consonant or leading vowel may start a word
+            starts.update(run.start() + i for i, char in enumerate(run.group()) if _THAI_WORD_START.match(char))
+            continue
+        position = run.start()
+        for token in thai_tokens(run.group()):
+            starts.add(position)
+            position += len(token)
+    return {name[start:].lstrip() for start in starts if name[start:].strip()}
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._keys = []       # sorted [(key, kind, id)]
+        self._labels = {}     # (kind, id) -> name, or (name, slug) for categories
+        self.built_at = None
+
+    def build(self):
+        keys, labels = [], {}
+        for pk, name in Outfit.objects.filter(is_active=True).values_list('pk', 'name').iterator():
+            labels[(OUTFIT, pk)] = name
+            keys.extend((key, OUTFIT, pk) for key in prefix_keys(name))
+        for pk, name, slug in Category.objects.values_list('pk', 'name', 'slug'):
+            labels[(CATEGORY, pk)] = (name, slug)
+            keys.extend((key, CATEGORY, pk) for key in prefix_keys(name))
+        keys.sort()
+        with self._lock:
+            self._keys, self._labels = keys, labels
+            self.built_at = time.monotonic()
+
+    def ensure_fresh(self):
+        ttl = getattr(settings, 'AUTOCOMPLETE_INDEX_TTL', 300)
+        if self.built_at is None or time.monotonic() - self.built_at > ttl:
+            self.build()
+
+    def add(self, kind, pk, label, name):
+        with self._lock:
+            self.remove(kind, pk)
+            if self.built_at is None:
+                return
+            self._labels[(kind, pk)] = label
+            for key in prefix_keys(name):
+                bisect.insort(self._keys, (key, kind, pk))
+
+    def remove(self, kind, pk):
+        with self._lock:
+            label = self._labels.pop((kind, pk), None)
+            if label is None:
+                return
+            name = label[0] if kind == CATEGORY else label
+            for key in prefix_keys(name):
+                position = bisect.bisect_left(self._keys, (key, kind, pk))
+                if position < len(self._keys) and self._keys[position] == (key, kind, pk):
+                    del self._keys[position]
+
+    def lookup(self, prefix, limit=8):
+        """Returns up to `limit` distinct (kind, id, label) matches for the prefix."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        self.ensure_fresh()
+        with self._lock:
+            keys, labels = self._keys, self._labels
+            matches, seen = [], set()
+            position = bisect.bisect_left(keys, (prefix,))
+            while position < len(keys) and len(matches) < limit:
+                key, kind, pk = keys[position]
+                if not key.startswith(prefix):
+                    break
+                if (kind, pk) not in seen:
+                    seen.add((kind, pk))
+                    matches.append((kind, pk, labels[(kind, pk)]))
+                position += 1
+        return matches
+
+
+index = PrefixIndex()
+
+
+# ---------- Signal handlers ----------
+# The values are bound now; the index only changes once the transaction commits.
+
+@receiver(post_save, sender=Outfit)
+def update_outfit_entry(sender, instance, **kwargs):
+    if instance.is_active:
+        transaction.on_commit(partial(index.add, OUTFIT, instance.pk, instance.name, instance.name))
+    else:
+        transaction.on_commit(partial(index.remove, OUTFIT, instance.pk))
+
+
+@receiver(post_delete, sender=Outfit)
+def remove_outfit_entry(sender, instance, **kwargs):
+    transaction.on_commit(partial(index.remove, OUTFIT, instance.pk))
+
+
+@receiver(post_save, sender=Category)
+def update_category_entry(sender, instance, **kwargs):
+    transaction.on_commit(partial(index.add, CATEGORY, instance.pk, (instance.name, instance.slug), instance.name))
+
+
+@receiver(post_delete, sender=Category)
+def remove_category_entry(sender, instance, **kwargs):
+    transaction.on_commit(partial(index.remove, CATEGORY, instance.pk))
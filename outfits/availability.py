@@ -0,0 +1,48 @@
+# outfits/availability.py
+"""Batch availability lookups against the per-day booking ledger."""
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import BookingDay, Outfit
+
+
+def booked_quantities(outfit_ids, start_date, end_date):
+    """Returns {outfit_id: peak booked quantity} over [start_date, end_date] in one grouped query."""
+    outfit_ids = {int(outfit_id) for outfit_id in outfit_ids}
+    booked = dict.fromkeys(outfit_ids, 0)
+    if not outfit_ids:
+        return booked
+    rows = BookingDay.objects.filter(
+        outfit_id__in=outfit_ids,
+        day__range=(start_date, end_date),
+    ).values('outfit_id').annotate(peak=Max('quantity')).values_list('outfit_id', 'peak')
+    booked.update(rows)
+    return booked
+
+
+def free_capacity(outfit_ids, start_date, end_date):
+    """
+    Returns {outfit_id: units still free on every day of the span}, i.e. stock
+    minus the peak booked quantity, in one query. Unknown ids are left out.
+    """
+    peak = BookingDay.objects.filter(
+        outfit=OuterRef('pk'), day__range=(start_date, end_date)
+    ).values('outfit').annotate(peak=Max('quantity')).values('peak')
+    rows = Outfit.objects.filter(pk__in=outfit_ids).annotate(
+        peak=Coalesce(Subquery(peak), 0)
+    ).values_list('pk', 'stock', 'peak')
+    return {outfit_id: max(stock - booked, 0) for outfit_id, stock, booked in rows}
+
+
+def unavailable_outfit_ids(requested, start_date, end_date):
+    """
+    Takes {outfit_id: requested quantity} and returns the set of ids that cannot
+    be rented in that quantity for the whole span.
+    """
+    if not start_date or not end_date or start_date > end_date:
+        return set(requested)
+    free = free_capacity(requested.keys(), start_date, end_date)
+    return {
+        outfit_id for outfit_id, quantity in requested.items()
+        if quantity < 1 or free.get(int(outfit_id), 0) < quantity
+    }
@@ -0,0 +1,236 @@
+# outfits/benchmark.py
+"""
+Load benchmark of the real URL routes against a running server.
+
+build_plan() picks the URLs to hit (outfits, categories and search terms from
+the database) and signs in one synthetic user per worker by writing their
+session directly, so no login form is involved. Each worker process then
+walks a shopper's visit in a loop for the configured duration:
+
+    home -> list -> category -> search -> detail -> add to cart -> cart
+    -> checkout -> remove from cart -> order history
+
+with one HTTP client, timing every request and counting any response but
+the expected one as an error. Checkout is rendered with the item in the
+cart but never submitted, so a run leaves no orders behind. summarize() turns the timings into throughput
+and latency percentiles per route; the results are saved as JSON so runs on
+different commits can be compared with compare().
+"""
+import json
+import random
+import secrets
+import subprocess
+import time
+from collections import defaultdict
+from importlib import import_module
+
+import requests
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+from django.urls import reverse
+from django.utils import timezone, translation
+
+from .models import Category, Order, Outfit
+from .synthetic import PREFIX, synthetic_users
+
+ROUTES = ['home', 'list', 'category', 'search', 'detail', 'add_to_cart', 'cart', 'checkout', 'remove_from_cart', 'order_history']
+PERCENTILES = (50, 90, 95, 99)
+SAMPLE_SIZE = 500
+
+
+def _sample(rng, values, size=SAMPLE_SIZE):
+    values = list(values)
+    return rng.sample(values, min(size, len(values)))
+
+
+def sign_in(user):
+    """Creates a signed-in session for user and returns its key."""
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session.session_key
+
+
+def build_plan(base_url, workers, prefix=PREFIX, seed=None):
+    """The URLs every worker draws from, plus one session key per worker (users who have orders first)."""
+    rng = random.Random(seed)
+    users = list(synthetic_users(prefix).filter(pk__in=Order.objects.values('user')).order_by('pk')[:workers])
+    if len(users) < workers:
+        users += list(synthetic_users(prefix).exclude(pk__in=[user.pk for user in users]).order_by('pk')[:workers - len(users)])
+    if not users:
+        raise ValueError(f"No users named '{prefix}_*'; run generate_synthetic_data first.")
+    outfit_ids = _sample(rng, Outfit.objects.filter(is_active=True).values_list('pk', flat=True))
+    if not outfit_ids:
+        raise ValueError("No active outfits to request.")
+    names = Outfit.objects.filter(pk__in=outfit_ids[:50]).values_list('name', flat=True)
+    terms = sorted({word for name in names for word in name.split() if len(word) > 3 and not word.isdigit()})
+
+    base_url = base_url.rstrip('/')
+    with translation.override(settings.LANGUAGE_CODE):
+        return {
+            'base_url': base_url,
+            'sessions': [sign_in(user) for user in users],
+            'home': reverse('outfits:home'),
+            'list': reverse('outfits:outfit-list'),
+            'categories': [reverse('outfits:outfits-by-category', args=[slug]) for slug in _sample(rng, Category.objects.values_list('slug', flat=True))],
+            'search': reverse('outfits:outfit-search'),
+            'terms': terms or ['dress'],
+            'details': {pk: reverse('outfits:outfit-detail', args=[pk]) for pk in outfit_ids},
+            'add_to_cart': {pk: reverse('outfits:add_to_cart', args=[pk]) for pk in outfit_ids},
+            'remove_from_cart': {pk: reverse('outfits:remove_from_cart', args=[pk]) for pk in outfit_ids},
+            'cart': reverse('outfits:cart_detail'),
+            'checkout': reverse('outfits:checkout'),
+            'order_history': reverse('outfits:order_history'),
+        }
+
+
+def _visit(plan, rng):
+    """
+    One shopper's visit as (route, method, path, params, expected status) steps.
+    Pages must render (200) and cart changes must redirect (302); anything
+    else, like a redirect to the login page or away from an empty checkout,
+    counts as an error.
+    """
+    outfit_id = rng.choice(list(plan['details']))
+    steps = [
+        ('home', 'GET', plan['home'], None, 200),
+        ('list', 'GET', plan['list'], None, 200),
+        ('search', 'GET', plan['search'], {'q': rng.choice(plan['terms'])}, 200),
+        ('detail', 'GET', plan['details'][outfit_id], None, 200),
+        ('add_to_cart', 'POST', plan['add_to_cart'][outfit_id], {'quantity': 1}, 302),
+        ('cart', 'GET', plan['cart'], None, 200),
+        # While the outfit is still in the cart; an empty cart redirects away from checkout
+        ('checkout', 'GET', plan['checkout'], None, 200),
+        ('remove_from_cart', 'POST', plan['remove_from_cart'][outfit_id], {}, 302),
+        ('order_history', 'GET', plan['order_history'], None, 200),
+    ]
+    if plan['categories']:
+        steps.insert(2, ('category', 'GET', rng.choice(plan['categories']), None, 200))
+    return steps
+
+
+def run_worker(plan, index, duration, warmup=0, seed=None):
+    """
+    Runs visits until duration seconds (after warmup) have passed. Returns
+    {route: {'latencies': [ms, ...], 'errors': n}} for the timed part.
+    Runs in a child process: it only talks HTTP.
+    """
+    rng = random.Random(None if seed is None else seed + index)
+    client = requests.Session()
+    client.cookies.set(settings.SESSION_COOKIE_NAME, plan['sessions'][index % len(plan['sessions'])])
+    # Any 32-character secret works as long as the cookie and the header agree
+    csrf_token = secrets.token_hex(16)
+    client.cookies.set(settings.CSRF_COOKIE_NAME, csrf_token)
+    client.headers.update({'X-CSRFToken': csrf_token, 'Referer': plan['base_url'] + '/'})
+
+    results = defaultdict(lambda: {'latencies': [], 'errors': 0})
+    started = time.perf_counter()
+    measure_from, stop_at = started + warmup, started + warmup + duration
+    while time.perf_counter() < stop_at:
+        for route, method, path, params, expected_status in _visit(plan, rng):
+            request_started = time.perf_counter()
+            try:
+                if method == 'POST':
+                    response = client.post(plan['base_url'] + path, data=params, allow_redirects=False, timeout=30)
+                else:
+                    response = client.get(plan['base_url'] + path, params=params, allow_redirects=False, timeout=30)
+                ok = response.status_code == expected_status
+            except requests.RequestException:
+                ok = False
+            elapsed_ms = (time.perf_counter() - request_started) * 1000
+            if request_started < measure_from:
+                continue
+            if ok:
+                results[route]['latencies'].append(elapsed_ms)
+            else:
+                results[route]['errors'] += 1
+            if time.perf_counter() >= stop_at:
+                break
+    return dict(results)
+
+
+def percentile(sorted_values, p):
+    """The p-th percentile of an already sorted list, interpolating between neighbours."""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * p / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _stats(latencies, errors, duration):
+    latencies = sorted(latencies)
+    stats = {
+        'requests': len(latencies) + errors,
+        'errors': errors,
+        'throughput_rps': round((len(latencies) + errors) / duration, 2) if duration else None,
+        'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else None,
+        'max_ms': round(latencies[-1], 2) if latencies else None,
+    }
+    for p in PERCENTILES:
+        value = percentile(latencies, p)
+        stats[f'p{p}_ms'] = round(value, 2) if value is not None else None
+    return stats
+
+
+def summarize(worker_results, duration):
+    """Merges the workers' timings into overall and per-route stats."""
+    merged = defaultdict(lambda: {'latencies': [], 'errors': 0})
+    for result in worker_results:
+        for route, timings in result.items():
+            merged[route]['latencies'].extend(timings['latencies'])
+            merged[route]['errors'] += timings['errors']
+    routes = {route: _stats(merged[route]['latencies'], merged[route]['errors'], duration) for route in ROUTES if route in merged}
+    everything = [latency for timings in merged.values() for latency in timings['latencies']]
+    return {
+        'overall': _stats(everything, sum(timings['errors'] for timings in merged.values()), duration),
+        'routes': routes,
+    }
+
+
+def git_revision():
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=settings.BASE_DIR, capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f'{revision}-dirty' if dirty else revision
+
+
+def dataset_size():
+    return {
+        'outfits': Outfit.objects.count(),
+        'orders': Order.objects.count(),
+        'users': get_user_model().objects.count(),
+    }
+
+
+def report(summary, options):
+    """The JSON document saved for a run."""
+    return {
+        'revision': git_revision(),
+        'finished_at': timezone.now().isoformat(),
+        'database': settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1],
+        'dataset': dataset_size(),
+        'options': options,
+        **summary,
+    }
+
+
+def compare(previous, current):
+    """Rows of (route, previous p95, current p95, previous rps, current rps) for two reports."""
+    rows = []
+    for route in ['overall'] + ROUTES:
+        before = previous['overall'] if route == 'overall' else previous['routes'].get(route)
+        after = current['overall'] if route == 'overall' else current['routes'].get(route)
+        if before and after:
+            rows.append((route, before['p95_ms'], after['p95_ms'], before['throughput_rps'], after['throughput_rps']))
+    return rows
+
+
+def load_report(path):
+    with open(path, encoding='utf-8') as handle:
+        return json.load(handle)
@@ -0,0 +1,124 @@
+# outfits/cache.py
+"""
+Versioned cache for catalog reference data.
+
+Keys live in namespaces ("catalog", ...). Each namespace has a version number
+stored in the cache itself, and every key embeds it, so bumping the version
+(done by the Category/Outfit signals below)
+makes all the namespace's entries unreachable at once without having to know
+their names. Old entries simply age out.
+
+Entries are stored with a soft expiry a little before the cache's own
+timeout. The first worker to see an expired (or missing) entry takes a short
+lock with cache.add() and recomputes it; the others keep serving the old value
+(or wait briefly for the new one) instead of all hitting the database at once.
+Only get/set/add/incr/delete are used, so this works with the local-memory, file and
+database cache backends.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Category, Outfit
+
+CATALOG = 'catalog'
+
+KEY_PREFIX = 'outfits'
+LOCK_TIMEOUT = 30
+WAIT_STEP = 0.05
+GRACE = 60
+
+
+def _version_key(namespace):
+    return f'{KEY_PREFIX}:{namespace}:version'
+
+
+def namespace_version(namespace):
+    version = cache.get(_version_key(namespace))
+    if version is None:
+        # Start from the clock so an evicted counter never reuses an old version
+        cache.add(_version_key(namespace), time.time_ns(), None)
+        version = cache.get(_version_key(namespace), 0)
+    return version
+
+
+def bump(namespace):
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        cache.set(_version_key(namespace), time.time_ns(), None)
+
+
+def make_key(namespace, name):
+    return f'{KEY_PREFIX}:{namespace}:v{namespace_version(namespace)}:{name}'
+
+
+def get_or_compute(namespace, name, compute, timeout=None):
+    """
+    Returns the cached value for name in namespace, calling compute() to fill
+    it when it is missing or stale. Only one caller at a time recomputes.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+    key = make_key(namespace, name)
+    lock_key = f'{key}:lock'
+    entry = cache.get(key)
+
+    if entry is not None:
+        value, fresh_until = entry
+        if fresh_until > time.time() or not cache.add(lock_key, 1, LOCK_TIMEOUT):
+            return value
+    elif not cache.add(lock_key, 1, LOCK_TIMEOUT):
+        # Someone else is computing it: wait for their result, within reason
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(WAIT_STEP)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+        # The other worker died or is very slow; compute it ourselves
+
+    try:
+        value = compute()
+        cache.set(key, (value, time.time() + timeout), timeout + GRACE)
+    finally:
+        cache.delete(lock_key)
+    return value
+
+
+# ---------- Catalog reference data ----------
+
+def category_menu():
+    """All categories in menu order, each with an `outfit_count` of active outfits."""
+    return get_or_compute(CATALOG, 'category-menu', lambda: list(
+        Category.objects.annotate(outfit_count=Count('outfits', filter=Q(outfits__is_active=True)))
+    ))
+
+
+def category_by_slug(slug):
+    for category in category_menu():
+        if category.slug == slug:
+            return category
+    return None
+
+
+def active_outfit_count():
+    return get_or_compute(CATALOG, 'active-outfit-count', Outfit.objects.filter(is_active=True).count)
+
+
+# ---------- Signal handlers ----------
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Outfit)
+@receiver(post_delete, sender=Outfit)
+def bump_catalog_version(sender, **kwargs):
+    # Now, so this process stops serving the old data, and again after commit
+    # in case another worker refilled an entry from the uncommitted state
+    bump(CATALOG)
+    transaction.on_commit(lambda: bump(CATALOG))
@@ -0,0 +1,84 @@
+# outfits/cards.py
+"""
+Cached rendering of outfit cards.
+
+A card's HTML depends only on the outfit, its category and the active
+language, so it is cached under a fingerprint of exactly the fields the card
+shows: editing an outfit or renaming its category changes the fingerprint and
+the old entry is never read again. All cards of a page are fetched with one
+get_many() and only the misses are rendered.
+
+The CSRF field and the "in your cart" badge are per user, so the cached HTML
+holds placeholders that are filled in for each request.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language, gettext
+
+from .cache import namespace_version
+
+# Bumped when something the fingerprint cannot see changes (e.g. image derivatives appear)
+CARDS = 'cards'
+CARD_TEMPLATE = 'outfits/includes/outfit_card.html'
+CARD_TIMEOUT = 24 * 60 * 60
+# Bump when outfit_card.html changes so persistent caches drop the old markup
+CARD_REVISION = 2
+
+# Autoescaping turns "<" into "&lt;" in outfit data, so these can only come from the template
+CSRF_PLACEHOLDER = mark_safe('<!--csrf-->')
+IN_CART_PLACEHOLDER = mark_safe('<!--in-cart-->')
+
+
+def fingerprint(outfit):
+    category = outfit.category
+    parts = [
+        outfit.pk, outfit.name, outfit.description, outfit.price, outfit.image.name if outfit.image else '',
+        # Cached per process, so the CARDS bump alone does not reach other workers
+        outfit.image_renditions_ready,
+        category.pk if category else '', category.name if category else '', category.slug if category else '',
+    ]
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def card_key(outfit, variant, language, version=None):
+    if version is None:
+        version = namespace_version(CARDS)
+    return f'outfits:card:r{CARD_REVISION}:v{version}:{variant}:{language}:{outfit.pk}:{fingerprint(outfit)}'
+
+
+def render_cards(outfits, variant, request=None, cart_outfit_ids=()):
+    """Returns the HTML for the given outfits' cards, in order."""
+    outfits = list(outfits)
+    language = get_language()
+    version = namespace_version(CARDS)
+    keys = {outfit.pk: card_key(outfit, variant, language, version) for outfit in outfits}
+    cached = cache.get_many(list(keys.values()))
+
+    missing = {}
+    for outfit in outfits:
+        if keys[outfit.pk] not in cached:
+            missing[keys[outfit.pk]] = render_to_string(CARD_TEMPLATE, {
+                'outfit': outfit,
+                'variant': variant,
+                'csrf_placeholder': CSRF_PLACEHOLDER,
+                'in_cart_placeholder': IN_CART_PLACEHOLDER,
+            })
+    if missing:
+        cache.set_many(missing, CARD_TIMEOUT)
+        cached.update(missing)
+
+    csrf_field = format_html('<input type="hidden" name="csrfmiddlewaretoken" value="{}">', get_token(request)) if request else ''
+    in_cart_badge = format_html('<span class="in-cart-badge">{}</span>', gettext("In your cart"))
+    cart_outfit_ids = {str(pk) for pk in cart_outfit_ids}
+
+    html = []
+    for outfit in outfits:
+        card = cached[keys[outfit.pk]].replace(CSRF_PLACEHOLDER, csrf_field)
+        card = card.replace(IN_CART_PLACEHOLDER, in_cart_badge if str(outfit.pk) in cart_outfit_ids else '')
+        html.append(card)
+    return mark_safe(''.join(html))
@@ -0,0 +1,208 @@
+# outfits/carts.py
+"""
+Database-backed shopping carts.
+
+Signed-in users own one Cart (Cart.user); an anonymous visitor's cart is
+found through the cart id kept in their session, which is the only thing the
+session holds and is written once, when the cart is created. When an
+anonymous visitor signs in, their cart is merged into the user's cart.
+
+The header badge and the "in your cart" markers only need the item count and
+the outfit ids; cart_summary() reads both with one query and memoizes them on
+the request. It is deliberately not kept in the cache: with a per-process
+cache the other workers would go on serving an old badge, and the catalog
+ETags (outfits.conditional) are built from it.
+"""
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.db import IntegrityError, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Cart, CartItem, Outfit
+
+logger = logging.getLogger(__name__)
+
+EMPTY_SUMMARY = {'count': 0, 'outfit_ids': []}
+
+
+def _session_cart_id(request):
+    cart_id = request.session.get(settings.CART_SESSION_ID)
+    # Sessions from before carts were stored in the database hold a dict of items
+    return cart_id if isinstance(cart_id, int) else None
+
+
+def _adopt_session_items(request, cart):
+    """Moves the items of a legacy session-dict cart into cart."""
+    legacy = request.session.get(settings.CART_SESSION_ID)
+    if not isinstance(legacy, dict):
+        return
+    for outfit_id, item in legacy.items():
+        outfit = Outfit.objects.filter(pk=outfit_id, is_active=True).first()
+        if outfit:
+            add_item(cart, outfit, int(item.get('quantity', 1)))
+
+
+def get_cart(request, create=False):
+    """The visitor's cart, or None if they have none and create is False. Memoized on the request."""
+    cart = getattr(request, '_cart', None)
+    if cart is not None:
+        return cart
+
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        cart = Cart.objects.filter(user=user).first()
+        if cart is None and create:
+            try:
+                with transaction.atomic():
+                    cart = Cart.objects.create(user=user)
+            except IntegrityError:
+                # Created by a concurrent request of the same user
+                cart = Cart.objects.get(user=user)
+    else:
+        cart_id = _session_cart_id(request)
+        if cart_id is not None:
+            cart = Cart.objects.filter(pk=cart_id, user__isnull=True).first()
+        if cart is None and create:
+            cart = Cart.objects.create()
+            _adopt_session_items(request, cart)
+            request.session[settings.CART_SESSION_ID] = cart.pk
+
+    if cart is not None:
+        request._cart = cart
+    return cart
+
+
+def cart_summary(request):
+    """{'count': total quantity, 'outfit_ids': [str ids]} for the visitor's cart. Memoized on the request."""
+    cached = getattr(request, '_cart_summary', None)
+    if cached is not None:
+        return cached
+
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        cart_id = getattr(getattr(request, '_cart', None), 'pk', None) or Cart.objects.filter(user=user).values_list('pk', flat=True).first()
+    else:
+        cart_id = _session_cart_id(request)
+
+    if cart_id is None:
+        summary = EMPTY_SUMMARY
+    else:
+        rows = list(CartItem.objects.filter(cart_id=cart_id, outfit__is_active=True).values_list('outfit_id', 'quantity'))
+        summary = {
+            'count': sum(quantity for _, quantity in rows),
+            'outfit_ids': [str(outfit_id) for outfit_id, _ in rows],
+        }
+    request._cart_summary = summary
+    return summary
+
+
+def _changed(cart, request=None):
+    Cart.objects.filter(pk=cart.pk).update(updated_at=timezone.now())
+    if request is not None and hasattr(request, '_cart_summary'):
+        del request._cart_summary
+
+
+def add_item(cart, outfit, quantity=1, request=None):
+    """Adds quantity copies of outfit, capped at its stock. Returns the new quantity, or None if nothing was added."""
+    item, created = CartItem.objects.get_or_create(cart=cart, outfit=outfit, defaults={'quantity': 0})
+    new_quantity = min(item.quantity + quantity, outfit.stock)
+    if new_quantity <= item.quantity:
+        if created:
+            item.delete()
+        return None
+    CartItem.objects.filter(pk=item.pk).update(quantity=new_quantity)
+    _changed(cart, request)
+    return new_quantity
+
+
+def remove_item(cart, outfit_id, request=None):
+    """Removes an outfit from the cart; returns whether it was there."""
+    deleted, _ = CartItem.objects.filter(cart=cart, outfit_id=outfit_id).delete()
+    if deleted:
+        _changed(cart, request)
+    return bool(deleted)
+
+
+def clear(cart, request=None):
+    cart.items.all().delete()
+    _changed(cart, request)
+
+
+def cart_lines(cart):
+    """The cart's items as dicts (outfit, quantity, price_per_day, item_subtotal) and the subtotal per day."""
+    if cart is None:
+        return [], Decimal('0.00')
+
+    lines = []
+    subtotal = Decimal('0.00')
+    stale_ids = []
+    for item in cart.items.select_related('outfit__category'):
+        outfit = item.outfit
+        if not outfit.is_active:
+            stale_ids.append(item.pk)
+            continue
+        # Never ask for more copies than the outfit has in stock
+        quantity = max(1, min(item.quantity, outfit.stock))
+        item_subtotal = outfit.price * quantity
+        subtotal += item_subtotal
+        lines.append({
+            'outfit': outfit,
+            'quantity': quantity,
+            'price_per_day': outfit.price,
+            'item_subtotal': item_subtotal,
+        })
+
+    if stale_ids:
+        logger.info(f"Removing inactive outfits from cart {cart.pk}: {stale_ids}")
+        CartItem.objects.filter(pk__in=stale_ids).delete()
+    return lines, subtotal
+
+
+def merge_carts(source, target):
+    """Moves source's items into target (quantities add up, capped at stock) and deletes source."""
+    with transaction.atomic():
+        existing = {item.outfit_id: item for item in target.items.select_related('outfit')}
+        for item in source.items.select_related('outfit'):
+            if item.outfit_id in existing:
+                mine = existing[item.outfit_id]
+                CartItem.objects.filter(pk=mine.pk).update(quantity=min(mine.quantity + item.quantity, mine.outfit.stock))
+            else:
+                CartItem.objects.filter(pk=item.pk).update(cart=target)
+        source.delete()
+
+
+@receiver(user_logged_in)
+def merge_anonymous_cart(sender, request, user, **kwargs):
+    """Moves the items an anonymous visitor collected into their account's cart."""
+    if request is None or not hasattr(request, 'session'):
+        return
+    cart_id = _session_cart_id(request)
+    anonymous = Cart.objects.filter(pk=cart_id, user__isnull=True).first() if cart_id else None
+    legacy = isinstance(request.session.get(settings.CART_SESSION_ID), dict)
+    if anonymous is None and not legacy:
+        return
+
+    for attr in ('_cart', '_cart_summary'):
+        if hasattr(request, attr):
+            delattr(request, attr)
+    if anonymous is not None:
+        existing = Cart.objects.filter(user=user).first()
+        if existing is None:
+            Cart.objects.filter(pk=anonymous.pk).update(user=user)
+        else:
+            merge_carts(anonymous, existing)
+    else:
+        cart = Cart.objects.get_or_create(user=user)[0]
+        _adopt_session_items(request, cart)
+    request.session.pop(settings.CART_SESSION_ID, None)
+
+
+def abandoned_carts(days=None):
+    """Anonymous carts untouched for ANONYMOUS_CART_TTL_DAYS; their sessions have most likely expired."""
+    days = days if days is not None else getattr(settings, 'ANONYMOUS_CART_TTL_DAYS', 30)
+    return Cart.objects.filter(user__isnull=True, updated_at__lt=timezone.now() - timedelta(days=days))
@@ -0,0 +1,110 @@
+# outfits/conditional.py
+"""
+Conditional GET (ETag / Last-Modified / 304) for the catalog pages.
+
+Validators are computed from a few aggregate queries before the view
+runs: the latest updated_at of the outfits a page shows and of their
+categories, plus row counts (which catch deletions and removed categories, as
+those leave no timestamp behind). The catalog pages also show the category
+menu, which lists every category with its count of active outfits, so they
+also depend on every category and on the whole active catalog. All of this
+comes from the database: a cache version would be per process with the
+default local-memory cache, and other workers would keep answering 304.
+Pages also show per-visitor data (header, cart and pending-order badges, CSRF
+field, flash messages), so the visitor's user id, cart, number of orders
+awaiting payment and pending messages go into the ETag too and the response
+is marked private: a browser revalidates and gets a 304, a shared cache never
+hands one visitor's page to another.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils.translation import get_language
+from django.views.decorators.http import condition
+
+from .carts import cart_summary
+from .context_processors import pending_order_count
+from .models import BookingDay, Category, Outfit
+
+
+def _digest(*parts):
+    return hashlib.md5(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _stamp(outfits):
+    """Changes to the given outfits or their categories, in one query."""
+    stamp = outfits.aggregate(
+        last=Max('updated_at'), category_last=Max('category__updated_at'),
+        total=Count('id'), categorized=Count('category'),
+    )
+    return [stamp['last'], stamp['category_last'], stamp['total'], stamp['categorized']]
+
+
+def _menu_stamp():
+    """Changes to the category menu: any category added, renamed or deleted."""
+    menu = Category.objects.aggregate(last=Max('updated_at'), total=Count('id'))
+    return [menu['last'], menu['total']]
+
+
+def _pending_orders(request):
+    """The header's pending-order badge, memoized where the context processor looks for it."""
+    if not hasattr(request, '_pending_order_count'):
+        request._pending_order_count = pending_order_count(request)
+    return request._pending_order_count
+
+
+def viewer_state(request):
+    """Per-visitor inputs to every catalog page."""
+    return [
+        request.user.pk,
+        cart_summary(request),
+        _pending_orders(request),
+        len(get_messages(request)),
+        get_language(),
+    ]
+
+
+def catalog_etag(request, category_slug=None, **kwargs):
+    outfits = Outfit.objects.filter(is_active=True)
+    # The menu's outfit counts cover the whole catalog, whatever the page lists
+    stamps = [_menu_stamp(), _stamp(outfits)]
+    if category_slug:
+        stamps.append(_stamp(outfits.filter(category__slug=category_slug)))
+    return _digest(stamps, viewer_state(request))
+
+
+def outfit_last_modified(request, pk, **kwargs):
+    row = Outfit.objects.filter(pk=pk, is_active=True).values_list('updated_at', 'category__updated_at').first()
+    if row is None:
+        return None
+    return max(value for value in row if value is not None)
+
+
+def outfit_etag(request, pk, **kwargs):
+    row = Outfit.objects.filter(pk=pk, is_active=True).values_list('updated_at', 'category_id', 'category__updated_at').first()
+    if row is None:
+        return None
+    # The page also lists related outfits and today's availability
+    related = _stamp(Outfit.objects.filter(category_id=row[1], is_active=True)) if row[1] else None
+    today = timezone.now().date()
+    booked = BookingDay.objects.filter(outfit_id=pk, day=today).values_list('quantity', flat=True).first()
+    return _digest(row, related, today, booked, viewer_state(request))
+
+
+def conditional_page(etag_func, last_modified_func=None):
+    """condition() plus Cache-Control: private, no-cache so browsers always revalidate."""
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
@@ -1,4 +1,37 @@
+# outfits/context_processors.py
+"""
+Header data for every RequestContext render.
+
+Admin, allauth and error pages get these variables too but never show them,
+so each is a lazy object: the session or database is only touched when a
+template actually renders the value, and the result is memoized on the
+request so several templates (or several uses in one) share one lookup.
+"""
+from django.utils.functional import SimpleLazyObject
+
+from .carts import cart_summary
+from .models import Order
+
+
+def _memoized(request, attr, compute):
+    def value():
+        if not hasattr(request, attr):
+            setattr(request, attr, compute(request))
+        return getattr(request, attr)
+    return SimpleLazyObject(value)
+
+
+def pending_order_count(request):
+    """Orders of the signed-in user that still wait for payment."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return 0
+    return Order.objects.filter(user=user, status=Order.STATUS_PENDING).count()
+
+
 def cart(request):
-    cart_data = request.session.get('cart', {})
-    cart_item_count = sum(item['quantity'] for item in cart_data.values())
-    return {'cart_item_count': cart_item_count}
+    return {
+        # cart_summary() memoizes itself on the request
+        'cart_item_count': SimpleLazyObject(lambda: cart_summary(request)['count']),
+        'pending_order_count': _memoized(request, '_pending_order_count', pending_order_count),
+    }
@@ -0,0 +1,65 @@
+# outfits/featured.py
+"""
+Featured outfits for the homepage.
+
+Instead of ORDER BY RANDOM() over the whole catalog, a pool of candidate ids
+with weights is built every FEATURED_POOL_TTL seconds and kept in the catalog
+cache (so any outfit or category change also rebuilds it):
+admin-curated outfits (is_featured) weigh most, then outfits that were
+rented recently, topped up with the newest outfits. Each request samples
+from the pool in Python and loads the chosen cards by primary key.
+"""
+import math
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from .cache import CATALOG, get_or_compute
+from .models import Order, OrderItem, Outfit
+
+POOL_SIZE = 60
+CURATED_WEIGHT = 5.0
+POPULAR_DAYS = 90
+
+
+def build_pool():
+    """Returns [(outfit_id, weight)] for the current catalog."""
+    weights = {}
+    for pk in Outfit.objects.filter(is_active=True, is_featured=True).values_list('pk', flat=True)[:POOL_SIZE]:
+        weights[pk] = CURATED_WEIGHT
+
+    since = timezone.now() - timedelta(days=POPULAR_DAYS)
+    popular = OrderItem.objects.filter(
+        outfit__is_active=True, order__created_at__gte=since
+    ).exclude(order__status=Order.STATUS_CANCELLED).values('outfit_id').annotate(
+        rentals=Count('id')
+    ).order_by('-rentals')[:POOL_SIZE]
+    for row in popular:
+        weights.setdefault(row['outfit_id'], 1.0 + math.log(row['rentals']))
+
+    if len(weights) < POOL_SIZE:
+        newest = Outfit.objects.filter(is_active=True).order_by('-pk').values_list('pk', flat=True)[:POOL_SIZE]
+        for pk in newest:
+            weights.setdefault(pk, 1.0)
+    return list(weights.items())
+
+
+def get_pool():
+    return get_or_compute(CATALOG, 'featured-pool', build_pool, getattr(settings, 'FEATURED_POOL_TTL', 600))
+
+
+def sample_ids(pool, count):
+    """Weighted sample without replacement (each id keyed by random() ** (1 / weight))."""
+    keyed = sorted(pool, key=lambda entry: random.random() ** (1.0 / entry[1]), reverse=True)
+    return [pk for pk, _ in keyed[:count]]
+
+
+def featured_outfits(count=6):
+    """Returns up to `count` active outfits sampled from the featured pool, with categories loaded."""
+    ids = sample_ids(get_pool(), count)
+    outfits = Outfit.objects.filter(pk__in=ids, is_active=True).select_related('category').in_bulk()
+    return [outfits[pk] for pk in ids if pk in outfits]
+
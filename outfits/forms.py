@@ -6,6 +6,55 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from .models import Outfit, Order, UserProfile
+from .uploads import process_slip, too_large_error
+
+
+# --- SlipUploadMixin ---
+class SlipUploadMixin:
+    """
+    Shrinks the slip image fields listed in `slip_fields` with process_slip().
+    Pass the request's `rejected_uploads` (see uploads.BoundedUploadHandler) so
+    files dropped for being too large show an error instead of going missing.
+    """
+    slip_fields = ()
+
+    def __init__(self, *args, rejected_uploads=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rejected_uploads = set(rejected_uploads)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for field in self.rejected_uploads:
+            if field in self.fields:
+                # Replaces "This field is required." for the file that was dropped
+                self._errors.pop(field, None)
+                self.add_error(field, too_large_error())
+            else:
+                self.add_error(None, too_large_error())
+        return cleaned_data
+
+    def _post_clean(self):
+        for field in self.slip_fields:
+            uploaded = self.cleaned_data.get(field)
+            if uploaded and field in self.files:
+                try:
+                    self.cleaned_data[field] = process_slip(uploaded)
+                except ValidationError as e:
+                    self.add_error(field, e)
+        super()._post_clean()
+
+# --- RentalDatesMixin ---
+class RentalDatesMixin:
+    """Checks the `rental_start_date` / `rental_end_date` pair of the forms that ask for a rental period."""
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get("rental_start_date")
+        end_date = cleaned_data.get("rental_end_date")
+
+        if start_date and end_date and end_date < start_date:
+            self.add_error('rental_end_date', _("Return date cannot be before the start date."))
+        return cleaned_data
 
 # --- CustomUserCreationForm ---
 class CustomUserCreationForm(UserCreationForm):
@@ -34,7 +83,7 @@ class OutfitForm(forms.ModelForm):
         fields = '__all__'
 
 # --- CheckoutForm ---
-class CheckoutForm(forms.Form):
+class CheckoutForm(RentalDatesMixin, forms.Form):
     text_input = forms.TextInput(attrs={'class': 'form-input'})
     email_input = forms.EmailInput(attrs={'class': 'form-input', 'autocomplete': 'email'})
     textarea = forms.Textarea(attrs={'rows': 3, 'class': 'form-textarea'})
@@ -56,21 +105,21 @@ class CheckoutForm(forms.Form):
         initial=lambda: timezone.now().date() + timezone.timedelta(days=4)
     )
 
-    def clean(self):
-        cleaned_data = super().clean()
-        start_date = cleaned_data.get("rental_start_date")
-        end_date = cleaned_data.get("rental_end_date")
+# --- AvailabilityCheckForm ---
+class AvailabilityCheckForm(RentalDatesMixin, forms.Form):
+    date_input = forms.DateInput(attrs={'type': 'date', 'class': 'form-input'})
 
-        if start_date and end_date and end_date < start_date:
-            self.add_error('rental_end_date', _("Return date cannot be before the start date."))
-        return cleaned_data
+    rental_start_date = forms.DateField(label=_('Rental Start Date'), widget=date_input)
+    rental_end_date = forms.DateField(label=_('Return Date'), widget=date_input)
 
 # --- CartAddItemForm ---
 class CartAddItemForm(forms.Form):
     pass
 
 # --- PaymentSlipUploadForm ---
-class PaymentSlipUploadForm(forms.ModelForm):
+class PaymentSlipUploadForm(SlipUploadMixin, forms.ModelForm):
+    slip_fields = ('payment_slip',)
+
     class Meta:
         model = Order
         fields = ['payment_datetime', 'payment_slip']
@@ -79,7 +128,7 @@ class PaymentSlipUploadForm(forms.ModelForm):
                 'type': 'datetime-local',
                 'placeholder': _('dd/mm/yyyy hh:mm')
             }),
-            'payment_slip': forms.FileInput(attrs={'accept': 'image/*,application/pdf'}),
+            'payment_slip': forms.FileInput(attrs={'accept': 'image/*'}),
         }
 
 # --- UserEditForm ---
@@ -127,7 +176,9 @@ class UserProfileForm(forms.ModelForm):
         fields = ('phone', 'address')
 
 # --- ReturnUploadForm ---
-class ReturnUploadForm(forms.ModelForm):
+class ReturnUploadForm(SlipUploadMixin, forms.ModelForm):
+    slip_fields = ('return_slip',)
+
     return_tracking_number = forms.CharField(
         label=_('Return Tracking Number'),
         max_length=100,
@@ -0,0 +1,158 @@
+# outfits/fuzzy.py
+"""
+Typo-tolerant matching over outfit and category names.
+
+Names are compared by trigram similarity, the way pg_trgm does it: each word
+is padded ("  word ") and cut into 3-character pieces, and
+similarity = shared / (query trigrams + name trigrams - shared).
+
+On PostgreSQL the pg_trgm extension and GIN indexes on the names do the work.
+Elsewhere the trigrams are precomputed into the NameTrigram table (indexed on
+the trigram) and candidates are found with one grouped query.
+"""
+import logging
+
+from django.db import connection, transaction
+from django.db.models import Count
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Category, NameTrigram, Outfit
+
+logger = logging.getLogger(__name__)
+
+SIMILARITY_THRESHOLD = 0.3
+CANDIDATE_LIMIT = 50
+
+
+def trigrams(text):
+    result = set()
+    for word in (text or '').lower().split():
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+class TrigramTableBackend:
+    def index_outfit(self, outfit):
+        NameTrigram.objects.filter(outfit=outfit).delete()
+        if outfit.is_active:
+            self._insert(trigrams(outfit.name), outfit=outfit)
+
+    def index_category(self, category):
+        NameTrigram.objects.filter(category=category).delete()
+        self._insert(trigrams(category.name), category=category)
+
+    def _insert(self, grams, **owner):
+        NameTrigram.objects.bulk_create([NameTrigram(trigram=gram, total=len(grams), **owner) for gram in grams])
+
+    def rebuild(self):
+        NameTrigram.objects.all().delete()
+        rows = []
+        for pk, name in Outfit.objects.filter(is_active=True).values_list('pk', 'name').iterator():
+            grams = trigrams(name)
+            rows.extend(NameTrigram(trigram=gram, total=len(grams), outfit_id=pk) for gram in grams)
+        for pk, name in Category.objects.values_list('pk', 'name'):
+            grams = trigrams(name)
+            rows.extend(NameTrigram(trigram=gram, total=len(grams), category_id=pk) for gram in grams)
+        NameTrigram.objects.bulk_create(rows, batch_size=2000)
+
+    def _similar(self, field, query, limit):
+        grams = trigrams(query)
+        if not grams:
+            return []
+        rows = NameTrigram.objects.filter(trigram__in=grams, **{f'{field}__isnull': False}).values(
+            field, 'total'
+        ).annotate(shared=Count('id')).order_by('-shared')[:CANDIDATE_LIMIT]
+        scored = []
+        for row in rows:
+            similarity = row['shared'] / (len(grams) + row['total'] - row['shared'])
+            if similarity >= SIMILARITY_THRESHOLD:
+                scored.append((row[field], similarity))
+        scored.sort(key=lambda pair: -pair[1])
+        return scored[:limit]
+
+    def similar_outfits(self, query, limit=12):
+        """Returns [(outfit_id, similarity)], most similar first."""
+        return self._similar('outfit', query, limit)
+
+    def similar_categories(self, query, limit=3):
+        return self._similar('category', query, limit)
+
+
+class PgTrgmBackend:
+    """Uses pg_trgm's % operator, which is served by the GIN trigram indexes."""
+
+    def index_outfit(self, outfit):
+        pass
+
+    def index_category(self, category):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def _similar(self, table, extra_where, query, limit):
+        # is_local: the threshold only lasts for this transaction, so it never
+        # leaks to later queries on a persistent or pooled connection
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('pg_trgm.similarity_threshold', %s, true)", [str(SIMILARITY_THRESHOLD)])
+            cursor.execute(
+                f"SELECT id, similarity(lower(name), lower(%s)) AS score FROM {table} "
+                f"WHERE lower(name) %% lower(%s){extra_where} ORDER BY score DESC LIMIT %s",
+                [query, query, limit],
+            )
+            return cursor.fetchall()
+
+    def similar_outfits(self, query, limit=12):
+        return self._similar('outfits_outfit', ' AND is_active', query, limit)
+
+    def similar_categories(self, query, limit=3):
+        return self._similar('outfits_category', '', query, limit)
+
+
+def get_backend():
+    return PgTrgmBackend() if connection.vendor == 'postgresql' else TrigramTableBackend()
+
+
+def fuzzy_outfit_ids(query, limit=12):
+    """Ids of active outfits whose names are close to the query, best first."""
+    return [pk for pk, _ in get_backend().similar_outfits(query, limit)]
+
+
+def did_you_mean(query, limit=3):
+    """Outfit and category names close to the query, best first."""
+    backend = get_backend()
+    scored = []
+    outfit_scores = backend.similar_outfits(query, limit)
+    names = Outfit.objects.in_bulk([pk for pk, _ in outfit_scores])
+    scored.extend((score, names[pk].name) for pk, score in outfit_scores if pk in names)
+    category_scores = backend.similar_categories(query, limit)
+    names = Category.objects.in_bulk([pk for pk, _ in category_scores])
+    scored.extend((score, names[pk].name) for pk, score in category_scores if pk in names)
+
+    suggestions = []
+    for _, name in sorted(scored, key=lambda pair: -pair[0]):
+        if name.lower() != query.lower() and name not in suggestions:
+            suggestions.append(name)
+    return suggestions[:limit]
+
+
+# ---------- Signal handlers ----------
+
+@receiver(post_save, sender=Outfit)
+def index_outfit_trigrams(sender, instance, **kwargs):
+    try:
+        with transaction.atomic():
+            get_backend().index_outfit(instance)
+    except Exception as e:
+        logger.error(f"Could not update name trigrams for outfit {instance.pk}: {e}", exc_info=True)
+
+
+@receiver(post_save, sender=Category)
+def index_category_trigrams(sender, instance, **kwargs):
+    try:
+        with transaction.atomic():
+            get_backend().index_category(instance)
+    except Exception as e:
+        logger.error(f"Could not update name trigrams for category {instance.pk}: {e}", exc_info=True)
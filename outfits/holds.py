@@ -0,0 +1,70 @@
+# outfits/holds.py
+"""
+Expiry of unpaid pending orders.
+
+A pending order holds stock only for settings.PENDING_ORDER_TTL_MINUTES. The
+sweep finds stale holds with an index range scan on (status, created_at),
+cancels them in batches with set-based UPDATEs and releases their ledger days.
+It runs from the expire_pending_orders command (cron, or --every N as a
+long-running process), never from inside the web processes.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import ledger
+from .transitions import record_events
+from .models import Order, OrderItem
+
+logger = logging.getLogger(__name__)
+
+EXPIRED_NOTE = "Payment window expired; order cancelled automatically."
+
+
+def expire_orders(order_ids):
+    """Cancels the given orders if they are still pending. Returns the number cancelled."""
+    order_ids = list(order_ids)
+    if not order_ids:
+        return 0
+    with transaction.atomic():
+        now = timezone.now()
+        pending = list(Order.objects.select_for_update().filter(pk__in=order_ids, status=Order.STATUS_PENDING).values_list('pk', flat=True))
+        spans = defaultdict(set)
+        rows = OrderItem.objects.filter(order_id__in=pending).values_list('outfit_id', 'order__rental_start_date', 'order__rental_end_date')
+        for outfit_id, start_date, end_date in rows:
+            spans[(start_date, end_date)].add(outfit_id)
+
+        cancelled = Order.objects.filter(pk__in=pending).update(
+            status=Order.STATUS_CANCELLED,
+            admin_payment_note=EXPIRED_NOTE,
+            updated_at=now,
+        )
+        # update() skips signals, so release the held days and record the change explicitly
+        for (start_date, end_date), outfit_ids in spans.items():
+            ledger.sync_span(outfit_ids, start_date, end_date)
+        record_events(dict.fromkeys(pending, Order.STATUS_PENDING), Order.STATUS_CANCELLED, now, note=EXPIRED_NOTE)
+    if cancelled:
+        logger.info(f"Expired {cancelled} pending order(s): {pending[:20]}")
+    return cancelled
+
+
+def stale_pending_orders(now=None):
+    cutoff = (now or timezone.now()) - timedelta(minutes=settings.PENDING_ORDER_TTL_MINUTES)
+    return Order.objects.filter(status=Order.STATUS_PENDING, created_at__lt=cutoff).order_by('created_at')
+
+
+def expire_stale_pending_orders(now=None, batch_size=500):
+    """Cancels every pending order past its payment window, batch by batch. Returns the total."""
+    total = 0
+    while True:
+        batch = list(stale_pending_orders(now).values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            return total
+        total += expire_orders(batch)
+        if len(batch) < batch_size:
+            return total
+
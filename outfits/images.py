@@ -0,0 +1,154 @@
+# outfits/images.py
+"""
+Resized WebP/JPEG renditions of Outfit.image.
+
+Uploads are often multi-megabyte camera photos, so each one gets fixed-width
+renditions (thumb, card, detail) in WebP and JPEG, stored next to each other
+under MEDIA_ROOT with names derived from the original:
+
+    outfits/dress.jpg -> outfits/derivatives/dress.jpg.card.webp, dress.jpg.card.jpg, ...
+
+Resizing a large photo takes seconds, so it never happens in a request:
+saving a new image only clears Outfit.image_renditions_ready, and
+`manage.py generate_image_derivatives` (from cron, or with --every as its own
+process) generates the renditions of every outfit still waiting and sets the
+flag again. Until then pages show the original. The flag also means rendering
+a card never asks the storage (a network call on remote storage). Templates use
+{% outfit_image %} to emit a <picture> with srcset/sizes so the browser picks
+the smallest file that fits.
+"""
+import logging
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import Outfit
+
+logger = logging.getLogger(__name__)
+
+# Rendition name -> width in pixels (height follows the aspect ratio, capped at 2x the width)
+RENDITIONS = {
+    'thumb': 160,
+    'card': 480,
+    'detail': 1080,
+}
+FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 78, 'method': 6},
+    'jpg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+DERIVATIVES_DIR = 'derivatives'
+
+
+def rendition_name(image_name, rendition, extension):
+    # The whole filename is kept, so dress.jpg and dress.png get separate renditions
+    directory, filename = posixpath.split(image_name)
+    return posixpath.join(directory, DERIVATIVES_DIR, f'{filename}.{rendition}.{extension}')
+
+
+def rendition_names(image_name):
+    return [rendition_name(image_name, rendition, extension) for rendition in RENDITIONS for extension in FORMATS]
+
+
+def has_derivatives(image_name, storage=None):
+    """Asks the storage; for rendering use Outfit.image_renditions_ready instead."""
+    # The largest JPEG is written last, so its presence means the set is complete
+    return (storage or default_storage).exists(rendition_name(image_name, 'detail', 'jpg'))
+
+
+def renditions_ready(outfit):
+    return bool(outfit.image) and outfit.image_renditions_ready
+
+
+def mark_ready(image_name):
+    """Flags the outfits showing image_name as having their renditions."""
+    # updated_at too: the picture markup changes, so the detail page's ETag must
+    return Outfit.objects.filter(image=image_name).update(image_renditions_ready=True, updated_at=timezone.now())
+
+
+def generate_derivatives(image_name, force=False, storage=None):
+    """Writes every rendition of image_name; returns how many files were written."""
+    storage = storage or default_storage
+    if not force and has_derivatives(image_name, storage):
+        return 0
+    with storage.open(image_name, 'rb') as source:
+        original = Image.open(source)
+        original.draft('RGB', (max(RENDITIONS.values()), max(RENDITIONS.values()) * 2))
+        original = ImageOps.exif_transpose(original).convert('RGB')
+
+    written = 0
+    for rendition, width in RENDITIONS.items():
+        image = original.copy()
+        image.thumbnail((width, width * 2), Image.LANCZOS)
+        for extension, options in FORMATS.items():
+            buffer = BytesIO()
+            image.save(buffer, **options)
+            name = rendition_name(image_name, rendition, extension)
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(buffer.getvalue()))
+            written += 1
+    return written
+
+
+def delete_derivatives(image_name, storage=None):
+    storage = storage or default_storage
+    for name in rendition_names(image_name):
+        if storage.exists(name):
+            storage.delete(name)
+
+
+def derivative_url(outfit, rendition, extension='jpg'):
+    """URL of one rendition of the outfit's image, or of the original until it has been generated."""
+    if renditions_ready(outfit):
+        return default_storage.url(rendition_name(outfit.image.name, rendition, extension))
+    return outfit.image.url
+
+
+def srcset(image_name, extension):
+    return ', '.join(
+        f'{default_storage.url(rendition_name(image_name, rendition, extension))} {width}w'
+        for rendition, width in RENDITIONS.items()
+    )
+
+
+# ---------- Signal handlers ----------
+
+@receiver(post_init, sender=Outfit)
+def remember_image(sender, instance, **kwargs):
+    instance._original_image_name = instance.__dict__.get('image') or ''
+    if not isinstance(instance._original_image_name, str):
+        instance._original_image_name = instance._original_image_name.name or ''
+
+
+def _safely(action, image_name):
+    try:
+        action(image_name)
+    except Exception as e:
+        logger.error(f"Could not update image derivatives for {image_name}: {e}", exc_info=True)
+
+
+@receiver(post_save, sender=Outfit)
+def refresh_derivatives(sender, instance, **kwargs):
+    old_name, new_name = instance._original_image_name, instance.image.name or ''
+    if old_name == new_name:
+        return
+    if instance.image_renditions_ready:
+        # Pages show the new original until generate_image_derivatives has run
+        Outfit.objects.filter(pk=instance.pk).update(image_renditions_ready=False)
+        instance.image_renditions_ready = False
+    if old_name:
+        transaction.on_commit(lambda: _safely(delete_derivatives, old_name))
+    instance._original_image_name = new_name
+
+
+@receiver(post_delete, sender=Outfit)
+def remove_derivatives(sender, instance, **kwargs):
+    if instance.image:
+        transaction.on_commit(lambda: _safely(delete_derivatives, instance.image.name))
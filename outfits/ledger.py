@@ -0,0 +1,139 @@
+# outfits/ledger.py
+"""
+Per-day booking ledger.
+
+Every outfit keeps one BookingDay row per day it is booked, holding the total
+quantity claimed by orders in Order.BOOKING_STATUSES. Availability checks read
+only the rows inside the requested span instead of aggregating order history.
+The ledger is derived data: any span can be recomputed from the live orders.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from .models import BookingDay, Order, OrderItem, Outfit
+
+
+def _days(start_date, end_date):
+    day = start_date
+    while day <= end_date:
+        yield day
+        day += timedelta(days=1)
+
+
+def compute_booked_days(outfit_ids=None, start_date=None, end_date=None):
+    """Returns {(outfit_id, day): quantity} computed from the live orders."""
+    items = OrderItem.objects.filter(
+        order__status__in=Order.BOOKING_STATUSES,
+        order__rental_start_date__isnull=False,
+        order__rental_end_date__isnull=False,
+    )
+    if outfit_ids is not None:
+        items = items.filter(outfit_id__in=outfit_ids)
+    if start_date and end_date:
+        items = items.filter(order__rental_start_date__lte=end_date, order__rental_end_date__gte=start_date)
+
+    booked = defaultdict(int)
+    rows = items.values_list('outfit_id', 'order__rental_start_date', 'order__rental_end_date', 'quantity')
+    for outfit_id, item_start, item_end, quantity in rows.iterator():
+        if start_date and end_date:
+            item_start, item_end = max(item_start, start_date), min(item_end, end_date)
+        for day in _days(item_start, item_end):
+            booked[(outfit_id, day)] += quantity
+    return booked
+
+
+def sync_span(outfit_ids, start_date, end_date):
+    """Recomputes the ledger rows of the given outfits within [start_date, end_date]."""
+    outfit_ids = set(outfit_ids)
+    if not outfit_ids or not start_date or not end_date or start_date > end_date:
+        return
+    with transaction.atomic():
+        # Same locks as reservations.place_order, so a checkout's claim cannot
+        # commit between reading the orders and rewriting their days
+        list(Outfit.objects.select_for_update().filter(pk__in=outfit_ids).order_by('pk').values_list('pk', flat=True))
+        booked = compute_booked_days(outfit_ids, start_date, end_date)
+        BookingDay.objects.filter(outfit_id__in=outfit_ids, day__range=(start_date, end_date)).delete()
+        BookingDay.objects.bulk_create([
+            BookingDay(outfit_id=outfit_id, day=day, quantity=quantity)
+            for (outfit_id, day), quantity in booked.items() if quantity
+        ])
+
+
+def sync_order(order, outfit_ids=None):
+    """Recomputes the ledger for every outfit and day touched by an order."""
+    if outfit_ids is None:
+        outfit_ids = order.items.values_list('outfit_id', flat=True)
+    sync_span(outfit_ids, order.rental_start_date, order.rental_end_date)
+
+
+def rebuild():
+    """Drops and recreates the whole ledger from the live orders. Returns the row count."""
+    booked = compute_booked_days()
+    with transaction.atomic():
+        BookingDay.objects.all().delete()
+        BookingDay.objects.bulk_create(
+            (BookingDay(outfit_id=outfit_id, day=day, quantity=quantity) for (outfit_id, day), quantity in booked.items()),
+            batch_size=1000,
+        )
+    return len(booked)
+
+
+def verify():
+    """Returns a list of (outfit_id, day, ledger_quantity, expected_quantity) mismatches."""
+    expected = compute_booked_days()
+    stored = {
+        (outfit_id, day): quantity
+        for outfit_id, day, quantity in BookingDay.objects.values_list('outfit_id', 'day', 'quantity').iterator()
+    }
+    mismatches = []
+    for key in sorted(set(expected) | set(stored)):
+        if expected.get(key, 0) != stored.get(key, 0):
+            mismatches.append((key[0], key[1], stored.get(key, 0), expected.get(key, 0)))
+    return mismatches
+
+
+# ---------- Signal handlers ----------
+
+@receiver(post_init, sender=Order)
+def remember_booking_state(sender, instance, **kwargs):
+    # Read from __dict__ so deferred fields are not loaded one query per instance
+    values = instance.__dict__
+    instance._ledger_state = (values.get('status'), values.get('rental_start_date'), values.get('rental_end_date'))
+
+
+@receiver(post_save, sender=Order)
+def sync_ledger_on_order_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_ledger_state', None)
+    current = (instance.status, instance.rental_start_date, instance.rental_end_date)
+    instance._ledger_state = current
+    if created or previous == current:
+        return
+
+    old_status, old_start, old_end = previous
+    was_booking = old_status in Order.BOOKING_STATUSES
+    is_booking = instance.status in Order.BOOKING_STATUSES
+    if not (was_booking or is_booking):
+        return
+
+    outfit_ids = list(instance.items.values_list('outfit_id', flat=True))
+    if was_booking and (old_start, old_end) != (instance.rental_start_date, instance.rental_end_date):
+        sync_span(outfit_ids, old_start, old_end)
+    sync_order(instance, outfit_ids)
+
+
+@receiver(post_save, sender=OrderItem)
+def sync_ledger_on_item_save(sender, instance, **kwargs):
+    order = instance.order
+    if order.status in Order.BOOKING_STATUSES:
+        sync_span([instance.outfit_id], order.rental_start_date, order.rental_end_date)
+
+
+@receiver(post_delete, sender=OrderItem)
+def sync_ledger_on_item_delete(sender, instance, **kwargs):
+    order = Order.objects.filter(pk=instance.order_id).only('status', 'rental_start_date', 'rental_end_date').first()
+    if order and order.status in Order.BOOKING_STATUSES:
+        sync_span([instance.outfit_id], order.rental_start_date, order.rental_end_date)
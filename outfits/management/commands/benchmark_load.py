@@ -0,0 +1,97 @@
+import json
+import multiprocessing
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from outfits import benchmark
+from outfits.synthetic import PREFIX
+
+
+class Command(BaseCommand):
+    help = (
+        "Drives the shop's routes from several processes against a running server (or a gunicorn "
+        "started with --serve), reports throughput and latency percentiles and saves them as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Server to load.")
+        parser.add_argument('--serve', action='store_true', help="Start gunicorn on --url's port for the run and stop it afterwards.")
+        parser.add_argument('--server-workers', type=int, default=4, help="gunicorn workers with --serve.")
+        parser.add_argument('--processes', type=int, default=4, help="Concurrent clients, one process each.")
+        parser.add_argument('--duration', type=float, default=30, help="Seconds to measure.")
+        parser.add_argument('--warmup', type=float, default=5, help="Seconds of unmeasured requests first.")
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--prefix', default=PREFIX, help="Prefix of the synthetic users to sign in as.")
+        parser.add_argument('--output', help="JSON file for the results (default: benchmarks/<time>-<revision>.json).")
+        parser.add_argument('--compare', help="An earlier results file to print the differences against.")
+
+    def start_server(self, url, workers):
+        port = urlsplit(url).port or 80
+        wsgi = settings.WSGI_APPLICATION.rsplit('.', 1)
+        server = subprocess.Popen([
+            sys.executable, '-m', 'gunicorn', f'{wsgi[0]}:{wsgi[1]}',
+            '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--log-level', 'warning',
+        ], cwd=settings.BASE_DIR)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("gunicorn exited before it was ready.")
+            try:
+                requests.get(url, timeout=1)
+                return server
+            except requests.RequestException:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError("gunicorn did not answer within 30 seconds.")
+
+    def handle(self, *args, **options):
+        try:
+            plan = benchmark.build_plan(options['url'], options['processes'], prefix=options['prefix'], seed=options['seed'])
+        except ValueError as error:
+            raise CommandError(error)
+
+        server = self.start_server(options['url'], options['server_workers']) if options['serve'] else None
+        try:
+            self.stdout.write(f"{options['processes']} process(es) against {options['url']} for {options['duration']}s (+{options['warmup']}s warm-up)...")
+            # Children only speak HTTP; don't let them inherit this process's database connections
+            connections.close_all()
+            arguments = [(plan, index, options['duration'], options['warmup'], options['seed']) for index in range(options['processes'])]
+            with multiprocessing.Pool(options['processes']) as pool:
+                worker_results = pool.starmap(benchmark.run_worker, arguments)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait()
+
+        options_used = {key: options[key] for key in ('url', 'processes', 'duration', 'warmup', 'seed', 'serve', 'server_workers')}
+        results = benchmark.report(benchmark.summarize(worker_results, options['duration']), options_used)
+        self.write_table(results)
+
+        output = Path(options['output'] or settings.BASE_DIR / 'benchmarks' / f"{timezone.now():%Y%m%d-%H%M%S}-{results['revision'] or 'unknown'}.json")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(results, indent=2), encoding='utf-8')
+        self.stdout.write(self.style.SUCCESS(f"Results saved to {output}"))
+
+        if options['compare']:
+            previous = benchmark.load_report(options['compare'])
+            self.stdout.write(f"\nAgainst {previous.get('revision')} ({options['compare']}):")
+            self.stdout.write(f"{'route':<18}{'p95 before':>12}{'p95 now':>10}{'rps before':>12}{'rps now':>10}")
+            for route, p95_before, p95_now, rps_before, rps_now in benchmark.compare(previous, results):
+                self.stdout.write(f"{route:<18}{p95_before or '-':>12}{p95_now or '-':>10}{rps_before or '-':>12}{rps_now or '-':>10}")
+
+    def write_table(self, results):
+        self.stdout.write(f"{'route':<18}{'requests':>9}{'errors':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)")
+        for route, stats in [('overall', results['overall'])] + list(results['routes'].items()):
+            self.stdout.write(
+                f"{route:<18}{stats['requests']:>9}{stats['errors']:>8}{stats['throughput_rps'] or '-':>9}"
+                f"{stats['p50_ms'] or '-':>9}{stats['p95_ms'] or '-':>9}{stats['p99_ms'] or '-':>9}{stats['max_ms'] or '-':>9}"
+            )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from outfits import pricing
+from outfits.models import Order
+
+
+class Command(BaseCommand):
+    help = "Finds orders whose stored line totals or total amount no longer match their items, and fixes them with --fix."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Recalculate the drifted orders.")
+
+    def handle(self, *args, **options):
+        drifted = list(pricing.drifted_orders().values_list('pk', 'total_amount', 'expected_total', 'drifted_lines'))
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS("All order totals match their items."))
+            return
+
+        for order_id, stored, expected, lines in drifted[:50]:
+            self.stdout.write(f"Order {order_id}: total={stored} expected={expected}, {lines} line(s) off")
+        if not options['fix']:
+            raise CommandError(f"{len(drifted)} order(s) with drifted totals. Run with --fix to recalculate them.")
+
+        fixed = pricing.recalculate(Order.objects.filter(pk__in=[row[0] for row in drifted]))
+        self.stdout.write(self.style.SUCCESS(f"Recalculated {fixed} order(s)."))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from outfits.holds import expire_stale_pending_orders, stale_pending_orders
+
+
+class Command(BaseCommand):
+    help = "Cancels pending orders whose payment window (PENDING_ORDER_TTL_MINUTES) has passed. Run it from cron, or with --every as its own process."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Only count the stale orders.")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--every', type=int, default=0, help="Keep running and sweep every this many seconds.")
+
+    def handle(self, *args, **options):
+        if options['dry_run']:
+            self.stdout.write(f"{stale_pending_orders().count()} pending order(s) past their payment window.")
+            return
+        while True:
+            expired = expire_stale_pending_orders(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"Expired {expired} pending order(s)."))
+            if not options['every']:
+                return
+            close_old_connections()
+            time.sleep(options['every'])
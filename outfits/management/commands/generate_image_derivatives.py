@@ -0,0 +1,69 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+
+from outfits.cache import bump
+from outfits.cards import CARDS
+from outfits.images import generate_derivatives, mark_ready
+from outfits.models import Outfit
+
+
+def _generate(image_name, force):
+    try:
+        return image_name, generate_derivatives(image_name, force=force), None
+    except Exception as e:
+        return image_name, 0, str(e)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generates the WebP/JPEG renditions of every outfit image that is still waiting for them. "
+        "Run it from cron, or with --every as its own process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Processes to resize images in.")
+        parser.add_argument('--force', action='store_true', help="Regenerate the renditions of every image, ready or not.")
+        parser.add_argument('--every', type=int, default=0, help="Keep running and look for new images every this many seconds.")
+
+    def handle(self, *args, **options):
+        while True:
+            self.generate(options['workers'], options['force'])
+            if not options['every']:
+                return
+            close_old_connections()
+            time.sleep(options['every'])
+
+    def generate(self, workers, force):
+        outfits = Outfit.objects.exclude(image='').exclude(image__isnull=True)
+        if not force:
+            outfits = outfits.filter(image_renditions_ready=False)
+        image_names = sorted(set(outfits.values_list('image', flat=True)))
+
+        if workers > 1 and len(image_names) > 1:
+            # Workers only touch storage, but must not inherit open database connections
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+                futures = [executor.submit(_generate, name, force) for name in image_names]
+                results = [future.result() for future in as_completed(futures)]
+        else:
+            results = [_generate(name, force) for name in image_names]
+
+        generated = failed = 0
+        for image_name, written, error in results:
+            if error:
+                failed += 1
+                self.stderr.write(f"{image_name}: {error}")
+                continue
+            mark_ready(image_name)
+            if written:
+                generated += 1
+
+        bump(CARDS)
+        self.stdout.write(self.style.SUCCESS(
+            f"Renditions generated for {generated} of {len(image_names)} image(s); {failed} failed."
+        ))
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from outfits import synthetic
+
+
+class Command(BaseCommand):
+    help = "Bulk-generates synthetic outfits, users with profiles and orders, e.g. `generate_synthetic_data --outfits 50000 --users 500000 --orders 2000000`."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--outfits', type=int, default=0)
+        parser.add_argument('--users', type=int, default=0, help="Users are named <prefix>_0000001 and share one password.")
+        parser.add_argument('--orders', type=int, default=0, help="Orders of synthetic users; each has 1 to --max-items items.")
+        parser.add_argument('--categories', type=int, default=20)
+        parser.add_argument('--max-items', type=int, default=3)
+        parser.add_argument('--batch-size', type=int, default=synthetic.BATCH_SIZE, help="Rows per INSERT.")
+        parser.add_argument('--seed', type=int, default=None, help="Makes the generated data repeatable.")
+        parser.add_argument('--prefix', default=synthetic.PREFIX, help="Marks the generated rows (category slugs and usernames).")
+        parser.add_argument('--clear', action='store_true', help="Delete the data generated with --prefix first.")
+
+    def progress(self, kind, done, total):
+        self.stdout.write(f"  {kind}: {done}/{total}")
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            deleted = synthetic.clear(options['prefix'])
+            self.stdout.write(f"Deleted {', '.join(f'{count} {label}' for label, count in deleted.items() if count) or 'nothing'}.")
+        if not (options['outfits'] or options['users'] or options['orders']):
+            if options['clear']:
+                return
+            raise CommandError("Give at least one of --outfits, --users or --orders.")
+
+        try:
+            synthetic.generate(
+                outfits=options['outfits'], users=options['users'], orders=options['orders'],
+                categories=options['categories'], max_items=options['max_items'], prefix=options['prefix'],
+                seed=options['seed'], batch_size=options['batch_size'], progress=self.progress,
+            )
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {options['outfits']} outfit(s), {options['users']} user(s) and {options['orders']} order(s). "
+            f"Synthetic users sign in with the password '{synthetic.PASSWORD}'."
+        ))
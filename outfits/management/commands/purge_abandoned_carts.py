@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from outfits.carts import abandoned_carts
+
+
+class Command(BaseCommand):
+    help = "Deletes anonymous carts that have not changed for ANONYMOUS_CART_TTL_DAYS."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help="Override ANONYMOUS_CART_TTL_DAYS.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the abandoned carts.")
+
+    def handle(self, *args, **options):
+        carts = abandoned_carts(options['days'])
+        if options['dry_run']:
+            self.stdout.write(f"{carts.count()} abandoned anonymous cart(s).")
+            return
+        _, deleted = carts.delete()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted.get('outfits.Cart', 0)} abandoned cart(s)."))
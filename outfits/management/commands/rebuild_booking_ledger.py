@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from outfits import ledger
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per-day booking ledger from live orders, or verifies it with --verify."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verify', action='store_true', help="Only compare the ledger against live orders; do not write.")
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            mismatches = ledger.verify()
+            for outfit_id, day, stored, expected in mismatches[:50]:
+                self.stdout.write(f"Outfit {outfit_id} on {day}: ledger={stored} expected={expected}")
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} ledger row(s) out of sync. Run without --verify to rebuild.")
+            self.stdout.write(self.style.SUCCESS("Booking ledger matches live orders."))
+            return
+
+        rows = ledger.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Booking ledger rebuilt with {rows} row(s)."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from outfits import fuzzy
+from outfits.search import get_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the outfit full-text search index and name trigrams from the catalog."
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        backend.rebuild()
+        fuzzy.get_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt ({backend.__class__.__name__})."))
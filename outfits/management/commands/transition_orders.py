@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from outfits.models import Order
+from outfits.transitions import TRANSITIONS, bulk_transition
+
+
+class Command(BaseCommand):
+    help = "Moves orders through a status transition in bulk, e.g. `transition_orders ship --status processing`."
+
+    def add_arguments(self, parser):
+        parser.add_argument('transition', choices=sorted(TRANSITIONS))
+        parser.add_argument('order_ids', nargs='*', type=int, help="Orders to move.")
+        parser.add_argument('--status', help="Also select every order currently in this status.")
+        parser.add_argument('--user', help="Username recorded in the payment note.")
+
+    def handle(self, *args, **options):
+        order_ids = list(options['order_ids'])
+        if options['status']:
+            order_ids += Order.objects.filter(status=options['status']).values_list('pk', flat=True)
+        if not order_ids:
+            raise CommandError("Give order ids or --status.")
+
+        user = None
+        if options['user']:
+            user = get_user_model().objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"No user named {options['user']}.")
+
+        result = bulk_transition(options['transition'], order_ids, user=user)
+        for order_id, outcome in sorted(result.skipped.items()):
+            self.stdout.write(f"Order {order_id}: {outcome}")
+        self.stdout.write(self.style.SUCCESS(f"Moved {len(result)} order(s) to {TRANSITIONS[options['transition']].target}."))
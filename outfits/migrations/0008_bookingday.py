@@ -0,0 +1,56 @@
+# Generated by Django 4.2.9 on 2026-10-18 14:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+from collections import defaultdict
+from datetime import timedelta
+
+BOOKING_STATUSES = ['pending', 'waiting_for_approval', 'processing', 'shipped', 'rented']
+
+
+def populate_ledger(apps, schema_editor):
+    OrderItem = apps.get_model('outfits', 'OrderItem')
+    BookingDay = apps.get_model('outfits', 'BookingDay')
+    booked = defaultdict(int)
+    rows = OrderItem.objects.filter(
+        order__status__in=BOOKING_STATUSES,
+        order__rental_start_date__isnull=False,
+        order__rental_end_date__isnull=False,
+    ).values_list('outfit_id', 'order__rental_start_date', 'order__rental_end_date', 'quantity')
+    for outfit_id, start, end, quantity in rows.iterator():
+        day = start
+        while day <= end:
+            booked[(outfit_id, day)] += quantity
+            day += timedelta(days=1)
+    BookingDay.objects.bulk_create(
+        (BookingDay(outfit_id=outfit_id, day=day, quantity=quantity) for (outfit_id, day), quantity in booked.items()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outfits', '0007_alter_order_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookingDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Day')),
+                ('quantity', models.PositiveIntegerField(default=0, verbose_name='Booked Quantity')),
+                ('outfit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='booking_days', to='outfits.outfit', verbose_name='Outfit')),
+            ],
+            options={
+                'verbose_name': 'Booking Day',
+                'verbose_name_plural': 'Booking Days',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='bookingday',
+            constraint=models.UniqueConstraint(fields=('outfit', 'day'), name='unique_booking_day_per_outfit'),
+        ),
+        migrations.RunPython(populate_ledger, migrations.RunPython.noop),
+    ]
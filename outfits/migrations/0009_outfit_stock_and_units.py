@@ -0,0 +1,42 @@
+# Generated by Django 4.2.9 on 2026-10-18 14:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outfits', '0008_bookingday'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outfit',
+            name='stock',
+            field=models.PositiveIntegerField(default=1, help_text='How many copies can be rented at the same time. Kept in sync with the unit list when units are recorded.', verbose_name='Units in Stock'),
+        ),
+        migrations.CreateModel(
+            name='OutfitUnit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(help_text='Label or tag number of this copy, e.g. M-01', max_length=50, verbose_name='Unit Code')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Active')),
+                ('outfit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='units', to='outfits.outfit', verbose_name='Outfit')),
+            ],
+            options={
+                'verbose_name': 'Outfit Unit',
+                'verbose_name_plural': 'Outfit Units',
+                'ordering': ('outfit', 'code'),
+            },
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='units',
+            field=models.ManyToManyField(blank=True, related_name='order_items', to='outfits.outfitunit', verbose_name='Allocated Units'),
+        ),
+        migrations.AddConstraint(
+            model_name='outfitunit',
+            constraint=models.UniqueConstraint(fields=('outfit', 'code'), name='unique_unit_code_per_outfit'),
+        ),
+    ]
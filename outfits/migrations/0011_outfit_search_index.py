@@ -0,0 +1,82 @@
+import re
+
+from django.db import migrations
+
+# A frozen copy of outfits.search.tokenize as it was when this migration was
+# written, so later changes to the app cannot change what it does. It always
+# splits Thai into character bigrams; with PyThaiNLP installed the app splits
+# Thai into words instead, so run `python manage.py rebuild_search_index`
+# after migrating in that case. New and edited outfits are indexed by the
+# signal handlers in outfits.search.
+THAI_RUN = re.compile(r'[\u0E00-\u0E7F]+')
+TOKEN_RUN = re.compile(r'[\u0E00-\u0E7F]+|[^\W_]+')
+
+
+def tokenize(text):
+    tokens = []
+    for run in TOKEN_RUN.findall((text or '').lower()):
+        if THAI_RUN.fullmatch(run) and len(run) >= 3:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def tsvector_literal(tokens):
+    return ' '.join(
+        "'{}':{}".format(token.replace('\\', '\\\\').replace("'", "''"), min(position, 16383))
+        for position, token in enumerate(tokens, 1)
+    )
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    Outfit = apps.get_model('outfits', 'Outfit')
+    outfits = Outfit.objects.filter(is_active=True).select_related('category')
+
+    def document(outfit):
+        category = outfit.category.name if outfit.category else ''
+        return tokenize(outfit.name), tokenize(outfit.description), tokenize(category)
+
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE outfits_outfit_fts USING fts5("
+            "name, description, category, tokenize = \"unicode61 categories 'L* N* Co M*'\")"
+        )
+        for outfit in outfits.iterator():
+            schema_editor.execute(
+                "INSERT INTO outfits_outfit_fts (rowid, name, description, category) VALUES (%s, %s, %s, %s)",
+                [outfit.pk, *(' '.join(tokens) for tokens in document(outfit))],
+            )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE outfits_outfit_search ("
+            "outfit_id bigint PRIMARY KEY REFERENCES outfits_outfit (id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute("CREATE INDEX outfits_outfit_search_gin ON outfits_outfit_search USING GIN (document)")
+        for outfit in outfits.iterator():
+            schema_editor.execute(
+                "INSERT INTO outfits_outfit_search (outfit_id, document) VALUES (%s, "
+                "setweight(%s::tsvector, 'A') || setweight(%s::tsvector, 'C') || setweight(%s::tsvector, 'B'))",
+                [outfit.pk, *(tsvector_literal(tokens) for tokens in document(outfit))],
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS outfits_outfit_fts")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP TABLE IF EXISTS outfits_outfit_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outfits', '0010_order_status_created_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.9 on 2026-10-18 15:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# A frozen copy of outfits.fuzzy.trigrams as it was when this migration was
+# written, so later changes to the app cannot change what it does. New and
+# edited names are indexed by the signal handlers in outfits.fuzzy.
+def trigrams(text):
+    result = set()
+    for word in (text or '').lower().split():
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def build_name_trigrams(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        # pg_trgm indexes the names themselves
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        schema_editor.execute("CREATE INDEX outfits_outfit_name_trgm ON outfits_outfit USING GIN (lower(name) gin_trgm_ops)")
+        schema_editor.execute("CREATE INDEX outfits_category_name_trgm ON outfits_category USING GIN (lower(name) gin_trgm_ops)")
+        return
+
+    Outfit = apps.get_model('outfits', 'Outfit')
+    Category = apps.get_model('outfits', 'Category')
+    NameTrigram = apps.get_model('outfits', 'NameTrigram')
+    rows = []
+    for pk, name in Outfit.objects.filter(is_active=True).values_list('pk', 'name').iterator():
+        grams = trigrams(name)
+        rows.extend(NameTrigram(trigram=gram, total=len(grams), outfit_id=pk) for gram in grams)
+    for pk, name in Category.objects.values_list('pk', 'name'):
+        grams = trigrams(name)
+        rows.extend(NameTrigram(trigram=gram, total=len(grams), category_id=pk) for gram in grams)
+    NameTrigram.objects.bulk_create(rows, batch_size=2000)
+
+
+def drop_name_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute("DROP INDEX IF EXISTS outfits_outfit_name_trgm")
+        schema_editor.execute("DROP INDEX IF EXISTS outfits_category_name_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outfits', '0011_outfit_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NameTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(db_index=True, max_length=3, verbose_name='Trigram')),
+                ('total', models.PositiveSmallIntegerField(verbose_name='Trigrams in Name')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='name_trigrams', to='outfits.category', verbose_name='Category')),
+                ('outfit', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='name_trigrams', to='outfits.outfit', verbose_name='Outfit')),
+            ],
+            options={
+                'verbose_name': 'Name Trigram',
+                'verbose_name_plural': 'Name Trigrams',
+            },
+        ),
+        migrations.RunPython(build_name_trigrams, drop_name_trigram_indexes),
+    ]
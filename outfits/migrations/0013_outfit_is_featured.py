@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outfits', '0012_name_trigrams'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outfit',
+            name='is_featured',
+            field=models.BooleanField(default=False, help_text='Featured outfits are shown on the homepage more often.', verbose_name='Featured'),
+        ),
+    ]
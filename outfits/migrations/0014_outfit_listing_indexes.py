@@ -0,0 +1,21 @@
+# Generated by Django 4.2.9 on 2026-10-18 15:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outfits', '0013_outfit_is_featured'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='outfit',
+            index=models.Index(fields=['is_active', 'name', 'id'], name='outfit_listing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outfit',
+            index=models.Index(fields=['category', 'is_active', 'name', 'id'], name='outfit_category_listing_idx'),
+        ),
+    ]
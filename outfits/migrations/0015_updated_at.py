@@ -0,0 +1,28 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outfits', '0014_outfit_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Last Updated'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='outfit',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Last Updated'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='outfit',
+            index=models.Index(fields=['is_active', 'updated_at'], name='outfit_active_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.9 on 2026-10-18 15:21
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def populate_line_totals(apps, schema_editor):
+    OrderItem = apps.get_model('outfits', 'OrderItem')
+    items = []
+    for item in OrderItem.objects.select_related('order').iterator(chunk_size=1000):
+        start, end = item.order.rental_start_date, item.order.rental_end_date
+        days = (end - start).days + 1 if start and end and end >= start else 0
+        item.line_total = (item.price_per_day or Decimal('0.00')) * item.quantity * days
+        items.append(item)
+    OrderItem.objects.bulk_update(items, ['line_total'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outfits', '0016_cart'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orderitem',
+            name='line_total',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Line Total'),
+        ),
+        migrations.RunPython(populate_line_totals, migrations.RunPython.noop),
+    ]
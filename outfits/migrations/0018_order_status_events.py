@@ -0,0 +1,48 @@
+# Generated by Django 4.2.9 on 2026-10-18 15:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def seed_events(apps, schema_editor):
+    # History before this table is unknown: record the creation and the current status
+    Order = apps.get_model('outfits', 'Order')
+    OrderStatusEvent = apps.get_model('outfits', 'OrderStatusEvent')
+    events = []
+    for order_id, status, created_at, updated_at in Order.objects.values_list('pk', 'status', 'created_at', 'updated_at').iterator():
+        events.append(OrderStatusEvent(order_id=order_id, status='pending', at=created_at))
+        if status != 'pending':
+            events.append(OrderStatusEvent(order_id=order_id, from_status='pending', status=status, at=updated_at, note='Recorded when status history was introduced.'))
+    OrderStatusEvent.objects.bulk_create(events, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('outfits', '0017_orderitem_line_total'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(blank=True, choices=[('pending', 'Pending Payment'), ('waiting_for_approval', 'Waiting for Payment Approval'), ('failed', 'Payment Failed'), ('processing', 'Processing'), ('shipped', 'Shipped to Customer'), ('rented', 'Rented (With Customer)'), ('return_shipped', 'Return Shipped by Customer'), ('return_received', 'Return Received'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=30, verbose_name='From Status')),
+                ('status', models.CharField(choices=[('pending', 'Pending Payment'), ('waiting_for_approval', 'Waiting for Payment Approval'), ('failed', 'Payment Failed'), ('processing', 'Processing'), ('shipped', 'Shipped to Customer'), ('rented', 'Rented (With Customer)'), ('return_shipped', 'Return Shipped by Customer'), ('return_received', 'Return Received'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=30, verbose_name='Status')),
+                ('at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='At')),
+                ('note', models.CharField(blank=True, max_length=255, verbose_name='Note')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='outfits.order', verbose_name='Rental Order')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_status_events', to=settings.AUTH_USER_MODEL, verbose_name='Changed By')),
+            ],
+            options={
+                'verbose_name': 'Order Status Event',
+                'verbose_name_plural': 'Order Status Events',
+                'ordering': ('at', 'id'),
+                'indexes': [models.Index(fields=['status', 'at'], name='order_event_status_at_idx')],
+            },
+        ),
+        migrations.RunPython(seed_events, migrations.RunPython.noop),
+    ]
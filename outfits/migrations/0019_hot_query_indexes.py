@@ -0,0 +1,61 @@
+# Generated by Django 4.2.9 on 2026-10-18 15:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outfits', '0018_order_status_events'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='outfit',
+            name='outfit_listing_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='outfit',
+            name='outfit_category_listing_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='outfit',
+            name='outfit_active_updated_idx',
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'rental_start_date', 'rental_end_date'], name='order_status_rental_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'created_at'], name='order_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['user'], name='order_pending_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['created_at'], name='order_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['outfit', 'order'], name='orderitem_outfit_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outfit',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['name', 'id'], name='outfit_active_listing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outfit',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', 'name', 'id'], name='outfit_active_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outfit',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['updated_at', 'category'], name='outfit_active_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outfit',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_featured', True)), fields=['name', 'id'], name='outfit_featured_idx'),
+        ),
+    ]
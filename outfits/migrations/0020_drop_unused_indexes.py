@@ -0,0 +1,21 @@
+# Generated by Django 4.2.9 on 2026-10-18 15:45
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outfits', '0019_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='order',
+            name='order_pending_user_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='orderitem',
+            name='orderitem_outfit_order_idx',
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.9 on 2026-10-18 15:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('outfits', '0020_drop_unused_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outfit',
+            name='image_renditions_ready',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Image Renditions Ready'),
+        ),
+    ]
@@ -6,14 +6,14 @@ from django.utils.translation import gettext_lazy as _  # 👈 เพิ่ม
 from django.utils import timezone
 from datetime import date, timedelta
 from decimal import Decimal
-from django.db.models import Sum
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 # --- Category Model ---
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True, verbose_name=_("Category Name"))
     slug = models.SlugField(max_length=100, unique=True, blank=True, help_text=_("Used for URL (auto-generated if blank)"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Last Updated"))
 
     class Meta:
         verbose_name = _("Category")
@@ -39,13 +39,29 @@ class Outfit(models.Model):
     name = models.CharField(max_length=100, verbose_name=_("Outfit Name"))
     description = models.TextField(verbose_name=_("Description"))
     image = models.ImageField(upload_to='outfits/', null=True, blank=True, verbose_name=_("Image"))
+    # Set once the resized renditions exist (outfits.images), so pages don't ask the storage
+    image_renditions_ready = models.BooleanField(default=False, editable=False, verbose_name=_("Image Renditions Ready"))
     price = models.DecimalField(max_digits=10, decimal_places=2, default=0.00, verbose_name=_("Rental Price per Day"))
     is_active = models.BooleanField(default=True, verbose_name=_("Active"))
+    is_featured = models.BooleanField(default=False, verbose_name=_("Featured"), help_text=_("Featured outfits are shown on the homepage more often."))
+    stock = models.PositiveIntegerField(default=1, verbose_name=_("Units in Stock"), help_text=_("How many copies can be rented at the same time. Kept in sync with the unit list when units are recorded."))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Last Updated"))
 
     class Meta:
         verbose_name = _("Outfit")
         verbose_name_plural = _("Outfits")
         ordering = ('name',)
+        indexes = [
+            # Keyset pagination walks the listings in (name, id) order. Partial, because
+            # filter(is_active=True) compiles to a bare WHERE "is_active", which
+            # SQLite cannot match against a leading is_active column.
+            models.Index(fields=['name', 'id'], condition=models.Q(is_active=True), name='outfit_active_listing_idx'),
+            models.Index(fields=['category', 'name', 'id'], condition=models.Q(is_active=True), name='outfit_active_category_idx'),
+            # Conditional GET validators take MAX(updated_at) over the active catalog
+            models.Index(fields=['updated_at', 'category'], condition=models.Q(is_active=True), name='outfit_active_updated_idx'),
+            # The curated part of the featured pool (outfits.featured)
+            models.Index(fields=['name', 'id'], condition=models.Q(is_active=True, is_featured=True), name='outfit_featured_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -53,14 +69,26 @@ class Outfit(models.Model):
     def is_available(self, start_date, end_date, quantity=1):
         if not start_date or not end_date or start_date > end_date or quantity < 1:
             return False
-        relevant_statuses = ['pending', 'waiting_for_approval', 'processing', 'shipped', 'rented']
-        overlapping_items = self.order_items.filter(
-            order__status__in=relevant_statuses,
-            order__rental_start_date__lte=end_date,
-            order__rental_end_date__gte=start_date
-        )
-        booked_quantity = overlapping_items.aggregate(total_quantity=Sum('quantity'))['total_quantity'] or 0
-        return booked_quantity < 1
+        from .availability import unavailable_outfit_ids
+        return not unavailable_outfit_ids({self.pk: quantity}, start_date, end_date)
+
+# --- OutfitUnit Model ---
+class OutfitUnit(models.Model):
+    """One physical copy of an outfit (e.g. a specific size or sample)."""
+    outfit = models.ForeignKey(Outfit, related_name='units', on_delete=models.CASCADE, verbose_name=_("Outfit"))
+    code = models.CharField(max_length=50, verbose_name=_("Unit Code"), help_text=_("Label or tag number of this copy, e.g. M-01"))
+    is_active = models.BooleanField(default=True, verbose_name=_("Active"))
+
+    class Meta:
+        verbose_name = _("Outfit Unit")
+        verbose_name_plural = _("Outfit Units")
+        ordering = ('outfit', 'code')
+        constraints = [
+            models.UniqueConstraint(fields=['outfit', 'code'], name='unique_unit_code_per_outfit'),
+        ]
+
+    def __str__(self):
+        return f"{self.outfit.name} [{self.code}]"
 
 # --- Order Model ---
 class Order(models.Model):
@@ -88,6 +116,29 @@ class Order(models.Model):
         (STATUS_CANCELLED, _("Cancelled")),
     ]
 
+    # Statuses whose items hold stock for the rental period
+    BOOKING_STATUSES = [
+        STATUS_PENDING,
+        STATUS_WAITING_FOR_APPROVAL,
+        STATUS_PROCESSING,
+        STATUS_SHIPPED,
+        STATUS_RENTED,
+    ]
+
+    # Allowed status changes; anything else is rejected (see outfits.transitions)
+    TRANSITIONS = {
+        STATUS_PENDING: {STATUS_WAITING_FOR_APPROVAL, STATUS_FAILED, STATUS_CANCELLED},
+        STATUS_WAITING_FOR_APPROVAL: {STATUS_PROCESSING, STATUS_FAILED, STATUS_CANCELLED},
+        STATUS_FAILED: {STATUS_WAITING_FOR_APPROVAL, STATUS_CANCELLED},
+        STATUS_PROCESSING: {STATUS_SHIPPED, STATUS_CANCELLED},
+        STATUS_SHIPPED: {STATUS_RENTED, STATUS_RETURN_SHIPPED},
+        STATUS_RENTED: {STATUS_RETURN_SHIPPED},
+        STATUS_RETURN_SHIPPED: {STATUS_RETURN_RECEIVED},
+        STATUS_RETURN_RECEIVED: {STATUS_COMPLETED},
+        STATUS_COMPLETED: set(),
+        STATUS_CANCELLED: set(),
+    }
+
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='orders', verbose_name=_("User"))
     first_name = models.CharField(max_length=100, verbose_name=_("First Name"))
     last_name = models.CharField(max_length=100, verbose_name=_("Last Name"))
@@ -115,6 +166,16 @@ class Order(models.Model):
         verbose_name = _("Rental Order")
         verbose_name_plural = _("Rental Orders")
         ordering = ('-created_at',)
+        indexes = [
+            # Used by the pending-hold sweeper (outfits.holds)
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+            # Booking ledger and unit allocation: booking orders overlapping a span
+            models.Index(fields=['status', 'rental_start_date', 'rental_end_date'], name='order_status_rental_idx'),
+            # Order history, newest first; also the header badge of orders awaiting payment
+            models.Index(fields=['user', 'created_at'], name='order_user_created_idx'),
+            # Admin changelist and the featured pool's "rented lately" window
+            models.Index(fields=['created_at'], name='order_created_idx'),
+        ]
 
     def __str__(self):
         return f"Order #{self.id} ({self.first_name} {self.last_name})"
@@ -125,22 +186,41 @@ class Order(models.Model):
             return (self.rental_end_date - self.rental_start_date).days + 1
         return 0
 
+    @property
+    def payment_deadline(self):
+        if self.status != self.STATUS_PENDING or not self.created_at:
+            return None
+        return self.created_at + timedelta(minutes=settings.PENDING_ORDER_TTL_MINUTES)
+
+    @property
+    def is_hold_expired(self):
+        deadline = self.payment_deadline
+        return deadline is not None and deadline <= timezone.now()
+
     def calculate_items_total(self):
-        total = Decimal('0.00')
-        duration = self.rental_duration_days
-        if duration > 0 and self.pk:
-            for item in self.items.all():
-                if item.price_per_day is not None:
-                    total += item.price_per_day * duration * item.quantity
-        return total
+        from .pricing import items_total
+        if not self.pk:
+            return Decimal('0.00')
+        return items_total(self)
 
     def calculate_total_amount(self):
         return self.calculate_items_total() + self.shipping_cost
 
+    @classmethod
+    def can_transition(cls, from_status, to_status):
+        return from_status == to_status or to_status in cls.TRANSITIONS.get(from_status, ())
+
     def clean(self):
         if self.rental_start_date and self.rental_end_date:
             if self.rental_end_date < self.rental_start_date:
                 raise ValidationError(_("Rental end date cannot be before the start date."))
+        # Set from the database row when the instance is loaded (outfits.transitions)
+        original_status = getattr(self, '_original_status', None)
+        if self.pk and original_status and not self.can_transition(original_status, self.status):
+            raise ValidationError({'status': _("An order cannot move from %(old)s to %(new)s.") % {
+                'old': dict(self.STATUS_CHOICES).get(original_status, original_status),
+                'new': self.get_status_display(),
+            }})
 
 # --- OrderItem Model ---
 class OrderItem(models.Model):
@@ -148,6 +228,9 @@ class OrderItem(models.Model):
     outfit = models.ForeignKey(Outfit, related_name='order_items', on_delete=models.PROTECT, verbose_name=_("Outfit"))
     price_per_day = models.DecimalField(max_digits=10, decimal_places=2, verbose_name=_("Price per Day (at time of order)"), null=True, blank=True)
     quantity = models.PositiveIntegerField(default=1, verbose_name=_("Quantity"))
+    units = models.ManyToManyField(OutfitUnit, blank=True, related_name='order_items', verbose_name=_("Allocated Units"))
+    # price_per_day x quantity x rental days, kept by save() and outfits.pricing
+    line_total = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name=_("Line Total"))
 
     class Meta:
         verbose_name = _("Order Item")
@@ -158,16 +241,103 @@ class OrderItem(models.Model):
 
     @property
     def item_total_cost(self):
-        if hasattr(self, 'order') and self.order:
-            duration = self.order.rental_duration_days
-            if self.price_per_day is not None and duration > 0:
-                return self.price_per_day * duration * self.quantity
-        return Decimal('0.00')
+        return self.line_total
 
     def save(self, *args, **kwargs):
+        from . import pricing
         if not self.pk and self.outfit and self.price_per_day is None:
             self.price_per_day = self.outfit.price
+        # Items saved outside reservations.place_order (admin, shell, fixtures) keep their totals right too
+        self.line_total = pricing.line_total(self.price_per_day, self.quantity, self.order.rental_duration_days)
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'line_total'}
         super().save(*args, **kwargs)
+        pricing.recalculate_order_totals(Order.objects.filter(pk=self.order_id))
+
+# --- OrderStatusEvent Model ---
+class OrderStatusEvent(models.Model):
+    """One status change of an order, appended by outfits.transitions and never edited."""
+    order = models.ForeignKey(Order, related_name='status_events', on_delete=models.CASCADE, verbose_name=_("Rental Order"))
+    from_status = models.CharField(max_length=30, blank=True, choices=Order.STATUS_CHOICES, verbose_name=_("From Status"))
+    status = models.CharField(max_length=30, choices=Order.STATUS_CHOICES, verbose_name=_("Status"))
+    at = models.DateTimeField(default=timezone.now, verbose_name=_("At"))
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, related_name='order_status_events', on_delete=models.SET_NULL, verbose_name=_("Changed By"))
+    note = models.CharField(max_length=255, blank=True, verbose_name=_("Note"))
+
+    class Meta:
+        verbose_name = _("Order Status Event")
+        verbose_name_plural = _("Order Status Events")
+        ordering = ('at', 'id')
+        indexes = [
+            # "Orders that reached <status> between <at> and <at>"
+            models.Index(fields=['status', 'at'], name='order_event_status_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"Order #{self.order_id}: {self.from_status or '-'} -> {self.status} at {self.at:%Y-%m-%d %H:%M}"
+
+# --- BookingDay Model ---
+class BookingDay(models.Model):
+    """Booked quantity of one outfit on one day, maintained by outfits.ledger."""
+    outfit = models.ForeignKey(Outfit, related_name='booking_days', on_delete=models.CASCADE, verbose_name=_("Outfit"))
+    day = models.DateField(verbose_name=_("Day"))
+    quantity = models.PositiveIntegerField(default=0, verbose_name=_("Booked Quantity"))
+
+    class Meta:
+        verbose_name = _("Booking Day")
+        verbose_name_plural = _("Booking Days")
+        constraints = [
+            models.UniqueConstraint(fields=['outfit', 'day'], name='unique_booking_day_per_outfit'),
+        ]
+
+    def __str__(self):
+        return f"{self.outfit_id} @ {self.day}: {self.quantity}"
+
+# --- NameTrigram Model ---
+class NameTrigram(models.Model):
+    """Trigram of an outfit or category name, maintained by outfits.fuzzy for typo-tolerant lookups."""
+    trigram = models.CharField(max_length=3, db_index=True, verbose_name=_("Trigram"))
+    outfit = models.ForeignKey(Outfit, null=True, blank=True, related_name='name_trigrams', on_delete=models.CASCADE, verbose_name=_("Outfit"))
+    category = models.ForeignKey(Category, null=True, blank=True, related_name='name_trigrams', on_delete=models.CASCADE, verbose_name=_("Category"))
+    total = models.PositiveSmallIntegerField(verbose_name=_("Trigrams in Name"))
+
+    class Meta:
+        verbose_name = _("Name Trigram")
+        verbose_name_plural = _("Name Trigrams")
+
+    def __str__(self):
+        return self.trigram
+
+# --- Cart Models ---
+class Cart(models.Model):
+    """Shopping cart. Signed-in users own one; anonymous visitors' carts are found through the cart id in their session."""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, null=True, blank=True, related_name='cart', on_delete=models.CASCADE, verbose_name=_("User"))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Created At"))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_("Last Updated"))
+
+    class Meta:
+        verbose_name = _("Cart")
+        verbose_name_plural = _("Carts")
+
+    def __str__(self):
+        return f"Cart {self.pk} ({self.user or 'anonymous'})"
+
+class CartItem(models.Model):
+    cart = models.ForeignKey(Cart, related_name='items', on_delete=models.CASCADE, verbose_name=_("Cart"))
+    outfit = models.ForeignKey(Outfit, related_name='cart_items', on_delete=models.CASCADE, verbose_name=_("Outfit"))
+    quantity = models.PositiveIntegerField(default=1, verbose_name=_("Quantity"))
+    added_at = models.DateTimeField(auto_now_add=True, verbose_name=_("Added At"))
+
+    class Meta:
+        verbose_name = _("Cart Item")
+        verbose_name_plural = _("Cart Items")
+        ordering = ('added_at', 'id')
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'outfit'], name='unique_outfit_per_cart'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.outfit_id} in cart {self.cart_id}"
 
 # --- UserProfile Model ---
 class UserProfile(models.Model):
@@ -182,6 +352,12 @@ class UserProfile(models.Model):
     def __str__(self):
         return f"Profile for {self.user.username}"
 
+@receiver(post_save, sender=OutfitUnit)
+@receiver(post_delete, sender=OutfitUnit)
+def sync_outfit_stock(sender, instance, **kwargs):
+    active_units = OutfitUnit.objects.filter(outfit_id=instance.outfit_id, is_active=True).count()
+    Outfit.objects.filter(pk=instance.outfit_id).update(stock=active_units, updated_at=timezone.now())
+
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
 def create_or_update_user_profile(sender, instance, created, **kwargs):
     if created:
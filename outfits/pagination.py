@@ -0,0 +1,155 @@
+# outfits/pagination.py
+"""
+Keyset (cursor) pagination for the outfit listings.
+
+Pages are fetched with "WHERE (name, id) > (last name, last id) ORDER BY name,
+id LIMIT n" instead of OFFSET, so every page costs the same no matter how deep
+it is. The position is carried in the URL as an opaque ?cursor= token. The
+total used for "Page X of Y" can be supplied by the view (e.g. from the
+catalog cache) instead of being counted on every request.
+"""
+import base64
+import json
+import math
+
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+FORWARD = 'n'
+BACKWARD = 'p'
+
+
+def encode_cursor(direction, values, number):
+    payload = json.dumps([direction, values, number], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Returns (direction, values, number); raises ValueError for tampered tokens."""
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        direction, values, number = json.loads(payload)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
+    if direction not in (FORWARD, BACKWARD) or not isinstance(number, int) or (values is not None and not isinstance(values, list)):
+        raise ValueError(f"Invalid cursor: {token!r}")
+    return direction, values, number
+
+
+class KeysetPage:
+    def __init__(self, object_list, paginator, number, has_previous, has_next):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.number = number
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_other_pages(self):
+        return self._has_previous or self._has_next
+
+    def _key(self, obj):
+        return [getattr(obj, field) for field in self.paginator.ordering]
+
+    @property
+    def next_cursor(self):
+        if self._has_next:
+            return encode_cursor(FORWARD, self._key(self.object_list[-1]), self.number + 1)
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous:
+            return encode_cursor(BACKWARD, self._key(self.object_list[0]), max(self.number - 1, 1))
+
+    @property
+    def last_cursor(self):
+        return encode_cursor(BACKWARD, None, self.paginator.num_pages)
+
+
+class KeysetPaginator:
+    """
+    Paginates a queryset on a unique ordering (by default name, id). The total
+    is only used for display; pass `count` (a number or a callable) to avoid
+    counting the queryset.
+    """
+
+    def __init__(self, queryset, per_page, ordering=('name', 'id'), count=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = ordering
+        self._count = count
+
+    @cached_property
+    def count(self):
+        if self._count is None:
+            return self.queryset.count()
+        return self._count() if callable(self._count) else self._count
+
+    @property
+    def num_pages(self):
+        return max(1, math.ceil(self.count / self.per_page))
+
+    def _after(self, values, backward):
+        """Q for rows strictly after (or before) the given key in the ordering."""
+        lookup = 'lt' if backward else 'gt'
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            equal = {name: value for name, value in zip(self.ordering[:i], values)}
+            condition |= Q(**equal, **{f'{field}__{lookup}': values[i]})
+        return condition
+
+    def page(self, token=None):
+        direction, values, number = decode_cursor(token) if token else (FORWARD, None, 1)
+        if values is not None and len(values) != len(self.ordering):
+            raise ValueError(f"Invalid cursor: {token!r}")
+        backward = direction == BACKWARD
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._after(values, backward))
+        order = [f'-{field}' if backward else field for field in self.ordering]
+        limit = self.per_page
+        if backward and values is None:
+            # "Last" holds what the last page holds walking forward: the rows after (num_pages - 1) * per_page
+            limit = self.count - (self.num_pages - 1) * self.per_page or self.per_page
+        rows = list(queryset.order_by(*order)[:limit + 1])
+        more = len(rows) > limit
+        rows = rows[:limit]
+        if backward:
+            rows.reverse()
+            # Walked back past the first row: this is page 1 whatever the token said
+            return KeysetPage(rows, self, max(number, 1) if more else 1, has_previous=more, has_next=values is not None)
+        return KeysetPage(rows, self, number, has_previous=values is not None, has_next=more)
+
+
+class KeysetPaginationMixin:
+    """ListView mixin: replaces ?page= OFFSET pagination with ?cursor= tokens."""
+    cursor_kwarg = 'cursor'
+
+    def get_total_count(self):
+        """Total for "Page X of Y"; None counts the queryset."""
+        return None
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size, count=self.get_total_count())
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except ValueError:
+            raise Http404("Invalid page.")
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['cursor_pagination'] = True
+        return context
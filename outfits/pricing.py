@@ -0,0 +1,116 @@
+# outfits/pricing.py
+"""
+Order pricing with database expressions.
+
+A line costs price_per_day x quantity x rental days, and an order costs the
+sum of its lines plus shipping. Each OrderItem stores its line_total so pages
+and the admin read a column instead of walking items and orders in Python;
+totals are (re)computed here with UPDATEs over whole querysets, and
+drifted_orders() finds every order whose stored totals disagree with its
+items in one grouped query.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Func, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Round
+
+from .models import Order, OrderItem
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+ZERO = Value(Decimal('0.00'), output_field=MONEY)
+
+
+class RentalDays(Func):
+    """Inclusive number of days between two date columns (end - start + 1)."""
+    output_field = IntegerField()
+    arity = 2
+
+    def __init__(self, start, end, **extra):
+        # The templates below take the end date first
+        super().__init__(end, start, **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        # PostgreSQL: date - date is an integer number of days
+        return super().as_sql(compiler, connection, template='((%(expressions)s) + 1)', arg_joiner=' - ', **extra_context)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='(CAST(julianday(%(expressions)s) AS INTEGER) + 1)', arg_joiner=') - julianday(', **extra_context)
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return super().as_sql(compiler, connection, template='(DATEDIFF(%(expressions)s) + 1)', arg_joiner=', ', **extra_context)
+
+
+def rental_days(prefix=''):
+    """Rental days of an order as an expression; 0 when the dates are missing or reversed. prefix reaches the order through a relation."""
+    start, end = F(f'{prefix}rental_start_date'), F(f'{prefix}rental_end_date')
+    return Case(
+        When(Q(**{f'{prefix}rental_end_date__gte': start}), then=RentalDays(start, end)),
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def line_total_expression(days, prefix=''):
+    return Coalesce(F(f'{prefix}price_per_day'), ZERO) * F(f'{prefix}quantity') * days
+
+
+def line_total(price_per_day, quantity, days):
+    """The same calculation in Python, for items that are not saved yet."""
+    if price_per_day is None or days <= 0:
+        return Decimal('0.00')
+    return price_per_day * quantity * days
+
+
+def _order_days(order_ref='order_id'):
+    return Subquery(Order.objects.filter(pk=OuterRef(order_ref)).order_by().annotate(days=rental_days()).values('days')[:1])
+
+
+def _items_total(order_ref='pk'):
+    return Coalesce(
+        Subquery(
+            OrderItem.objects.filter(order=OuterRef(order_ref)).order_by()
+            .values('order').annotate(total=Sum('line_total')).values('total')[:1],
+            output_field=MONEY,
+        ),
+        ZERO,
+    )
+
+
+def recalculate_line_totals(orders):
+    """Recomputes line_total for every item of the given orders in one UPDATE."""
+    return OrderItem.objects.filter(order__in=orders).update(line_total=line_total_expression(_order_days()))
+
+
+def recalculate_order_totals(orders):
+    """Sets total_amount to the sum of the stored line totals plus shipping, in one UPDATE."""
+    return Order.objects.filter(pk__in=orders.values('pk')).update(total_amount=_items_total() + F('shipping_cost'))
+
+
+def recalculate(orders):
+    """Line totals, then order totals, for a queryset of orders."""
+    with transaction.atomic():
+        recalculate_line_totals(orders)
+        return recalculate_order_totals(orders)
+
+
+def items_total(order):
+    """Sum of the order's lines, computed from prices in the database."""
+    total = order.items.aggregate(total=Sum(line_total_expression(rental_days('order__')), output_field=MONEY))['total']
+    return total if total is not None else Decimal('0.00')
+
+
+def drifted_orders(orders=None):
+    """
+    Orders with a line_total or total_amount that differs from what their items
+    add up to, annotated with drifted_lines and expected_total. One grouped
+    query over the whole queryset.
+    """
+    orders = Order.objects.all() if orders is None else orders
+    expected_line = Round(line_total_expression(rental_days(), prefix='items__'), 2)
+    return orders.annotate(
+        drifted_lines=Count('items', filter=~Q(items__line_total=expected_line)),
+        expected_total=Round(Coalesce(Sum(expected_line, output_field=MONEY), ZERO) + F('shipping_cost'), 2),
+    ).filter(
+        Q(drifted_lines__gt=0) | ~Q(total_amount=F('expected_total'))
+    ).order_by('pk')
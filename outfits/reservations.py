@@ -0,0 +1,97 @@
+# outfits/reservations.py
+"""
+Atomic checkout: creates an order and claims booking capacity in one transaction.
+
+Capacity is claimed by writing to the booking ledger first and verifying the
+result afterwards, so two concurrent checkouts for the same outfit and dates
+can never both commit. On PostgreSQL the outfit rows are also locked with
+SELECT ... FOR UPDATE; on SQLite the order INSERT at the start of the
+transaction takes the database write lock and serializes checkouts.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+
+from .allocation import NotEnoughUnits, allocate_units
+from .availability import booked_quantities
+from .models import BookingDay, Order, OrderItem, Outfit
+from .pricing import line_total
+
+
+class OutfitUnavailable(Exception):
+    """Raised when a reservation would exceed an outfit's capacity on some day."""
+
+    def __init__(self, outfits):
+        self.outfits = outfits
+        super().__init__(", ".join(outfit.name for outfit in outfits))
+
+
+def claim_capacity(outfits, requested, start_date, end_date):
+    """
+    Adds the requested quantities ({outfit_id: quantity}) to the ledger for every
+    day in the span, then raises OutfitUnavailable if any outfit is overbooked.
+    Must run inside transaction.atomic() so a failed claim is rolled back.
+    """
+    by_quantity = defaultdict(list)
+    for outfit_id, quantity in requested.items():
+        by_quantity[quantity].append(outfit_id)
+    for quantity, outfit_ids in by_quantity.items():
+        BookingDay.objects.filter(
+            outfit_id__in=outfit_ids, day__range=(start_date, end_date)
+        ).update(quantity=F('quantity') + quantity)
+
+    existing = set(BookingDay.objects.filter(
+        outfit_id__in=requested, day__range=(start_date, end_date)
+    ).values_list('outfit_id', 'day'))
+    new_rows = []
+    for outfit_id, quantity in requested.items():
+        day = start_date
+        while day <= end_date:
+            if (outfit_id, day) not in existing:
+                new_rows.append(BookingDay(outfit_id=outfit_id, day=day, quantity=quantity))
+            day += timedelta(days=1)
+    BookingDay.objects.bulk_create(new_rows)
+
+    booked = booked_quantities(requested.keys(), start_date, end_date)
+    overbooked = [outfit for outfit in outfits if booked[outfit.pk] > outfit.stock]
+    if overbooked:
+        raise OutfitUnavailable(overbooked)
+
+
+def place_order(order, cart_items):
+    """
+    Saves a new order with its items, claims capacity and allocates units for
+    them in a single pass. Raises OutfitUnavailable (and saves nothing) if any
+    item is booked out.
+    """
+    start_date, end_date = order.rental_start_date, order.rental_end_date
+    duration = order.rental_duration_days
+    requested = defaultdict(int)
+    prices = {}
+    for item_data in cart_items:
+        outfit = item_data['outfit']
+        requested[outfit.pk] += item_data['quantity']
+        prices[outfit.pk] = outfit.price
+    if not requested:
+        raise ValueError("Cannot place an order without items.")
+    line_totals = {outfit_id: line_total(prices[outfit_id], quantity, duration) for outfit_id, quantity in requested.items()}
+
+    order.status = Order.STATUS_PENDING
+    order.total_amount = sum(line_totals.values(), Decimal('0.00')) + Decimal(order.shipping_cost or 0)
+    with transaction.atomic():
+        # The INSERT comes first so SQLite takes its write lock before any read
+        order.save()
+        outfits = list(Outfit.objects.select_for_update().filter(pk__in=requested).order_by('pk'))
+        claim_capacity(outfits, requested, start_date, end_date)
+        order_items = OrderItem.objects.bulk_create([
+            OrderItem(order=order, outfit_id=outfit_id, quantity=quantity, price_per_day=prices[outfit_id], line_total=line_totals[outfit_id])
+            for outfit_id, quantity in requested.items()
+        ])
+        try:
+            allocate_units(order, order_items)
+        except NotEnoughUnits as e:
+            raise OutfitUnavailable([outfit for outfit in outfits if outfit.pk in e.outfit_ids])
+    return order
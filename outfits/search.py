@@ -0,0 +1,298 @@
+# outfits/search.py
+"""
+Full-text search over outfits.
+
+Text is tokenized in Python before it reaches the database so Thai, which is
+written without spaces between words, is searchable: Thai runs are split with
+PyThaiNLP when it is installed, otherwise into overlapping character bigrams.
+The tokens are stored in an SQLite FTS5 table or a PostgreSQL tsvector column
+with a GIN index, and results are ranked by relevance (bm25 / ts_rank).
+
+The backend is picked from the database vendor, or set explicitly with the
+OUTFIT_SEARCH_BACKEND setting (dotted path to a backend class).
+"""
+import logging
+import re
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from .models import Category, Outfit
+
+try:
+    from pythainlp.tokenize import word_tokenize as thai_word_tokenize
+except ImportError:
+    thai_word_tokenize = None
+
+logger = logging.getLogger(__name__)
+
+RESULT_LIMIT = 500
+# Highest lexeme position a tsvector stores
+MAX_POSITION = 16383
+
+THAI_RUN = re.compile(r'[\u0E00-\u0E7F]+')
+_TOKEN_RUN = re.compile(r'[\u0E00-\u0E7F]+|[^\W_]+')
+
+
+def thai_tokens(run):
+    if thai_word_tokenize is not None:
+        return [word for word in thai_word_tokenize(run, keep_whitespace=False) if word.strip()]
+    if len(run) < 3:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def tokenize(text):
+    """Splits text into lowercase search tokens (Thai runs are segmented)."""
+    tokens = []
+    for run in _TOKEN_RUN.findall((text or '').lower()):
+        if THAI_RUN.fullmatch(run):
+            tokens.extend(thai_tokens(run))
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def _document(outfit):
+    category = outfit.category.name if outfit.category else ''
+    return tokenize(outfit.name), tokenize(outfit.description), tokenize(category)
+
+
+# ---------- Backends ----------
+
+class BaseSearchBackend:
+    def index(self, outfits):
+        """Adds or refreshes the given outfits; inactive ones are removed."""
+        outfits = list(outfits)
+        self.remove([outfit.pk for outfit in outfits])
+        self._insert([outfit for outfit in outfits if outfit.is_active])
+
+    def rebuild(self):
+        self.clear()
+        queryset = Outfit.objects.filter(is_active=True).select_related('category')
+        batch = []
+        for outfit in queryset.iterator(chunk_size=1000):
+            batch.append(outfit)
+            if len(batch) == 1000:
+                self._insert(batch)
+                batch = []
+        self._insert(batch)
+
+    def _insert(self, outfits):
+        raise NotImplementedError
+
+    def remove(self, outfit_ids):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def search(self, query, limit=RESULT_LIMIT):
+        """Returns outfit ids ranked by relevance, best first."""
+        raise NotImplementedError
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    table = 'outfits_outfit_fts'
+
+    def _insert(self, outfits):
+        if not outfits:
+            return
+        rows = [(outfit.pk, *(' '.join(tokens) for tokens in _document(outfit))) for outfit in outfits]
+        with connection.cursor() as cursor:
+            cursor.executemany(f"INSERT INTO {self.table} (rowid, name, description, category) VALUES (%s, %s, %s, %s)", rows)
+
+    def remove(self, outfit_ids):
+        outfit_ids = list(outfit_ids)
+        if not outfit_ids:
+            return
+        placeholders = ', '.join(['%s'] * len(outfit_ids))
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid IN ({placeholders})", outfit_ids)
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+
+    def search(self, query, limit=RESULT_LIMIT):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # Every token must match; the last one also matches as a prefix (search-as-you-type)
+        terms = ['"{}"'.format(token.replace('"', '""')) for token in tokens]
+        terms[-1] += '*'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s "
+                f"ORDER BY bm25({self.table}, 10.0, 1.0, 5.0) LIMIT %s",
+                [' '.join(terms), limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+def tsvector_literal(tokens):
+    """
+    Our tokens as a tsvector with positions. Unlike to_tsvector() the tokens are
+    kept as-is, and unlike array_to_tsvector() they have positions, without
+    which setweight() has nothing to weight and ts_rank() ignores the field.
+    """
+    return ' '.join(
+        "'{}':{}".format(token.replace('\\', '\\\\').replace("'", "''"), min(position, MAX_POSITION))
+        for position, token in enumerate(tokens, 1)
+    )
+
+
+class PostgresFTSBackend(BaseSearchBackend):
+    table = 'outfits_outfit_search'
+
+    def _insert(self, outfits):
+        if not outfits:
+            return
+        rows = [(outfit.pk, *(tsvector_literal(tokens) for tokens in _document(outfit))) for outfit in outfits]
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.table} (outfit_id, document) VALUES (%s, "
+                "setweight(%s::tsvector, 'A') || "
+                "setweight(%s::tsvector, 'C') || "
+                "setweight(%s::tsvector, 'B'))",
+                rows,
+            )
+
+    def remove(self, outfit_ids):
+        outfit_ids = list(outfit_ids)
+        if not outfit_ids:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE outfit_id = ANY(%s)", [outfit_ids])
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {self.table}")
+
+    def search(self, query, limit=RESULT_LIMIT):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        terms = ["'{}'".format(token.replace('\\', '\\\\').replace("'", "''")) for token in tokens]
+        terms[-1] += ':*'
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT outfit_id FROM {self.table}, CAST(%s AS tsquery) AS query "
+                "WHERE document @@ query ORDER BY ts_rank(document, query) DESC, outfit_id LIMIT %s",
+                [' & '.join(terms), limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class SubstringSearchBackend(BaseSearchBackend):
+    """Fallback for databases without a full-text index: the old icontains scan."""
+
+    def index(self, outfits):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def remove(self, outfit_ids):
+        pass
+
+    def clear(self):
+        pass
+
+    def search(self, query, limit=RESULT_LIMIT):
+        return list(Outfit.objects.filter(
+            Q(name__icontains=query) | Q(description__icontains=query) | Q(category__name__icontains=query),
+            is_active=True,
+        ).values_list('pk', flat=True).distinct()[:limit])
+
+
+VENDOR_BACKENDS = {
+    'sqlite': SQLiteFTSBackend,
+    'postgresql': PostgresFTSBackend,
+}
+
+
+def get_backend():
+    backend_path = getattr(settings, 'OUTFIT_SEARCH_BACKEND', None)
+    backend_class = import_string(backend_path) if backend_path else VENDOR_BACKENDS.get(connection.vendor, SubstringSearchBackend)
+    return backend_class()
+
+
+# ---------- Results ----------
+
+class RankedResults:
+    """
+    Lazy, paginator-friendly sequence of outfits in relevance order. Only the
+    rows of the requested slice are loaded.
+    """
+
+    def __init__(self, outfit_ids):
+        self.outfit_ids = list(outfit_ids)
+
+    def count(self):
+        return len(self.outfit_ids)
+
+    def __len__(self):
+        return len(self.outfit_ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            page_ids = self.outfit_ids[index]
+            outfits = Outfit.objects.filter(pk__in=page_ids, is_active=True).select_related('category').in_bulk()
+            return [outfits[pk] for pk in page_ids if pk in outfits]
+        return self[index:index + 1][0]
+
+
+def search_outfits(query):
+    """Returns RankedResults for the query (empty if the query has no tokens)."""
+    try:
+        outfit_ids = get_backend().search(query)
+    except Exception as e:
+        logger.error(f"Full-text search failed for '{query}', falling back to substring search: {e}", exc_info=True)
+        outfit_ids = SubstringSearchBackend().search(query)
+    return RankedResults(outfit_ids)
+
+
+# ---------- Signal handlers ----------
+
+def _reindex(outfits):
+    try:
+        with transaction.atomic():
+            get_backend().index(outfits)
+    except Exception as e:
+        logger.error(f"Could not update the search index: {e}", exc_info=True)
+
+
+@receiver(post_save, sender=Outfit)
+def index_outfit(sender, instance, **kwargs):
+    _reindex([instance])
+
+
+@receiver(post_delete, sender=Outfit)
+def unindex_outfit(sender, instance, **kwargs):
+    try:
+        get_backend().remove([instance.pk])
+    except Exception as e:
+        logger.error(f"Could not update the search index: {e}", exc_info=True)
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_outfits(sender, instance, created, **kwargs):
+    if not created:
+        _reindex(instance.outfits.select_related('category'))
+
+
+@receiver(pre_delete, sender=Category)
+def remember_category_outfits(sender, instance, **kwargs):
+    instance._search_outfit_ids = list(instance.outfits.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Category)
+def reindex_uncategorized_outfits(sender, instance, **kwargs):
+    outfit_ids = getattr(instance, '_search_outfit_ids', [])
+    if outfit_ids:
+        _reindex(Outfit.objects.filter(pk__in=outfit_ids).select_related('category'))
@@ -0,0 +1,230 @@
+# outfits/synthetic.py
+"""
+Synthetic data at production scale, for profiling and load tests.
+
+generate() bulk-inserts categories, outfits, users with profiles, orders and
+order items in batches (one INSERT per model per batch, one transaction per
+batch), so millions of rows take minutes rather than hours. Everything it
+creates is marked with a prefix (category names, usernames), so clear() can
+remove it again without touching real data.
+
+bulk_create() skips save() and signals, so the things those normally keep in
+step are filled in here: profiles, line totals and order totals, the first
+status event of each order, and afterwards the booking ledger, the search
+indexes and the catalog cache version.
+"""
+import logging
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from . import cache, fuzzy, ledger, pricing
+from .models import Category, Order, OrderItem, OrderStatusEvent, Outfit, UserProfile
+from .search import get_backend
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'synthetic'
+# Every synthetic user can sign in with this password
+PASSWORD = 'synthetic-password'
+BATCH_SIZE = 5000
+
+ADJECTIVES = [
+    'Classic', 'Elegant', 'Vintage', 'Modern', 'Floral', 'Silk', 'Lace', 'Velvet', 'Satin', 'Linen',
+    'Royal', 'Golden', 'Midnight', 'Pastel', 'Embroidered', 'Sequin', 'Chiffon', 'Boho', 'Minimal', 'Thai Silk',
+]
+NOUNS = [
+    'Dress', 'Gown', 'Suit', 'Tuxedo', 'Kimono', 'Hanbok', 'Sari', 'Jumpsuit', 'Blazer', 'Skirt',
+    'Cocktail Dress', 'Wedding Dress', 'Chut Thai', 'Costume', 'Cape', 'Coat', 'Kaftan', 'Qipao', 'Abaya', 'Tunic',
+]
+COLORS = ['Red', 'Blue', 'Black', 'White', 'Ivory', 'Emerald', 'Navy', 'Rose', 'Lilac', 'Champagne']
+
+# (status, weight) of orders by where their rental period falls
+PAST_STATUSES = [(Order.STATUS_COMPLETED, 85), (Order.STATUS_CANCELLED, 10), (Order.STATUS_FAILED, 5)]
+CURRENT_STATUSES = [(Order.STATUS_RENTED, 60), (Order.STATUS_SHIPPED, 25), (Order.STATUS_RETURN_SHIPPED, 15)]
+FUTURE_STATUSES = [
+    (Order.STATUS_PROCESSING, 50), (Order.STATUS_WAITING_FOR_APPROVAL, 20),
+    (Order.STATUS_PENDING, 15), (Order.STATUS_CANCELLED, 15),
+]
+
+
+def _pick(rng, weighted):
+    statuses, weights = zip(*weighted)
+    return rng.choices(statuses, weights)[0]
+
+
+def _batches(total, batch_size):
+    for start in range(0, total, batch_size):
+        yield start, min(batch_size, total - start)
+
+
+@contextmanager
+def explicit_timestamps(model, *field_names):
+    """Lets bulk_create() keep the given auto_now/auto_now_add values instead of overwriting them with now."""
+    fields = [model._meta.get_field(name) for name in field_names]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def create_categories(count, prefix=PREFIX):
+    names = [f"{prefix.title()} {noun} {number}" for number, noun in enumerate((NOUNS * (count // len(NOUNS) + 1))[:count], 1)]
+    Category.objects.bulk_create(
+        [Category(name=name, slug=f"{prefix}-{number}") for number, name in enumerate(names, 1)],
+        ignore_conflicts=True,
+    )
+    return list(Category.objects.filter(name__in=names).values_list('pk', flat=True))
+
+
+def create_outfits(count, category_ids, rng, batch_size=BATCH_SIZE, progress=None):
+    for start, size in _batches(count, batch_size):
+        outfits = []
+        for number in range(start + 1, start + size + 1):
+            name = f"{rng.choice(COLORS)} {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {number}"
+            outfits.append(Outfit(
+                category_id=rng.choice(category_ids),
+                name=name[:100],
+                description=f"{name}. Rental outfit for weddings, parties and photo shoots.",
+                price=Decimal(rng.randrange(100, 3000, 10)),
+                stock=rng.randint(1, 5),
+                is_active=rng.random() < 0.95,
+                is_featured=rng.random() < 0.02,
+            ))
+        Outfit.objects.bulk_create(outfits)
+        if progress:
+            progress('outfits', start + size, count)
+
+
+def create_users(count, rng, prefix=PREFIX, batch_size=BATCH_SIZE, progress=None):
+    User = get_user_model()
+    password = make_password(PASSWORD)  # hashing once; it is the slow part
+    existing = User.objects.filter(username__startswith=f'{prefix}_').count()
+    for start, size in _batches(count, batch_size):
+        numbers = range(existing + start + 1, existing + start + size + 1)
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(username=f'{prefix}_{number:07d}', email=f'{prefix}_{number:07d}@example.com', password=password, first_name='Synthetic', last_name=f'User {number}')
+                for number in numbers
+            ])
+            UserProfile.objects.bulk_create([
+                UserProfile(user_id=user.pk, phone=f'08{rng.randrange(10 ** 8):08d}', address=f'{rng.randint(1, 999)} Sukhumvit Road, Bangkok')
+                for user in users
+            ])
+        if progress:
+            progress('users', start + size, count)
+
+
+def _order(rng, user_id, now):
+    created_at = now - timedelta(days=rng.uniform(0, 365))
+    start_date = (created_at + timedelta(days=rng.randint(1, 30))).date()
+    end_date = start_date + timedelta(days=rng.randint(0, 6))
+    today = now.date()
+    if end_date < today:
+        status = _pick(rng, PAST_STATUSES)
+    elif start_date <= today:
+        status = _pick(rng, CURRENT_STATUSES)
+    else:
+        status = _pick(rng, FUTURE_STATUSES)
+    if status == Order.STATUS_PENDING:
+        # Pending orders are only held for PENDING_ORDER_TTL_MINUTES after creation
+        created_at = now - timedelta(minutes=rng.randint(0, 10))
+    return Order(
+        user_id=user_id,
+        first_name='Synthetic', last_name=f'Customer {user_id}',
+        email=f'customer{user_id}@example.com', phone='0800000000',
+        address='1 Silom Road, Bangkok',
+        rental_start_date=start_date, rental_end_date=end_date,
+        status=status, paid=status not in (Order.STATUS_PENDING, Order.STATUS_WAITING_FOR_APPROVAL, Order.STATUS_FAILED),
+        shipping_cost=Decimal('50.00'),
+        created_at=created_at, updated_at=created_at,
+    )
+
+
+def create_orders(count, user_ids, outfits, rng, max_items=3, batch_size=BATCH_SIZE, progress=None):
+    """Orders with 1..max_items items each; outfits is a list of (id, price) pairs."""
+    now = timezone.now()
+    with explicit_timestamps(Order, 'created_at', 'updated_at'):
+        for start, size in _batches(count, batch_size):
+            orders, items, events = [], [], []
+            for _ in range(size):
+                order = _order(rng, rng.choice(user_ids), now)
+                lines = []
+                for outfit_id, price in rng.sample(outfits, min(rng.randint(1, max_items), len(outfits))):
+                    quantity = 1 if rng.random() < 0.9 else 2
+                    line_total = pricing.line_total(price, quantity, order.rental_duration_days)
+                    lines.append(OrderItem(order=order, outfit_id=outfit_id, price_per_day=price, quantity=quantity, line_total=line_total))
+                order.total_amount = sum((line.line_total for line in lines), Decimal('0.00')) + order.shipping_cost
+                orders.append(order)
+                items.extend(lines)
+                events.append(OrderStatusEvent(order=order, from_status='', status=order.status, at=order.created_at))
+            with transaction.atomic():
+                # The pks bulk_create() sets on the orders are picked up by their items and events
+                Order.objects.bulk_create(orders)
+                OrderItem.objects.bulk_create(items)
+                OrderStatusEvent.objects.bulk_create(events)
+            if progress:
+                progress('orders', start + size, count)
+
+
+def refresh_derived_data():
+    """Rebuilds what signals would have kept up to date: the booking ledger, the search indexes and the catalog cache."""
+    ledger.rebuild()
+    get_backend().rebuild()
+    fuzzy.get_backend().rebuild()
+    cache.bump(cache.CATALOG)
+
+
+def generate(outfits=0, users=0, orders=0, categories=20, max_items=3, prefix=PREFIX, seed=None, batch_size=BATCH_SIZE, progress=None):
+    """
+    Adds the given numbers of synthetic outfits, users (with profiles) and
+    orders. Orders go to synthetic users and rent active synthetic outfits, so
+    they need some of each, either created now or by an earlier run.
+    progress(kind, done, total) is called after every batch.
+    """
+    rng = random.Random(seed)
+    category_ids = create_categories(categories, prefix)
+    if outfits:
+        create_outfits(outfits, category_ids, rng, batch_size, progress)
+    if users:
+        create_users(users, rng, prefix, batch_size, progress)
+    if orders:
+        user_ids = list(synthetic_users(prefix).values_list('pk', flat=True))
+        catalog = list(Outfit.objects.filter(category_id__in=category_ids, is_active=True).values_list('pk', 'price'))
+        if not user_ids or not catalog:
+            raise ValueError("Orders need synthetic users and active synthetic outfits; generate some first.")
+        create_orders(orders, user_ids, catalog, rng, max_items, batch_size, progress)
+    refresh_derived_data()
+    logger.info(f"Generated {outfits} outfit(s), {users} user(s) and {orders} order(s) with prefix '{prefix}'")
+
+
+def synthetic_users(prefix=PREFIX):
+    return get_user_model().objects.filter(username__startswith=f'{prefix}_')
+
+
+def clear(prefix=PREFIX):
+    """Deletes everything generate() created with this prefix. Returns the number of deleted rows per model."""
+    categories = Category.objects.filter(slug__startswith=f'{prefix}-')
+    orders = Order.objects.filter(user__in=synthetic_users(prefix))
+    items = OrderItem.objects.filter(order__in=orders)
+    with transaction.atomic():
+        # Order items protect their outfits, so they go first. Deleting them through
+        # the collector would send post_delete and resync the ledger once per item;
+        # it is rebuilt once below instead.
+        OrderItem.units.through.objects.filter(orderitem__in=items).delete()
+        deleted = {OrderItem._meta.label: items._raw_delete(items.db)}
+        for queryset in (orders, Outfit.objects.filter(category__in=categories), categories, synthetic_users(prefix)):
+            for label, count in queryset.delete()[1].items():
+                deleted[label] = deleted.get(label, 0) + count
+    refresh_derived_data()
+    return deleted
@@ -0,0 +1,11 @@
+from django import template
+
+from outfits.cards import render_cards
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def outfit_cards(context, outfits, variant='list'):
+    """Renders the outfit cards from the card cache, e.g. {% outfit_cards outfits 'featured' %}."""
+    return render_cards(outfits, variant, request=context.get('request'), cart_outfit_ids=context.get('cart_outfit_ids', ()))
@@ -0,0 +1,35 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html
+
+from outfits.images import rendition_name, renditions_ready, srcset
+
+register = template.Library()
+
+# How wide each slot is drawn, so the browser can pick from the srcset
+SIZES = {
+    'thumb': '80px',
+    'card': '(max-width: 600px) 50vw, 300px',
+    'detail': '(max-width: 768px) 100vw, 540px',
+}
+
+
+@register.simple_tag
+def outfit_image(outfit, rendition='card'):
+    """
+    <picture> for the outfit's image with WebP and JPEG srcsets, e.g.
+    {% outfit_image outfit 'card' %}. Falls back to the original file until
+    its derivatives have been generated.
+    """
+    image = outfit.image
+    if not renditions_ready(outfit):
+        return format_html('<img src="{}" alt="{}" loading="lazy">', image.url, outfit.name)
+    return format_html(
+        '<picture>'
+        '<source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}" loading="lazy">'
+        '</picture>',
+        srcset(image.name, 'webp'), SIZES[rendition],
+        default_storage.url(rendition_name(image.name, rendition, 'jpg')), srcset(image.name, 'jpg'), SIZES[rendition],
+        outfit.name,
+    )
@@ -1,3 +1,1238 @@
-from django.test import TestCase
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import time
+import timeit
+from collections import Counter
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser, User
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.management import CommandError, call_command
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, connections, transaction
+from django.template import Context, Template
+from django.test import Client, LiveServerTestCase, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone, translation
+from PIL import Image
+
+from . import autocomplete, availability, benchmark, carts, context_processors, featured, fuzzy, images, ledger, pricing, synthetic, transitions
+from . import cache as catalog_cache
+from .cards import card_key, render_cards
+from .forms import AvailabilityCheckForm, CheckoutForm
+from .pagination import KeysetPaginator
+from .models import BookingDay, Cart, CartItem, Category, Order, OrderItem, OrderStatusEvent, Outfit, OutfitUnit
+from .holds import expire_orders, stale_pending_orders
+from .reservations import OutfitUnavailable, place_order
+from .search import search_outfits, tokenize, tsvector_literal
+from .utils import qr
+
+
+# Pages are rendered without running collectstatic first
+plain_static = override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage')
+
+# Wall-clock limits depend on the machine, so they are only checked when this is set, as a multiplier (e.g. 1 locally, 3 on a busy CI runner)
+BUDGET_MS_FACTOR = float(os.environ.get('PAGE_BUDGET_MS_FACTOR') or 0)
+
+
+class TimeBudgetMixin:
+    def assertWithinTime(self, label, elapsed_ms, max_ms):
+        if BUDGET_MS_FACTOR:
+            self.assertLessEqual(elapsed_ms, max_ms * BUDGET_MS_FACTOR, f"{label}: {elapsed_ms:.1f} ms, budget {max_ms * BUDGET_MS_FACTOR:.1f} ms")
+
+
+def make_order(start_date, end_date):
+    return Order(
+        first_name='Test', last_name='Customer', email='test@example.com',
+        phone='0800000000', address='Bangkok',
+        rental_start_date=start_date, rental_end_date=end_date,
+    )
+
+
+def _checkout_worker(outfit_id, start_date, end_date, results):
+    connections.close_all()
+    outfit = Outfit.objects.get(pk=outfit_id)
+    try:
+        place_order(make_order(start_date, end_date), [{'outfit': outfit, 'quantity': 1}])
+        results.put('booked')
+    except OutfitUnavailable:
+        results.put('unavailable')
+    except Exception as e:
+        results.put(f'error: {e}')
+    finally:
+        connections.close_all()
+
+
+class PlaceOrderTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Wedding')
+        self.outfit = Outfit.objects.create(name='Silk Dress', description='Red', price=500, category=self.category)
+
+    def test_books_items_and_totals_in_one_pass(self):
+        order = place_order(make_order(date(2026, 1, 1), date(2026, 1, 3)), [{'outfit': self.outfit, 'quantity': 1}])
+        order.refresh_from_db()
+        self.assertEqual(order.total_amount, 1500)
+        self.assertEqual(order.items.count(), 1)
+        self.assertEqual(BookingDay.objects.filter(outfit=self.outfit).count(), 3)
+
+    def test_overlapping_order_is_rejected_and_rolled_back(self):
+        place_order(make_order(date(2026, 1, 1), date(2026, 1, 3)), [{'outfit': self.outfit, 'quantity': 1}])
+        with self.assertRaises(OutfitUnavailable):
+            place_order(make_order(date(2026, 1, 3), date(2026, 1, 5)), [{'outfit': self.outfit, 'quantity': 1}])
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(BookingDay.objects.filter(outfit=self.outfit, quantity__gt=1).count(), 0)
+
+
+class BookingLedgerTests(TestCase):
+    def setUp(self):
+        self.outfit = Outfit.objects.create(name='Silk Dress', description='Red', price=500, stock=2)
+        self.order = place_order(make_order(date(2026, 1, 1), date(2026, 1, 3)), [{'outfit': self.outfit, 'quantity': 1}])
+
+    def booked(self):
+        return dict(BookingDay.objects.filter(outfit=self.outfit).values_list('day', 'quantity'))
+
+    def test_order_saves_move_and_release_the_booked_days(self):
+        self.assertEqual(self.booked(), {date(2026, 1, day): 1 for day in (1, 2, 3)})
+        self.order.rental_start_date, self.order.rental_end_date = date(2026, 1, 3), date(2026, 1, 4)
+        self.order.save()
+        self.assertEqual(self.booked(), {date(2026, 1, 3): 1, date(2026, 1, 4): 1})
+        self.order.status = Order.STATUS_CANCELLED
+        self.order.save()
+        self.assertEqual(self.booked(), {})
+        self.assertEqual(ledger.verify(), [])
+
+    def test_item_changes_resync_their_days(self):
+        item = self.order.items.get()
+        item.quantity = 2
+        item.save()
+        self.assertEqual(set(self.booked().values()), {2})
+        item.delete()
+        self.assertEqual(self.booked(), {})
+
+    def test_resync_locks_the_outfits_before_reading_the_orders(self):
+        with CaptureQueriesContext(connection) as queries:
+            ledger.sync_span([self.outfit.pk], date(2026, 1, 1), date(2026, 1, 3))
+        selects = [query['sql'] for query in queries if query['sql'].startswith('SELECT')]
+        self.assertIn('FROM "outfits_outfit"', selects[0])
+        if connection.features.has_select_for_update:
+            self.assertIn('FOR UPDATE', selects[0])
+        self.assertEqual(ledger.verify(), [])
+
+    def test_verify_reports_drift_and_rebuild_repairs_it(self):
+        BookingDay.objects.filter(day=date(2026, 1, 2)).update(quantity=2)
+        BookingDay.objects.filter(day=date(2026, 1, 3)).delete()
+        self.assertEqual(ledger.verify(), [
+            (self.outfit.pk, date(2026, 1, 2), 2, 1),
+            (self.outfit.pk, date(2026, 1, 3), 0, 1),
+        ])
+        with self.assertRaises(CommandError):
+            call_command('rebuild_booking_ledger', '--verify', stdout=StringIO())
+        self.assertEqual(ledger.rebuild(), 3)
+        self.assertEqual(ledger.verify(), [])
+
+
+@plain_static
+class AvailabilityTests(TestCase):
+    def setUp(self):
+        self.pair = Outfit.objects.create(name='Silk Dress', description='Red', price=500, stock=2)
+        self.single = Outfit.objects.create(name='Lace Gown', description='White', price=900, stock=1)
+        self.free = Outfit.objects.create(name='Velvet Blazer', description='Black', price=400, stock=1)
+        place_order(make_order(date(2026, 1, 2), date(2026, 1, 2)), [{'outfit': self.pair, 'quantity': 1}, {'outfit': self.single, 'quantity': 1}])
+
+    def test_whole_cart_is_checked_in_one_query(self):
+        requested = {self.pair.pk: 1, self.single.pk: 1, self.free.pk: 2}
+        with self.assertNumQueries(1):
+            unavailable = availability.unavailable_outfit_ids(requested, date(2026, 1, 1), date(2026, 1, 3))
+        self.assertEqual(unavailable, {self.single.pk, self.free.pk})
+        self.assertEqual(availability.unavailable_outfit_ids({self.pair.pk: 2}, date(2026, 1, 1), date(2026, 1, 3)), {self.pair.pk})
+        self.assertEqual(availability.unavailable_outfit_ids({self.single.pk: 1}, date(2026, 1, 3), date(2026, 1, 5)), set())
+
+    def test_empty_spans_and_quantities_are_never_available(self):
+        self.assertEqual(availability.unavailable_outfit_ids({self.free.pk: 1}, date(2026, 1, 5), date(2026, 1, 4)), {self.free.pk})
+        self.assertEqual(availability.unavailable_outfit_ids({self.free.pk: 0}, date(2026, 1, 4), date(2026, 1, 5)), {self.free.pk})
+
+    def test_return_date_must_not_precede_the_start(self):
+        for form_class in (AvailabilityCheckForm, CheckoutForm):
+            form = form_class({'rental_start_date': '2026-01-05', 'rental_end_date': '2026-01-04'})
+            self.assertFalse(form.is_valid())
+            self.assertIn('rental_end_date', form.errors)
+
+    def test_cart_marks_the_items_taken_on_the_chosen_dates(self):
+        for outfit in (self.pair, self.single):
+            self.client.post(reverse('outfits:add_to_cart', args=[outfit.pk]), {'quantity': 1})
+        response = self.client.get(reverse('outfits:cart_detail'), {'rental_start_date': '2026-01-01', 'rental_end_date': '2026-01-03'})
+        self.assertEqual({item['outfit'].pk: item['is_available'] for item in response.context['cart_items']}, {self.pair.pk: True, self.single.pk: False})
+        response = self.client.get(reverse('outfits:cart_detail'), {'rental_start_date': '2026-01-03', 'rental_end_date': '2026-01-01'})
+        self.assertFalse(any('is_available' in item for item in response.context['cart_items']))
+
+
+class PendingHoldTests(TestCase):
+    def setUp(self):
+        self.outfit = Outfit.objects.create(name='Silk Dress', description='Red', price=500)
+        self.stale = place_order(make_order(date(2026, 1, 1), date(2026, 1, 3)), [{'outfit': self.outfit, 'quantity': 1}])
+        self.fresh = place_order(make_order(date(2026, 2, 1), date(2026, 2, 2)), [{'outfit': self.outfit, 'quantity': 1}])
+        Order.objects.filter(pk=self.stale.pk).update(created_at=timezone.now() - timedelta(minutes=settings.PENDING_ORDER_TTL_MINUTES + 1))
+
+    def test_command_cancels_stale_holds_and_releases_their_days(self):
+        out = StringIO()
+        call_command('expire_pending_orders', stdout=out)
+
+        self.assertIn('Expired 1 ', out.getvalue())
+        self.assertEqual(Order.objects.get(pk=self.stale.pk).status, Order.STATUS_CANCELLED)
+        self.assertEqual(Order.objects.get(pk=self.fresh.pk).status, Order.STATUS_PENDING)
+        self.assertEqual(sorted(BookingDay.objects.values_list('day', flat=True)), [date(2026, 2, 1), date(2026, 2, 2)])
+        self.assertEqual(OrderStatusEvent.objects.filter(order=self.stale, status=Order.STATUS_CANCELLED).count(), 1)
+        self.assertEqual(ledger.verify(), [])
+        # The released days can be booked again
+        place_order(make_order(date(2026, 1, 2), date(2026, 1, 2)), [{'outfit': self.outfit, 'quantity': 1}])
+
+    def test_dry_run_and_already_handled_orders_change_nothing(self):
+        call_command('expire_pending_orders', '--dry-run', stdout=StringIO())
+        self.assertEqual(Order.objects.filter(status=Order.STATUS_PENDING).count(), 2)
+        transitions.transition(self.stale, Order.STATUS_CANCELLED)
+        self.assertEqual(expire_orders([self.stale.pk]), 0)
+        self.assertEqual(OrderStatusEvent.objects.filter(order=self.stale, status=Order.STATUS_CANCELLED).count(), 1)
+
+
+@plain_static
+class OrderPricingTests(TestCase):
+    def setUp(self):
+        self.outfit = Outfit.objects.create(name='Silk Dress', description='Red', price=500, stock=3)
+        self.order = place_order(make_order(date(2026, 1, 1), date(2026, 1, 3)), [{'outfit': self.outfit, 'quantity': 2}])
+
+    def test_line_totals_are_stored_at_checkout(self):
+        item = self.order.items.get()
+        self.assertEqual(item.line_total, 3000)
+        self.assertEqual(self.order.calculate_items_total(), 3000)
+        self.assertFalse(pricing.drifted_orders().exists())
+
+    def test_drift_is_found_in_one_query_and_recalculated_in_bulk(self):
+        Order.objects.filter(pk=self.order.pk).update(rental_end_date=date(2026, 1, 4), shipping_cost=50)
+        with self.assertNumQueries(1):
+            drifted = list(pricing.drifted_orders().values_list('pk', 'expected_total'))
+        self.assertEqual(drifted, [(self.order.pk, 4050)])
+        with CaptureQueriesContext(connection) as queries:
+            pricing.recalculate(Order.objects.filter(pk=self.order.pk))
+        self.assertEqual(sum(query['sql'].startswith('UPDATE') for query in queries), 2)
+        self.order.refresh_from_db()
+        self.assertEqual((self.order.total_amount, self.order.items.get().line_total), (4050, 4000))
+        self.assertFalse(pricing.drifted_orders().exists())
+
+    def test_items_edited_directly_keep_their_totals(self):
+        item = self.order.items.get()
+        item.quantity = 1
+        item.save()
+        item.refresh_from_db()
+        self.assertEqual(item.line_total, 1500)
+        extra = OrderItem.objects.create(order=self.order, outfit=Outfit.objects.create(name='Lace Gown', description='White', price=200))
+        self.assertEqual(extra.line_total, 600)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_amount, 2100 + self.order.shipping_cost)
+        self.assertFalse(pricing.drifted_orders().exists())
+
+    def test_orders_without_dates_cost_only_shipping(self):
+        Order.objects.filter(pk=self.order.pk).update(rental_start_date=None, shipping_cost=80)
+        pricing.recalculate(Order.objects.all())
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_amount, 80)
+
+    def test_admin_order_page_shows_line_totals(self):
+        User.objects.create_superuser('admin', 'admin@example.com', 'pw12345!')
+        self.client.login(username='admin', password='pw12345!')
+        response = self.client.get(reverse('admin:outfits_order_change', args=[self.order.pk]))
+        self.assertContains(response, '3,000.00')
+
+
+class BulkTransitionTests(TestCase):
+    def setUp(self):
+        self.outfit = Outfit.objects.create(name='Silk Dress', description='Red', price=500, stock=5)
+        self.orders = [
+            place_order(make_order(date(2026, 1, 1), date(2026, 1, 3)), [{'outfit': self.outfit, 'quantity': 1}])
+            for _ in range(3)
+        ]
+        Order.objects.filter(pk__in=[order.pk for order in self.orders]).update(status=Order.STATUS_WAITING_FOR_APPROVAL)
+        Order.objects.filter(pk=self.orders[0].pk).update(payment_slip='payment_slips/slip.jpg')
+        self.staff = User.objects.create_superuser('admin', 'admin@example.com', 'pw12345!')
+
+    def test_outcomes_per_order_with_one_update(self):
+        ids = [order.pk for order in self.orders] + [999]
+        with CaptureQueriesContext(connection) as queries:
+            result = transitions.bulk_transition('approve_payment', ids, user=self.staff)
+        self.assertEqual(sum(query['sql'].startswith('UPDATE') for query in queries), 1)
+        self.assertEqual(result.applied, [self.orders[0].pk])
+        self.assertEqual(result.skipped, {self.orders[1].pk: transitions.MISSING_SLIP, self.orders[2].pk: transitions.MISSING_SLIP, 999: transitions.NOT_FOUND})
+        approved = Order.objects.get(pk=self.orders[0].pk)
+        self.assertEqual(approved.status, Order.STATUS_PROCESSING)
+        self.assertTrue(approved.admin_payment_note.startswith('Approved by admin on '))
+
+    def test_rejection_releases_booked_days(self):
+        transitions.bulk_transition('reject_payment', [order.pk for order in self.orders])
+        self.assertEqual(Order.objects.filter(status=Order.STATUS_FAILED).count(), 3)
+        self.assertFalse(BookingDay.objects.exists())
+        self.assertEqual(ledger.verify(), [])
+
+    def test_admin_action(self):
+        self.client.login(username='admin', password='pw12345!')
+        self.client.post(reverse('admin:outfits_order_changelist'), {
+            'action': 'mark_shipped', '_selected_action': [order.pk for order in self.orders],
+        })
+        self.assertFalse(Order.objects.filter(status=Order.STATUS_SHIPPED).exists())
+        self.client.post(reverse('admin:outfits_order_changelist'), {
+            'action': 'mark_payment_approved', '_selected_action': [self.orders[0].pk],
+        })
+        self.assertEqual(Order.objects.get(pk=self.orders[0].pk).status, Order.STATUS_PROCESSING)
+
+    def test_admin_action_reports_each_skip_reason(self):
+        self.client.login(username='admin', password='pw12345!')
+        Order.objects.filter(pk=self.orders[2].pk).update(status=Order.STATUS_PENDING)
+        response = self.client.post(reverse('admin:outfits_order_changelist'), {
+            'action': 'mark_payment_approved', '_selected_action': [order.pk for order in self.orders],
+        })
+        self.assertEqual([str(message) for message in get_messages(response.wsgi_request)], [
+            '1 order was successfully marked as payment approved.',
+            '1 order was skipped because its status does not allow this action.',
+            '1 order was skipped because it has no payment slip.',
+        ])
+
+    def test_illegal_bulk_moves_are_refused_when_defined(self):
+        with self.assertRaises(ImproperlyConfigured):
+            transitions.Transition([Order.STATUS_COMPLETED], Order.STATUS_PENDING)
+
+
+class OrderStatusHistoryTests(TestCase):
+    def setUp(self):
+        self.outfit = Outfit.objects.create(name='Silk Dress', description='Red', price=500, stock=2)
+        self.order = place_order(make_order(date(2026, 1, 1), date(2026, 1, 3)), [{'outfit': self.outfit, 'quantity': 1}])
+        self.user = User.objects.create_user('customer', password='pw12345!')
+
+    def test_every_change_is_recorded(self):
+        transitions.transition(self.order, Order.STATUS_WAITING_FOR_APPROVAL, user=self.user)
+        transitions.bulk_transition('reject_payment', [self.order.pk])
+        events = list(self.order.status_events.values_list('from_status', 'status', 'user'))
+        self.assertEqual(events, [
+            ('', Order.STATUS_PENDING, None),
+            (Order.STATUS_PENDING, Order.STATUS_WAITING_FOR_APPROVAL, self.user.pk),
+            (Order.STATUS_WAITING_FOR_APPROVAL, Order.STATUS_FAILED, None),
+        ])
+
+    def test_illegal_moves_are_rejected(self):
+        with self.assertRaises(transitions.IllegalTransition):
+            transitions.transition(self.order, Order.STATUS_SHIPPED)
+        order = Order.objects.get(pk=self.order.pk)
+        order.status = Order.STATUS_COMPLETED
+        with self.assertRaises(ValidationError):
+            order.full_clean()
+        self.assertEqual(self.order.status_events.count(), 1)
+
+    def test_operational_queries(self):
+        now = timezone.now()
+        OrderStatusEvent.objects.create(order=self.order, from_status=Order.STATUS_PENDING, status=Order.STATUS_WAITING_FOR_APPROVAL, at=now - timedelta(hours=3))
+        OrderStatusEvent.objects.create(order=self.order, from_status=Order.STATUS_WAITING_FOR_APPROVAL, status=Order.STATUS_PROCESSING, at=now - timedelta(hours=1))
+        self.assertEqual(transitions.average_time_in_status(Order.STATUS_WAITING_FOR_APPROVAL), timedelta(hours=2))
+        self.assertEqual([event.order for event in transitions.entered_status(Order.STATUS_PROCESSING, now - timedelta(days=1), now)], [self.order])
+
+
+class MultiUnitAllocationTests(TestCase):
+    def setUp(self):
+        self.outfit = Outfit.objects.create(name='Linen Suit', description='Beige', price=300)
+        OutfitUnit.objects.bulk_create([OutfitUnit(outfit=self.outfit, code=f'U-{n:02d}') for n in range(3)])
+        self.outfit.units.first().save()  # Syncs stock from the unit list
+        self.outfit.refresh_from_db()
+
+    def test_stock_follows_active_units(self):
+        self.assertEqual(self.outfit.stock, 3)
+
+    def test_allocates_distinct_units_up_to_capacity(self):
+        first = place_order(make_order(date(2026, 3, 1), date(2026, 3, 2)), [{'outfit': self.outfit, 'quantity': 2}])
+        second = place_order(make_order(date(2026, 3, 2), date(2026, 3, 4)), [{'outfit': self.outfit, 'quantity': 1}])
+        first_units = set(first.items.get().units.values_list('code', flat=True))
+        second_units = set(second.items.get().units.values_list('code', flat=True))
+        self.assertEqual(len(first_units), 2)
+        self.assertEqual(len(second_units), 1)
+        self.assertFalse(first_units & second_units)
+        self.assertFalse(self.outfit.is_available(date(2026, 3, 2), date(2026, 3, 2)))
+        self.assertTrue(self.outfit.is_available(date(2026, 3, 3), date(2026, 3, 4), quantity=2))
+        with self.assertRaises(OutfitUnavailable):
+            place_order(make_order(date(2026, 3, 1), date(2026, 3, 1)), [{'outfit': self.outfit, 'quantity': 2}])
+
+
+@plain_static
+class SearchTests(TestCase):
+    def setUp(self):
+        thai = Category.objects.create(name='ชุดไทย')
+        self.thai_outfit = Outfit.objects.create(name='ชุดไทยจักรพรรดิ', description='ผ้าไหม', price=900, category=thai)
+        self.dress = Outfit.objects.create(name='Evening Dress', description='Long red gown', price=700)
+
+    def test_tokenizer_segments_thai_runs(self):
+        self.assertIn('dress', tokenize('Evening Dress'))
+        self.assertGreater(len(tokenize('ชุดไทย')), 1)
+
+    def test_search_matches_thai_substrings_and_prefixes(self):
+        self.assertEqual([o.pk for o in search_outfits('จักร')[0:10]], [self.thai_outfit.pk])
+        self.assertEqual([o.pk for o in search_outfits('eve')[0:10]], [self.dress.pk])
+
+    def test_name_matches_outrank_description_matches(self):
+        # Created first, so an unweighted tie would list it first
+        described = Outfit.objects.create(name='Wrap Skirt', description='Soft velvet', price=300)
+        named = Outfit.objects.create(name='Velvet Blazer', description='Black', price=400)
+        self.assertEqual([o.pk for o in search_outfits('velvet')[0:10]], [named.pk, described.pk])
+
+    def test_postgres_documents_keep_token_positions(self):
+        # setweight() only weights lexemes that have a position
+        self.assertEqual(tsvector_literal(['red', "it's", 'red']), "'red':1 'it''s':2 'red':3")
+
+    def test_typos_fall_back_to_trigram_matches(self):
+        response = self.client.get(reverse('outfits:outfit-search'), {'q': 'evning dres'})
+        self.assertEqual([o.pk for o in response.context['outfits']], [self.dress.pk])
+        self.assertEqual(response.context['suggestions'], ['Evening Dress'])
+
+    def test_pg_trgm_threshold_is_local_to_the_transaction(self):
+        with mock.patch.object(fuzzy, 'connection') as pg_connection:
+            pg_connection.cursor.return_value.__enter__.return_value.fetchall.return_value = []
+            fuzzy.PgTrgmBackend().similar_outfits('dres')
+        cursor = pg_connection.cursor.return_value.__enter__.return_value
+        self.assertIn(', true)', cursor.execute.call_args_list[0].args[0])
+
+    def test_index_follows_saves(self):
+        self.dress.is_active = False
+        self.dress.save()
+        self.assertEqual(len(search_outfits('gown')), 0)
+
+
+class SuggestTests(TestCase):
+    def test_prefix_index_follows_outfit_changes(self):
+        autocomplete.index.build()
+        with self.captureOnCommitCallbacks(execute=True):
+            outfit = Outfit.objects.create(name='Evening Red Dress', description='Gown', price=700)
+        self.assertIn((autocomplete.OUTFIT, outfit.pk, outfit.name), autocomplete.index.lookup('red'))
+        with self.captureOnCommitCallbacks(execute=True):
+            outfit.is_active = False
+            outfit.save()
+        self.assertEqual(autocomplete.index.lookup('red'), [])
+
+    def test_rolled_back_changes_never_reach_the_index(self):
+        autocomplete.index.build()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                Outfit.objects.create(name='Evening Red Dress', description='Gown', price=700)
+                Category.objects.create(name='Red Carpet')
+                transaction.set_rollback(True)
+        self.assertEqual(callbacks, [])
+        self.assertEqual(autocomplete.index.lookup('red'), [])
+
+    def test_suggest_endpoint_returns_json(self):
+        Outfit.objects.create(name='Velvet Blazer', description='Black', price=400)
+        autocomplete.index.build()
+        response = self.client.get(reverse('outfits:outfit-suggest'), {'q': 'vel'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['name'] for item in response.json()['results']], ['Velvet Blazer'])
+
+
+@plain_static
+class FeaturedOutfitTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Dresses')
+        self.outfits = [Outfit.objects.create(name=f'Dress {i}', description='Silk', price=500, category=category) for i in range(10)]
+
+    def test_home_samples_the_pool_without_random_ordering(self):
+        featured.get_pool()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('outfits:home'))
+        self.assertEqual(len(response.context['featured_outfits']), 6)
+        self.assertFalse(any('RANDOM()' in query['sql'] for query in queries.captured_queries))
+
+    def test_pool_follows_curation(self):
+        self.outfits[0].is_active = False
+        self.outfits[0].save()
+        self.outfits[1].is_featured = True
+        self.outfits[1].save()
+        weights = dict(featured.get_pool())
+        self.assertNotIn(self.outfits[0].pk, weights)
+        self.assertEqual(weights[self.outfits[1].pk], featured.CURATED_WEIGHT)
+
+
+@plain_static
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Dresses')
+        Outfit.objects.create(name='Silk Dress', description='Silk', price=500, category=self.category)
+
+    def test_listing_reads_reference_data_from_cache(self):
+        url = reverse('outfits:outfits-by-category', args=[self.category.slug])
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        # Only the ETag's MAX/COUNT stamp reads the table; the menu itself comes from the cache
+        category_reads = [query['sql'] for query in queries.captured_queries if 'FROM "outfits_category"' in query['sql']]
+        self.assertEqual(len(category_reads), 1, category_reads)
+        self.assertIn('MAX(', category_reads[0])
+
+    def test_saves_bump_the_catalog_version(self):
+        self.assertEqual([c.outfit_count for c in catalog_cache.category_menu()], [1])
+        Outfit.objects.create(name='Lace Dress', description='Lace', price=500, category=self.category)
+        self.assertEqual([c.outfit_count for c in catalog_cache.category_menu()], [2])
+
+    def test_only_the_lock_holder_recomputes_a_stale_entry(self):
+        key = catalog_cache.make_key(catalog_cache.CATALOG, 'answer')
+        cache.set(key, ('stale', 0), 60)
+        cache.add(f'{key}:lock', 1, 60)
+        self.assertEqual(catalog_cache.get_or_compute(catalog_cache.CATALOG, 'answer', lambda: 'fresh'), 'stale')
+        cache.delete(f'{key}:lock')
+        self.assertEqual(catalog_cache.get_or_compute(catalog_cache.CATALOG, 'answer', lambda: 'fresh'), 'fresh')
+
+
+@plain_static
+class OutfitCardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.outfit = Outfit.objects.create(name='Silk Dress', description='Silk', price=1500, category=Category.objects.create(name='Dresses'))
+
+    def test_cards_are_cached_per_language_and_filled_in_per_user(self):
+        with translation.override('en'):
+            html = render_cards([self.outfit], 'list', cart_outfit_ids=[str(self.outfit.pk)])
+            self.assertIn('In your cart', html)
+            self.assertNotIn('<!--', html)
+            self.assertNotIn('In your cart', render_cards([self.outfit], 'list'))
+            self.assertIsNotNone(cache.get(card_key(self.outfit, 'list', 'en')))
+        self.assertIsNone(cache.get(card_key(self.outfit, 'list', 'th')))
+
+    def test_category_rename_changes_the_card(self):
+        render_cards([self.outfit], 'list')
+        self.outfit.category.name = 'Gowns'
+        self.outfit.category.save()
+        outfit = Outfit.objects.select_related('category').get(pk=self.outfit.pk)
+        self.assertIn('Gowns', render_cards([outfit], 'list'))
+
+    def test_listing_page_posts_a_valid_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        response = client.get(reverse('outfits:outfit-list'))
+        token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode()).group(1)
+        response = client.post(reverse('outfits:add_to_cart', args=[self.outfit.pk]), {'quantity': 1, 'csrfmiddlewaretoken': token})
+        self.assertEqual(response.status_code, 302)
+
+
+@plain_static
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.outfit = Outfit.objects.create(name='Silk Dress', description='Silk', price=1500, category=Category.objects.create(name='Dresses'))
+
+    def test_listing_revalidates_until_the_catalog_changes(self):
+        url = reverse('outfits:outfit-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.outfit.price = 1200
+        self.outfit.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_category_menu_changes_are_not_served_from_the_browser_cache(self):
+        # The category page's menu also lists the other categories and their counts
+        url = reverse('outfits:outfits-by-category', args=[self.outfit.category.slug])
+        etag = self.client.get(url)['ETag']
+        empty = Category.objects.create(name='Suits')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        etag = self.client.get(url)['ETag']
+        empty.name = 'Tuxedos'
+        # As seen by another worker, whose local cache version never moved
+        with mock.patch.object(catalog_cache, 'bump'):
+            empty.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        etag = self.client.get(url)['ETag']
+        empty.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        etag = self.client.get(url)['ETag']
+        Outfit.objects.create(name='Wool Suit', description='Wool', price=900)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_pending_order_badge_changes_are_not_served_from_the_browser_cache(self):
+        user = User.objects.create_user('etag', password='pw12345!')
+        order = Order.objects.create(user=user, first_name='A', last_name='B', email='a@example.com', phone='0800000000', address='Bangkok')
+        self.client.force_login(user)
+        url = reverse('outfits:outfit-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # As the hold sweep or a slip approval does
+        Order.objects.filter(pk=order.pk).update(status=Order.STATUS_CANCELLED)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_cart_changes_are_not_served_from_the_browser_cache(self):
+        url = reverse('outfits:outfit-detail', args=[self.outfit.pk])
+        response = self.client.get(url)
+        self.assertIn('Last-Modified', response)
+        self.assertIn('private', response['Cache-Control'])
+        self.client.post(reverse('outfits:add_to_cart', args=[self.outfit.pk]), {'quantity': 1})
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 200)
+
+
+@plain_static
+class DatabaseCartTests(TestCase):
+    def setUp(self):
+        self.outfit = Outfit.objects.create(name='Silk Dress', description='Silk', price=1500, stock=2)
+        self.other = Outfit.objects.create(name='Lace Gown', description='Lace', price=900, stock=1)
+        self.user = User.objects.create_user('cartuser', password='pw12345!')
+
+    def add(self, outfit, quantity=1):
+        return self.client.post(reverse('outfits:add_to_cart', args=[outfit.pk]), {'quantity': quantity})
+
+    def test_session_holds_only_the_cart_id(self):
+        self.add(self.outfit)
+        cart = Cart.objects.get()
+        self.assertEqual(self.client.session[settings.CART_SESSION_ID], cart.pk)
+        self.assertEqual(list(cart.items.values_list('outfit_id', 'quantity')), [(self.outfit.pk, 1)])
+
+    def test_header_count_is_one_query_per_request_and_never_stale(self):
+        self.add(self.outfit, 2)
+        self.add(self.other)
+        self.assertContains(self.client.get(reverse('outfits:cart_detail')), '<span class="cart-badge">3</span>', html=True)
+        request = RequestFactory().get('/')
+        request.session, request.user = self.client.session, AnonymousUser()
+        request.session.items()  # load it before counting queries
+        with self.assertNumQueries(1):
+            self.assertEqual(carts.cart_summary(request)['count'], 3)
+            self.assertEqual(carts.cart_summary(request)['count'], 3)
+        # Deactivating an outfit shows up at once, with no cache entry to clear
+        Outfit.objects.filter(pk=self.other.pk).update(is_active=False)
+        self.assertContains(self.client.get(reverse('outfits:outfit-list')), '<span class="cart-badge">2</span>', html=True)
+        self.client.post(reverse('outfits:remove_from_cart', args=[self.outfit.pk]))
+        self.assertNotContains(self.client.get(reverse('outfits:outfit-list')), 'cart-badge')
+
+    def test_inactive_outfits_are_dropped_without_touching_the_session(self):
+        self.add(self.outfit)
+        self.add(self.other)
+        Outfit.objects.filter(pk=self.other.pk).update(is_active=False)
+        session_key = self.client.session.session_key
+        response = self.client.get(reverse('outfits:cart_detail'))
+        self.assertEqual([item['outfit'] for item in response.context['cart_items']], [self.outfit])
+        self.assertEqual(CartItem.objects.count(), 1)
+        self.assertEqual(self.client.session.session_key, session_key)
+
+    def test_anonymous_cart_is_merged_on_login(self):
+        existing = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=existing, outfit=self.outfit, quantity=1)
+        self.add(self.outfit, 2)
+        self.add(self.other)
+        self.client.login(username='cartuser', password='pw12345!')
+        self.assertEqual(Cart.objects.count(), 1)
+        self.assertEqual(dict(existing.items.values_list('outfit_id', 'quantity')), {self.outfit.pk: 2, self.other.pk: 1})
+        self.assertNotIn(settings.CART_SESSION_ID, self.client.session)
+
+    def test_legacy_session_cart_is_adopted(self):
+        session = self.client.session
+        session[settings.CART_SESSION_ID] = {str(self.outfit.pk): {'quantity': 1}}
+        session.save()
+        self.add(self.other)
+        cart = Cart.objects.get()
+        self.assertEqual(set(cart.items.values_list('outfit_id', flat=True)), {self.outfit.pk, self.other.pk})
+
+
+@plain_static
+class HeaderCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('header', password='pw12345!')
+
+    def test_counters_are_computed_only_when_rendered_and_once_per_request(self):
+        Order.objects.create(user=self.user, first_name='A', last_name='B', email='a@example.com', phone='0800000000', address='Bangkok')
+        request = RequestFactory().get('/')
+        request.session, request.user = self.client.session, self.user
+        with self.assertNumQueries(0):
+            context = context_processors.cart(request)
+        with self.assertNumQueries(2):
+            self.assertEqual(str(context['cart_item_count']), '0')
+            self.assertEqual(str(context['pending_order_count']), '1')
+        with self.assertNumQueries(0):
+            again = context_processors.cart(request)
+            self.assertTrue(again['pending_order_count'] > 0)
+            self.assertFalse(again['cart_item_count'])
+
+    def test_pending_orders_badge(self):
+        self.client.login(username='header', password='pw12345!')
+        self.assertNotContains(self.client.get(reverse('outfits:about')), 'pending-badge')
+        Order.objects.create(user=self.user, first_name='A', last_name='B', email='a@example.com', phone='0800000000', address='Bangkok')
+        self.assertContains(self.client.get(reverse('outfits:about')), 'pending-badge')
+
+
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def make_photo(self, size=(2400, 3200)):
+        buffer = BytesIO()
+        Image.effect_noise(size, 64).convert('RGB').save(buffer, 'JPEG', quality=95)
+        return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def generate(self):
+        call_command('generate_image_derivatives', '--workers', '1', stdout=StringIO())
+
+    def test_command_generates_small_renditions(self):
+        outfit = Outfit.objects.create(name='Silk Dress', description='Silk', price=500, image=self.make_photo())
+        self.generate()
+        original = os.path.getsize(outfit.image.path)
+        for rendition, width in images.RENDITIONS.items():
+            for extension in images.FORMATS:
+                path = os.path.join(self.media_root, images.rendition_name(outfit.image.name, rendition, extension))
+                with Image.open(path) as rendered:
+                    self.assertEqual(rendered.width, width)
+        card = os.path.join(self.media_root, images.rendition_name(outfit.image.name, 'card', 'webp'))
+        self.assertLess(os.path.getsize(card) * 10, original)
+        outfit.refresh_from_db()
+        self.assertTrue(outfit.image_renditions_ready)
+        with mock.patch.object(default_storage, 'exists', side_effect=AssertionError("storage asked while rendering")):
+            html = Template("{% load outfit_images %}{% outfit_image outfit 'card' %}").render(Context({'outfit': outfit}))
+        self.assertIn('type="image/webp"', html)
+        self.assertIn('480w', html)
+
+    def test_finished_renditions_change_the_card_key_and_the_page_validators(self):
+        outfit = Outfit.objects.create(name='Silk Dress', description='Silk', price=500, image=self.make_photo((800, 1000)))
+        outfit.refresh_from_db()
+        key, updated_at = card_key(outfit, 'list', 'en', version=1), outfit.updated_at
+        images.generate_derivatives(outfit.image.name)
+        images.mark_ready(outfit.image.name)
+        outfit.refresh_from_db()
+        # Without relying on the CARDS bump, which only reaches this process
+        self.assertNotEqual(card_key(outfit, 'list', 'en', version=1), key)
+        self.assertGreater(outfit.updated_at, updated_at)
+
+    def test_renditions_keep_the_original_extension(self):
+        self.assertNotEqual(
+            images.rendition_name('outfits/dress.jpg', 'card', 'webp'),
+            images.rendition_name('outfits/dress.png', 'card', 'webp'),
+        )
+
+    def test_replaced_image_drops_old_renditions(self):
+        outfit = Outfit.objects.create(name='Silk Dress', description='Silk', price=500, image=self.make_photo((800, 1000)))
+        self.generate()
+        old_name = outfit.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            outfit.image = self.make_photo((900, 1200))
+            outfit.save()
+        self.assertFalse(images.has_derivatives(old_name))
+        self.assertFalse(images.has_derivatives(outfit.image.name))
+        self.generate()
+        self.assertTrue(images.has_derivatives(outfit.image.name))
+        self.assertTrue(Outfit.objects.get(pk=outfit.pk).image_renditions_ready)
+
+    def test_new_image_is_shown_as_is_until_its_renditions_exist(self):
+        outfit = Outfit.objects.create(name='Silk Dress', description='Silk', price=500, image=self.make_photo((800, 1000)))
+        self.generate()
+        outfit.refresh_from_db()
+        self.assertTrue(outfit.image_renditions_ready)
+        outfit.image = self.make_photo((900, 1200))
+        # Saving never resizes in the request
+        with mock.patch.object(images, 'generate_derivatives', side_effect=AssertionError("resized while saving")):
+            with self.captureOnCommitCallbacks(execute=True):
+                outfit.save()
+        self.assertFalse(Outfit.objects.get(pk=outfit.pk).image_renditions_ready)
+        self.assertEqual(images.derivative_url(outfit, 'card'), outfit.image.url)
+
+
+@plain_static
+class SlipUploadTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+        user = User.objects.create_user('renter', password='secret')
+        self.client.force_login(user)
+        self.order = make_order(date(2026, 3, 1), date(2026, 3, 3))
+        self.order.user = user
+        self.order.status = Order.STATUS_RENTED
+        self.order.save()
+        self.url = reverse('outfits:initiate_return', args=[self.order.pk])
+
+    def make_photo(self, size, **save_options):
+        buffer = BytesIO()
+        Image.effect_noise(size, 64).convert('RGB').save(buffer, 'JPEG', **save_options)
+        return SimpleUploadedFile('slip.jpeg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_slip_is_downscaled_and_stripped(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'PhoneMaker'
+        response = self.client.post(self.url, {'return_tracking_number': 'TH123', 'return_slip': self.make_photo((3200, 2400), exif=exif)})
+        self.assertEqual(response.status_code, 302)
+        self.order.refresh_from_db()
+        self.assertTrue(self.order.return_slip.name.endswith('.jpg'))
+        with Image.open(self.order.return_slip.path) as stored:
+            self.assertLessEqual(max(stored.size), 1600)
+            self.assertEqual(len(stored.getexif()), 0)
+
+    @override_settings(SLIP_UPLOAD_MAX_BYTES=20 * 1024)
+    def test_oversize_slip_is_rejected(self):
+        response = self.client.post(self.url, {'return_tracking_number': 'TH123', 'return_slip': self.make_photo((400, 400), quality=95)})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('too large', str(response.context['form'].errors['return_slip']))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, Order.STATUS_RENTED)
+
+
+def _bitwise_crc16(data):
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021 if crc & 0x8000 else crc << 1) & 0xFFFF
+    return format(crc, '04X')
+
+
+# Milliseconds, checked only with PAGE_BUDGET_MS_FACTOR set (see TimeBudgetMixin)
+QR_BUDGETS_MS = {
+    'crc16 x1000': 25,
+    'first render': 50,
+    'cached render x100': 1,
+}
+
+
+class PromptPayQrTests(TimeBudgetMixin, SimpleTestCase):
+    def setUp(self):
+        for cached in (qr.qr_matrix, qr.render_qr_png, qr.render_qr_svg, qr.generate_promptpay_qr):
+            cached.cache_clear()
+
+    def test_table_crc_matches_bitwise_crc(self):
+        for payload in (b'', b'123456789', qr.promptpay_payload('0812345678', 1500.0).encode()):
+            self.assertEqual(qr._crc16(payload), _bitwise_crc16(payload))
+        self.assertEqual(qr._crc16(b'123456789'), '29B1')  # CRC-16/CCITT-FALSE check value
+
+    def test_svg_and_png_show_the_same_modules(self):
+        payload = qr.promptpay_payload('0812345678', 250.0)
+        matrix = qr.qr_matrix(payload)
+        png = Image.open(BytesIO(qr.render_qr_png(payload))).convert('1')
+        self.assertEqual(png.size, (len(matrix) * 10,) * 2)
+        self.assertEqual(png.getpixel((45, 45)) == 0, matrix[4][4])
+        self.assertTrue(qr.render_qr_svg(payload).startswith('<svg'))
+
+    def test_repeat_codes_come_from_the_cache(self):
+        first = qr.generate_promptpay_qr('0812345678', 1234.5)
+        self.assertIs(qr.generate_promptpay_qr('0812345678', 1234.5), first)
+        self.assertEqual(qr.generate_promptpay_qr.cache_info().hits, 1)
+
+    def test_micro_benchmark(self):
+        payload = qr.promptpay_payload('0812345678', 1234.5)
+        self.assertLess(len(payload), 100)
+        data = payload.encode()
+        timings = {
+            # The bitwise CRC takes several times this
+            'crc16 x1000': timeit.timeit(lambda: qr._crc16(data), number=1000) * 1000,
+            'first render': timeit.timeit(lambda: qr.generate_promptpay_qr('0812345678', 1234.5), number=1) * 1000,
+            'cached render x100': timeit.timeit(lambda: qr.generate_promptpay_qr('0812345678', 1234.5), number=100) * 1000,
+        }
+        for label, elapsed_ms in timings.items():
+            self.assertWithinTime(label, elapsed_ms, QR_BUDGETS_MS[label])
+
+
+@plain_static
+@override_settings(PROMPTPAY_ID='0812345678')
+class PaymentQrEndpointTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('payer', password='secret')
+        self.client.force_login(self.user)
+        self.order = make_order(date(2026, 3, 1), date(2026, 3, 3))
+        self.order.user = self.user
+        self.order.total_amount = 1500
+        self.order.save()
+
+    def test_payment_page_links_the_qr_image(self):
+        response = self.client.get(reverse('outfits:payment_process', args=[self.order.pk]))
+        self.assertContains(response, reverse('outfits:payment_qr', args=[self.order.pk, 'png']))
+        self.assertNotContains(response, 'base64')
+
+    def test_qr_is_served_with_a_strong_etag(self):
+        url = reverse('outfits:payment_qr', args=[self.order.pk, 'png'])
+        response = self.client.get(url)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertFalse(response['ETag'].startswith('W/'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        svg = self.client.get(reverse('outfits:payment_qr', args=[self.order.pk, 'svg']))
+        self.assertEqual(svg['Content-Type'], 'image/svg+xml')
+        self.assertNotEqual(svg['ETag'], response['ETag'])
+
+    def test_qr_is_revalidated_and_follows_the_total(self):
+        url = reverse('outfits:payment_qr', args=[self.order.pk, 'png'])
+        response = self.client.get(url)
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertNotIn('max-age', response['Cache-Control'])
+
+        Order.objects.filter(pk=self.order.pk).update(total_amount=1800)
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], response['ETag'])
+
+    def test_no_qr_after_the_hold_expires(self):
+        Order.objects.filter(pk=self.order.pk).update(created_at=timezone.now() - timedelta(minutes=settings.PENDING_ORDER_TTL_MINUTES + 1))
+        self.assertEqual(self.client.get(reverse('outfits:payment_qr', args=[self.order.pk, 'png'])).status_code, 404)
+
+    def test_qr_is_private_to_the_orders_owner(self):
+        self.client.force_login(User.objects.create_user('stranger', password='secret'))
+        self.assertEqual(self.client.get(reverse('outfits:payment_qr', args=[self.order.pk, 'png'])).status_code, 404)
+
+
+class QueryPlanTests(TestCase):
+    """
+    EXPLAIN the hot queries and fail when one stops using its index. On
+    PostgreSQL sequential scans are disabled for the test, so a plan that can
+    only be a Seq Scan (no usable index) still shows up as one.
+    """
+    def setUp(self):
+        category = Category.objects.create(name='Dresses')
+        for i in range(30):
+            Outfit.objects.create(name=f'Outfit {i:02}', description='-', price=100, category=category, is_active=i % 4 != 0, is_featured=i % 7 == 0)
+        self.user = User.objects.create_user('planner')
+        self.category = category
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def hot_queries(self):
+        now = timezone.now()
+        start, end = date(2026, 1, 1), date(2026, 1, 7)
+        active = Outfit.objects.filter(is_active=True)
+        return {
+            'listing': (active.order_by('name', 'id')[:12], 'outfit_active_listing_idx'),
+            'listing next page': (active.filter(name__gt='Outfit 10').order_by('name', 'id')[:12], 'outfit_active_listing_idx'),
+            'category page': (active.filter(category=self.category).order_by('name', 'id')[:12], 'outfit_active_category_idx'),
+            'related outfits': (active.filter(category=self.category).exclude(pk=1)[:4], 'outfit_active_category_idx'),
+            'featured curated': (active.filter(is_featured=True).values_list('pk', flat=True)[:60], 'outfit_featured_idx'),
+            'order history': (Order.objects.filter(user=self.user), 'order_user_created_idx'),
+            # status is a bound parameter, so a partial index on it could never match; (user, created_at) serves the count
+            'pending badge': (Order.objects.filter(user=self.user, status=Order.STATUS_PENDING), 'order_user_created_idx'),
+            'hold sweeper': (stale_pending_orders(now)[:500], 'order_status_created_idx'),
+            'admin changelist': (Order.objects.all()[:100], 'order_created_idx'),
+            'booking orders in span': (
+                Order.objects.filter(status__in=Order.BOOKING_STATUSES, rental_start_date__lte=end, rental_end_date__gte=start),
+                'order_status_rental_idx',
+            ),
+            # The foreign key's own index (PostgreSQL appends a hash to the name)
+            'outfit bookings': (
+                OrderItem.objects.filter(outfit_id__in=[1, 2], order__status__in=Order.BOOKING_STATUSES).values_list('order_id', 'quantity'),
+                'outfits_orderitem_outfit_id',
+            ),
+            'ledger span': (
+                BookingDay.objects.filter(outfit_id__in=[1, 2], day__range=(start, end)),
+                'sqlite_autoindex_outfits_bookingday' if connection.vendor == 'sqlite' else 'unique_booking_day_per_outfit',
+            ),
+            'status events': (transitions.entered_status(Order.STATUS_SHIPPED, now - timedelta(days=1), now), 'order_event_status_at_idx'),
+        }
+
+    def assertUsesIndex(self, name, queryset, index):
+        plan = queryset.explain()
+        table = queryset.model._meta.db_table
+        if connection.vendor == 'postgresql':
+            full_scan = re.search(rf'Seq Scan on {table}\b', plan)
+        elif queryset.query.is_sliced:
+            # An index scan stops after the slice, a bare table scan does not
+            full_scan = re.search(rf'\bSCAN {table}\s*$', plan, re.MULTILINE)
+        else:
+            full_scan = re.search(rf'\bSCAN {table}\b', plan)
+        self.assertIsNone(full_scan, f"{name}: sequential scan of {table}\n{plan}")
+        self.assertIn(index, plan, f"{name}: {index} not used\n{plan}")
+
+    def test_hot_queries_use_their_indexes(self):
+        for name, (queryset, index) in self.hot_queries().items():
+            with self.subTest(name):
+                self.assertUsesIndex(name, queryset, index)
+
+
+@plain_static
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Duplicate names make sure ties are broken by id
+        for i in range(30):
+            Outfit.objects.create(name=f'Outfit {i // 2:02d}', description='Cotton', price=100)
+        self.expected = list(Outfit.objects.filter(is_active=True).order_by('name', 'id').values_list('pk', flat=True))
+
+    def test_cursors_walk_every_row_once_in_both_directions(self):
+        paginator = KeysetPaginator(Outfit.objects.filter(is_active=True), 12)
+        page, seen = paginator.page(), []
+        while True:
+            seen.extend(outfit.pk for outfit in page)
+            if not page.has_next():
+                break
+            page = paginator.page(page.next_cursor)
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(page.number, 3)
+        page = paginator.page(page.previous_cursor)
+        self.assertEqual([outfit.pk for outfit in page], self.expected[12:24])
+        self.assertEqual(page.number, 2)
+
+    def test_listing_uses_cursor_links(self):
+        url = reverse('outfits:outfit-list')
+        response = self.client.get(url)
+        page = response.context['page_obj']
+        self.assertEqual([outfit.pk for outfit in page], self.expected[:12])
+        self.assertEqual(page.paginator.num_pages, 3)
+        response = self.client.get(url, {'cursor': page.last_cursor})
+        last = response.context['page_obj']
+        # The same rows as page 3 reached by walking forward
+        self.assertEqual([outfit.pk for outfit in last], self.expected[24:])
+        self.assertEqual(last.number, 3)
+        previous = response.context['paginator'].page(last.previous_cursor)
+        self.assertEqual([outfit.pk for outfit in previous], self.expected[12:24])
+        self.assertEqual(self.client.get(url, {'cursor': 'garbage'}).status_code, 404)
+
+
+# Query and wall-time budgets per page: (url name, args, signed in, max queries, max milliseconds).
+# Counts are for a cold cache; raise one only together with the change that needs it.
+PAGE_BUDGETS = [
+    ('outfits:home', (), False, 7, 400),
+    ('outfits:outfit-list', (), False, 6, 400),
+    ('outfits:outfit-list', (), True, 11, 400),
+    ('outfits:outfits-by-category', ('dresses',), False, 5, 400),
+    ('outfits:outfit-search', (), False, 6, 400),
+    ('outfits:outfit-suggest', (), False, 2, 200),
+    ('outfits:outfit-detail', ('outfit',), False, 8, 400),
+    # outfits:register is left out: its template (registration/register.html) is not in this tree, sign-up goes through allauth
+    ('outfits:about', (), False, 4, 300),
+    ('outfits:cart_detail', (), True, 9, 400),
+    ('outfits:checkout', (), True, 10, 400),
+    ('outfits:payment_process', ('pending_order',), True, 9, 400),
+    ('outfits:payment_qr', ('pending_order', 'svg'), True, 5, 300),
+    ('outfits:payment_result', (), True, 7, 300),
+    ('outfits:order_history', (), True, 9, 400),
+    ('outfits:order_detail', ('shipped_order',), True, 10, 400),
+    ('outfits:initiate_return', ('shipped_order',), True, 8, 400),
+    ('outfits:user_profile', (), True, 8, 400),
+    ('admin:outfits_order_changelist', (), 'staff', 7, 500),
+    ('admin:outfits_order_change', ('shipped_order',), 'staff', 20, 800),
+    ('admin:outfits_outfit_changelist', (), 'staff', 8, 500),
+    ('admin:outfits_category_changelist', (), 'staff', 8, 500),
+    ('admin:auth_user_changelist', (), 'staff', 10, 500),
+]
+
+# (url name, args, signed in, POST data, expected status, max queries, max ms); each runs in a transaction that is rolled back.
+# The slip uploads (payment_process, initiate_return) are left out: they write files, which a rollback cannot undo,
+# and their cost is the image decoding covered by SlipUploadTests.
+POST_BUDGETS = [
+    # The first add creates the cart and the anonymous session
+    ('outfits:add_to_cart', ('new_outfit',), False, {'quantity': 1}, 302, 12, 300),
+    ('outfits:add_to_cart', ('new_outfit',), True, {'quantity': 1}, 302, 10, 300),
+    ('outfits:remove_from_cart', ('cart_outfit',), True, {}, 302, 6, 300),
+    ('outfits:checkout', (), True, {
+        'first_name': 'Budget', 'last_name': 'User', 'email': 'budget@example.com', 'phone': '0812345678',
+        'address': '1 Silom Road', 'rental_start_date': '2031-03-01', 'rental_end_date': '2031-03-03',
+    }, 302, 22, 800),
+    ('outfits:user_profile', (), True, {'first_name': 'Budget', 'last_name': 'User', 'email': 'budget@example.com', 'phone': '0812345678', 'address': '1 Silom Road'}, 302, 10, 400),
+]
+
+
+def _normalized(sql):
+    return re.sub(r"'[^']*'|\b\d+\b", '?', sql)
+
+
+def explain_queries(queries):
+    """The captured SQL, numbered, with statements repeated under different parameters (N+1s) listed first."""
+    repeated = Counter(_normalized(query['sql']) for query in queries)
+    lines = [f"  x{count}  {sql}" for sql, count in repeated.most_common() if count > 1]
+    lines += [f"  {number}. {query['sql']}" for number, query in enumerate(queries, 1)]
+    return '\n'.join(lines)
+
+
+@plain_static
+@override_settings(PROMPTPAY_ID='0812345678')
+class PageBudgetTests(TimeBudgetMixin, TestCase):
+    """
+    Every URL in outfits/urls.py and the main admin pages stay within
+    PAGE_BUDGETS, and the form posts within POST_BUDGETS. Time limits are
+    only enforced with PAGE_BUDGET_MS_FACTOR set.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        categories = [Category.objects.create(name=name) for name in ('Dresses', 'Suits', 'Traditional')]
+        outfits = [
+            Outfit.objects.create(
+                name=f'Outfit {i:02}', description='Hand-picked pre-loved outfit. ' * 4, price=300 + i * 10,
+                category=categories[i % 3], stock=2, is_featured=i % 5 == 0,
+            )
+            for i in range(40)
+        ]
+        cls.user = User.objects.create_user('budget', 'budget@example.com', 'pw12345!')
+        cls.staff = User.objects.create_superuser('staff', 'staff@example.com', 'pw12345!')
+        orders = []
+        for i in range(8):
+            order = make_order(date(2030, 1, 1 + i * 3), date(2030, 1, 2 + i * 3))
+            order.user = cls.user
+            orders.append(place_order(order, [{'outfit': outfit, 'quantity': 1} for outfit in outfits[i * 3:i * 3 + 3]]))
+        transitions.transition(orders[0], Order.STATUS_WAITING_FOR_APPROVAL)
+        transitions.transition(orders[0], Order.STATUS_PROCESSING)
+        transitions.transition(orders[0], Order.STATUS_SHIPPED)
+        cls.objects = {
+            'outfit': outfits[1].pk, 'dresses': categories[0].slug, 'shipped_order': orders[0].pk, 'pending_order': orders[1].pk,
+            'new_outfit': outfits[35].pk, 'cart_outfit': outfits[30].pk,
+        }
+        cls.cart_outfits = outfits[30:34]
+
+    def setUp(self):
+        cache.clear()
+
+    def url(self, name, args):
+        url = reverse(name, args=[self.objects.get(arg, arg) for arg in args])
+        if name == 'outfits:outfit-search':
+            url += '?q=Outfit'
+        elif name == 'outfits:outfit-suggest':
+            url += '?q=Out'
+        return url
+
+    def client_for(self, signed_in):
+        client = Client()
+        if signed_in:
+            client.force_login(self.staff if signed_in == 'staff' else self.user)
+            for outfit in self.cart_outfits:
+                client.post(reverse('outfits:add_to_cart', args=[outfit.pk]))
+            session = client.session
+            session['latest_order_id'] = self.objects['pending_order']
+            session.save()
+        return client
+
+    def test_pages_stay_within_budget(self):
+        for name, args, signed_in, max_queries, max_ms in PAGE_BUDGETS:
+            label = f"{name}{' (signed in)' if signed_in else ''}"
+            with self.subTest(label):
+                client, url = self.client_for(signed_in), self.url(name, args)
+                client.get(url)  # warm up templates and URL resolvers
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                self.assertEqual(response.status_code, 200, label)
+                self.assertLessEqual(len(queries), max_queries, f"{label}: {len(queries)} queries, budget {max_queries}\n{explain_queries(queries)}")
+                self.assertWithinTime(label, elapsed_ms, max_ms)
+
+    def test_form_posts_stay_within_budget(self):
+        for name, args, signed_in, data, expected_status, max_queries, max_ms in POST_BUDGETS:
+            label = f"POST {name}{' (signed in)' if signed_in else ''}"
+            with self.subTest(label), transaction.atomic():
+                client, url = self.client_for(signed_in), self.url(name, args)
+                client.get(reverse('outfits:checkout') if signed_in else reverse('outfits:home'))  # warm up
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = client.post(url, data)
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                transaction.set_rollback(True)
+                self.assertEqual(response.status_code, expected_status, label)
+                self.assertLessEqual(len(queries), max_queries, f"{label}: {len(queries)} queries, budget {max_queries}\n{explain_queries(queries)}")
+                self.assertWithinTime(label, elapsed_ms, max_ms)
+
+
+class SyntheticDataTests(TestCase):
+    def test_generated_data_is_consistent(self):
+        synthetic.generate(outfits=30, users=5, orders=40, categories=3, seed=1, batch_size=7)
+
+        users = synthetic.synthetic_users()
+        self.assertEqual(users.count(), 5)
+        self.assertEqual(users.filter(profile__isnull=False).count(), 5)
+        self.assertTrue(users.first().check_password(synthetic.PASSWORD))
+        self.assertEqual(Outfit.objects.filter(category__slug__startswith='synthetic-').count(), 30)
+        self.assertEqual(Order.objects.filter(user__in=users).count(), 40)
+        self.assertEqual(OrderStatusEvent.objects.count(), 40)
+        # Timestamps are spread over the past year instead of all being "now"
+        self.assertGreater(Order.objects.filter(created_at__lt=timezone.now() - timedelta(days=1)).count(), 0)
+        self.assertFalse(pricing.drifted_orders().exists())
+        self.assertEqual(ledger.verify(), [])
+        self.assertTrue(search_outfits(Outfit.objects.filter(is_active=True).first().name.split()[1]))
+
+    def test_clear_only_removes_synthetic_rows(self):
+        real = Outfit.objects.create(name='Silk Dress', description='Red', price=500)
+        synthetic.generate(outfits=10, users=2, orders=5, categories=2, seed=2)
+
+        synthetic.clear()
+
+        self.assertEqual(list(Outfit.objects.all()), [real])
+        self.assertFalse(synthetic.synthetic_users().exists())
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(Category.objects.exists())
+
+
+class BenchmarkSummaryTests(SimpleTestCase):
+    def test_percentile_interpolates(self):
+        values = [10, 20, 30, 40]
+        self.assertEqual(benchmark.percentile(values, 0), 10)
+        self.assertEqual(benchmark.percentile(values, 50), 25)
+        self.assertEqual(benchmark.percentile(values, 100), 40)
+        self.assertIsNone(benchmark.percentile([], 95))
+
+    def test_summarize_merges_workers(self):
+        workers = [
+            {'home': {'latencies': [10.0, 30.0], 'errors': 0}},
+            {'home': {'latencies': [20.0], 'errors': 1}, 'cart': {'latencies': [5.0], 'errors': 0}},
+        ]
+        summary = benchmark.summarize(workers, duration=2)
+
+        self.assertEqual(summary['routes']['home']['requests'], 4)
+        self.assertEqual(summary['routes']['home']['errors'], 1)
+        self.assertEqual(summary['routes']['home']['p50_ms'], 20.0)
+        self.assertEqual(summary['overall']['throughput_rps'], 2.5)
+        self.assertEqual(list(summary['routes']), ['home', 'cart'])
+
+
+@plain_static
+class BenchmarkWorkerTests(LiveServerTestCase):
+    def test_signed_in_visits_succeed(self):
+        synthetic.generate(outfits=10, users=1, orders=3, categories=2, seed=3)
+        plan = benchmark.build_plan(self.live_server_url, workers=1, seed=3)
+
+        results = benchmark.run_worker(plan, 0, duration=1)
+
+        self.assertEqual({route: timings['errors'] for route, timings in results.items()}, dict.fromkeys(results, 0))
+        self.assertEqual(set(results), set(benchmark.ROUTES))
+        # Errors count anything but a 200, so checkout was rendered with a full cart every time
+        self.assertTrue(results['checkout']['latencies'])
+
+    def test_redirects_count_as_errors(self):
+        synthetic.generate(outfits=5, users=1, categories=1, seed=4)
+        plan = benchmark.build_plan(self.live_server_url, workers=1, seed=4)
+        plan['sessions'] = ['not-a-session']
+
+        results = benchmark.run_worker(plan, 0, duration=1)
+
+        # Signed out, checkout redirects to the login page
+        self.assertFalse(results['checkout']['latencies'])
+        self.assertGreater(results['checkout']['errors'], 0)
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    workers = 8
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # Each forked worker would get its own copy of the database (settings.py
+            # puts the SQLite test database in a file for this)
+            self.skipTest("needs a database the forked workers can share, e.g. PostgreSQL or a SQLite TEST NAME")
+
+    def test_concurrent_checkouts_never_double_book(self):
+        outfit = Outfit.objects.create(name='Lace Gown', description='White', price=900)
+        connections.close_all()
+
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        processes = [
+            context.Process(target=_checkout_worker, args=(outfit.pk, date(2026, 2, 1), date(2026, 2, 3), results))
+            for _ in range(self.workers)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(timeout=60)
+        outcomes = [results.get(timeout=5) for _ in processes]
+
+        # Any other outcome, like "database is locked", is a failure too
+        self.assertEqual(sorted(outcomes), ['booked'] + ['unavailable'] * (self.workers - 1), outcomes)
+        self.assertEqual(OrderItem.objects.filter(outfit=outfit).count(), 1)
+        self.assertFalse(BookingDay.objects.filter(outfit=outfit, quantity__gt=1).exists())
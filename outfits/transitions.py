@@ -0,0 +1,202 @@
+# outfits/transitions.py
+"""
+Order status changes and their history.
+
+Order.TRANSITIONS is the table of allowed moves. transition() checks a single
+order against it and saves; every saved status change (views, admin form,
+transition()) is appended to OrderStatusEvent by the post_save handler below,
+so "orders shipped yesterday" or "how long slips wait for approval" are range
+scans on the (status, at) index instead of guesses from updated_at.
+
+The named TRANSITIONS here are the bulk moves of the admin actions and the
+`transition_orders` command: each names the statuses it may start from and
+the status it moves to. bulk_transition() reads the candidate orders once
+(locked), moves every eligible one with a single UPDATE per batch and, because
+update() skips signals, re-syncs the booking ledger for orders that start or
+stop holding stock and appends their events itself. It returns what happened
+to every requested order so the admin, the command or an API can report it.
+"""
+import logging
+from collections import defaultdict
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import Avg, DurationField, ExpressionWrapper, F, OuterRef, Subquery
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import ledger
+from .models import Order, OrderItem, OrderStatusEvent
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+APPLIED = 'applied'
+WRONG_STATUS = 'wrong_status'
+MISSING_SLIP = 'missing_slip'
+NOT_FOUND = 'not_found'
+
+
+class IllegalTransition(Exception):
+    """Raised when Order.TRANSITIONS does not allow the requested move."""
+
+    def __init__(self, order, status):
+        self.order, self.status = order, status
+        super().__init__(f"Order #{order.pk} cannot move from {order.status} to {status}")
+
+
+def transition(order, status, user=None, note=''):
+    """Moves one order to status and saves it, recording who did it. Raises IllegalTransition."""
+    if not Order.can_transition(order.status, status):
+        raise IllegalTransition(order, status)
+    order.status = status
+    order._status_event = {'user': user, 'note': note}
+    order.save()
+    return order
+
+
+class Transition:
+    def __init__(self, sources, target, note=None, requires_slip=False):
+        illegal = [source for source in sources if target not in Order.TRANSITIONS.get(source, ())]
+        if illegal:
+            raise ImproperlyConfigured(f"{illegal} -> {target} is not in Order.TRANSITIONS")
+        self.sources = tuple(sources)
+        self.target = target
+        # Formatted with {user} and {when}; None leaves admin_payment_note alone
+        self.note = note
+        self.requires_slip = requires_slip
+
+    def changes_booking(self):
+        is_booking = self.target in Order.BOOKING_STATUSES
+        return any((source in Order.BOOKING_STATUSES) != is_booking for source in self.sources)
+
+
+TRANSITIONS = {
+    'approve_payment': Transition(
+        [Order.STATUS_WAITING_FOR_APPROVAL], Order.STATUS_PROCESSING,
+        note="Approved by {user} on {when}.", requires_slip=True,
+    ),
+    'reject_payment': Transition(
+        [Order.STATUS_WAITING_FOR_APPROVAL], Order.STATUS_FAILED,
+        note="Rejected by {user} on {when}.",
+    ),
+    'ship': Transition([Order.STATUS_PROCESSING], Order.STATUS_SHIPPED),
+    'receive_return': Transition([Order.STATUS_RETURN_SHIPPED], Order.STATUS_RETURN_RECEIVED),
+}
+
+
+class TransitionResult:
+    """Outcome per order id: APPLIED, WRONG_STATUS, MISSING_SLIP or NOT_FOUND."""
+
+    def __init__(self, name):
+        self.name = name
+        self.outcomes = {}
+
+    @property
+    def applied(self):
+        return [order_id for order_id, outcome in self.outcomes.items() if outcome == APPLIED]
+
+    @property
+    def skipped(self):
+        return {order_id: outcome for order_id, outcome in self.outcomes.items() if outcome != APPLIED}
+
+    def __len__(self):
+        return len(self.applied)
+
+
+def _apply_batch(transition, order_ids, changes, result, user=None):
+    with transaction.atomic():
+        rows = Order.objects.select_for_update().filter(pk__in=order_ids).values_list('pk', 'status', 'payment_slip')
+        eligible = {}
+        for order_id, status, payment_slip in rows:
+            if status not in transition.sources:
+                result.outcomes[order_id] = WRONG_STATUS
+            elif transition.requires_slip and not payment_slip:
+                result.outcomes[order_id] = MISSING_SLIP
+            else:
+                eligible[order_id] = status
+        if not eligible:
+            return
+
+        spans = defaultdict(set)
+        if transition.changes_booking():
+            items = OrderItem.objects.filter(order_id__in=eligible).values_list('outfit_id', 'order__rental_start_date', 'order__rental_end_date')
+            for outfit_id, start_date, end_date in items:
+                spans[(start_date, end_date)].add(outfit_id)
+
+        Order.objects.filter(pk__in=eligible).update(**changes)
+        # update() skips signals, so bring the ledger and the history in line explicitly
+        for (start_date, end_date), outfit_ids in spans.items():
+            ledger.sync_span(outfit_ids, start_date, end_date)
+        record_events(eligible, changes['status'], changes['updated_at'], user=user, note=changes.get('admin_payment_note', ''))
+        for order_id in eligible:
+            result.outcomes[order_id] = APPLIED
+
+
+def bulk_transition(name, order_ids, user=None, now=None, batch_size=BATCH_SIZE):
+    """Moves the given orders through TRANSITIONS[name]. Returns a TransitionResult."""
+    transition = TRANSITIONS[name]
+    now = now or timezone.now()
+    changes = {'status': transition.target, 'updated_at': now}
+    if transition.note:
+        changes['admin_payment_note'] = transition.note.format(
+            user=getattr(user, 'username', None) or 'system', when=now.strftime('%Y-%m-%d %H:%M'),
+        )
+
+    order_ids = list(dict.fromkeys(int(order_id) for order_id in order_ids))
+    result = TransitionResult(name)
+    for start in range(0, len(order_ids), batch_size):
+        _apply_batch(transition, order_ids[start:start + batch_size], changes, result, user=user)
+    for order_id in order_ids:
+        result.outcomes.setdefault(order_id, NOT_FOUND)
+    logger.info(f"Transition {name}: {len(result)} of {len(order_ids)} order(s) moved to {transition.target}")
+    return result
+
+
+# ---------- History ----------
+
+def record_events(previous_statuses, status, at, user=None, note=''):
+    """Appends one event per order for a set-based change; previous_statuses is {order_id: old status}."""
+    OrderStatusEvent.objects.bulk_create([
+        OrderStatusEvent(order_id=order_id, from_status=from_status, status=status, at=at, user=user, note=note[:255])
+        for order_id, from_status in previous_statuses.items()
+    ])
+
+
+def entered_status(status, start, end):
+    """Events of orders reaching status within [start, end), oldest first."""
+    return OrderStatusEvent.objects.filter(status=status, at__gte=start, at__lt=end).select_related('order')
+
+
+def average_time_in_status(status, since=None):
+    """Average time orders stayed in status before their next change (e.g. waiting for slip approval)."""
+    left_at = OrderStatusEvent.objects.filter(
+        order=OuterRef('order'), from_status=status, at__gte=OuterRef('at'),
+    ).order_by('at').values('at')[:1]
+    events = OrderStatusEvent.objects.filter(status=status)
+    if since is not None:
+        events = events.filter(at__gte=since)
+    events = events.annotate(left_at=Subquery(left_at)).filter(left_at__isnull=False)
+    return events.aggregate(wait=Avg(ExpressionWrapper(F('left_at') - F('at'), output_field=DurationField())))['wait']
+
+
+@receiver(post_init, sender=Order)
+def remember_status(sender, instance, **kwargs):
+    # Read from __dict__ so deferred fields are not loaded one query per instance
+    instance._original_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Order)
+def record_status_change(sender, instance, created, **kwargs):
+    previous = None if created else instance._original_status
+    instance._original_status = instance.status
+    if previous == instance.status:
+        return
+    details = getattr(instance, '_status_event', None) or {}
+    instance._status_event = None
+    OrderStatusEvent.objects.create(
+        order=instance, from_status=previous or '', status=instance.status,
+        user=details.get('user'), note=details.get('note', ''),
+    )
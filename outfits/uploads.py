@@ -0,0 +1,110 @@
+# outfits/uploads.py
+"""
+Bounded handling of customer slip uploads (payment slips, return slips).
+
+- BoundedUploadHandler runs before Django's own handlers, which stream files
+  over FILE_UPLOAD_MAX_MEMORY_SIZE to a temporary file in chunks. It gives up on
+  a request whose declared size is far over the limit before reading the body,
+  and skips (discards while reading) any file that grows past the limit.
+- process_slip() decodes with JPEG draft mode (the decoder scales down by
+  1/2..1/8 while reading) and refuses images with more than SLIP_MAX_PIXELS
+  before decoding them, then downscales to SLIP_MAX_DIMENSION and re-encodes
+  as JPEG without EXIF (so phone GPS data is not kept).
+
+Memory per request stays around one downscaled image, whatever is uploaded.
+"""
+from functools import wraps
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile, StopUpload
+from django.template.defaultfilters import filesizeformat
+from django.utils.translation import gettext_lazy as _
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image, ImageOps
+
+# Room for the other form fields and multipart headers
+FORM_OVERHEAD = 64 * 1024
+
+
+def max_upload_bytes():
+    return getattr(settings, 'SLIP_UPLOAD_MAX_BYTES', 10 * 1024 * 1024)
+
+
+class BoundedUploadHandler(FileUploadHandler):
+    """Stops reading uploads past max_bytes and records which fields were rejected."""
+
+    def __init__(self, request=None, max_bytes=None):
+        super().__init__(request)
+        self.max_bytes = max_bytes or max_upload_bytes()
+        self.request_too_large = False
+        request.rejected_uploads = []
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self.request_too_large = content_length > self.max_bytes + FORM_OVERHEAD
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        if self.request_too_large:
+            self.request.rejected_uploads.append(field_name)
+            # Don't read the rest of the body at all
+            raise StopUpload(connection_reset=True)
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.max_bytes:
+            self.request.rejected_uploads.append(self.field_name)
+            raise SkipFile()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+def bounded_uploads(view):
+    """
+    Installs BoundedUploadHandler for a view. CSRF is checked after the
+    handler is in place, as the check itself reads request.POST.
+    """
+    protected_view = csrf_protect(view)
+
+    @wraps(view)
+    @csrf_exempt
+    def wrapper(request, *args, **kwargs):
+        if request.method == 'POST':
+            request.upload_handlers.insert(0, BoundedUploadHandler(request))
+        return protected_view(request, *args, **kwargs)
+    return wrapper
+
+
+def too_large_error():
+    return ValidationError(
+        _("The file is too large. Please upload an image smaller than %(size)s."),
+        code='file_too_large', params={'size': filesizeformat(max_upload_bytes())},
+    )
+
+
+def process_slip(uploaded_file):
+    """Returns a downscaled, EXIF-free JPEG copy of an uploaded slip image."""
+    max_dimension = getattr(settings, 'SLIP_MAX_DIMENSION', 1600)
+    max_pixels = getattr(settings, 'SLIP_MAX_PIXELS', 25_000_000)
+
+    uploaded_file.seek(0)
+    try:
+        image = Image.open(uploaded_file)
+        image.draft('RGB', (max_dimension, max_dimension))
+        width, height = image.size
+        if width * height > max_pixels:
+            raise ValidationError(_("The image is too large (%(width)s×%(height)s pixels)."), code='too_many_pixels', params={'width': width, 'height': height})
+        image = ImageOps.exif_transpose(image).convert('RGB')
+    except ValidationError:
+        raise
+    except Exception:
+        raise ValidationError(_("Upload a valid image. The file you uploaded was either not an image or a corrupted image."), code='invalid_image')
+
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=80, optimize=True)
+    name = (uploaded_file.name or 'slip').rsplit('.', 1)[0] + '.jpg'
+    return InMemoryUploadedFile(buffer, None, name, 'image/jpeg', buffer.tell(), None)
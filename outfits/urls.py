@@ -9,6 +9,7 @@ urlpatterns = [
     path('', views.home, name='home'),
     path('list/', views.OutfitListView.as_view(), name='outfit-list'),
     path('search/', views.OutfitSearchView.as_view(), name='outfit-search'),
+    path('search/suggest/', views.outfit_suggest_view, name='outfit-suggest'),
     path('category/<slug:category_slug>/', views.OutfitByCategoryListView.as_view(), name='outfits-by-category'),
     path('outfit/<int:pk>/', views.OutfitDetailView.as_view(), name='outfit-detail'),
 
@@ -25,6 +26,7 @@ urlpatterns = [
     # เช่าและชำระเงิน (แจ้งโอน)
     path('checkout/', views.checkout_view, name='checkout'),
     path('payment/<int:order_id>/', views.payment_process_view, name='payment_process'),
+    path('payment/<int:order_id>/promptpay.<str:fmt>', views.payment_qr_view, name='payment_qr'),
     path('payment/result/', views.payment_result_view, name='payment_result'),
     # --- ไม่มี payment_webhook ---
 
@@ -1,6 +1,7 @@
 import qrcode
 import io
 import base64
+from functools import lru_cache
 
 def _format_recipient(recipient: str) -> str:
     """Convert Thai mobile number to PromptPay format (0066XXXXXXXXX)."""
@@ -9,14 +10,23 @@ def _format_recipient(recipient: str) -> str:
         return "0066" + recipient[1:]  # remove first 0 and add country code
     raise ValueError("Invalid Thai mobile number format")
 
+def _crc16_table() -> tuple:
+    """CRC16/CCITT (poly 0x1021) of every byte value, for the table-driven _crc16."""
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021 if (crc & 0x8000) else crc << 1) & 0xFFFF
+        table.append(crc)
+    return tuple(table)
+
+_CRC16_TABLE = _crc16_table()
+
 def _crc16(data: bytes) -> str:
-    """Calculate CRC16 checksum (XMODEM) for PromptPay QR payload."""
+    """Calculate CRC16 checksum (CCITT-FALSE, init 0xFFFF) for PromptPay QR payload, one table lookup per byte."""
     crc = 0xFFFF
     for b in data:
-        crc ^= b << 8
-        for _ in range(8):
-            crc = (crc << 1) ^ 0x1021 if (crc & 0x8000) else crc << 1
-            crc &= 0xFFFF
+        crc = ((crc << 8) & 0xFFFF) ^ _CRC16_TABLE[(crc >> 8) ^ b]
     return format(crc, '04X')
 
 def _generate_payload(recipient: str, amount: float = None) -> str:
@@ -43,9 +53,66 @@ def _generate_payload(recipient: str, amount: float = None) -> str:
     crc = _crc16(payload.encode("ascii"))
     return payload + crc
 
-def generate_promptpay_qr(recipient: str, amount: float = None) -> str:
-    payload = _generate_payload(recipient, amount)
-    qr = qrcode.make(payload)
+def promptpay_payload(recipient: str, amount: float = None) -> str:
+    """The PromptPay payload string encoded in the QR (public wrapper, e.g. for ETags)."""
+    return _generate_payload(recipient, amount)
+
+# Rendered QR codes are cached per payload; an order's QR is requested on every payment page load
+QR_CACHE_SIZE = 256
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def qr_matrix(payload: str) -> tuple:
+    """The QR modules (True = dark), including the 4-module quiet zone. Does not need Pillow."""
+    qr = qrcode.QRCode(border=4)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    return tuple(tuple(row) for row in qr.get_matrix())
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def render_qr_svg(payload: str, module_size: int = 10) -> str:
+    """SVG of the QR code: one path with a rectangle per run of dark modules, scaled by the viewBox."""
+    matrix = qr_matrix(payload)
+    size = len(matrix)
+    runs = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if row[x]:
+                start = x
+                while x < size and row[x]:
+                    x += 1
+                runs.append(f'M{start} {y}h{x - start}v1h-{x - start}z')
+            else:
+                x += 1
+    squares = ''.join(runs)
+    pixels = size * module_size
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" height="{pixels}" '
+        f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="#fff"/><path d="{squares}" fill="#000"/></svg>'
+    )
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def render_qr_png(payload: str, module_size: int = 10) -> bytes:
+    """PNG of the QR code (same look as qrcode.make: 10px modules, 4-module border)."""
+    from PIL import Image  # only the PNG output needs Pillow
+
+    matrix = qr_matrix(payload)
+    size = len(matrix)
+    image = Image.new("1", (size, size))
+    image.putdata([0 if dark else 1 for row in matrix for dark in row])
+    image = image.resize((size * module_size, size * module_size), Image.NEAREST)
     buffered = io.BytesIO()
-    qr.save(buffered, format="PNG")
-    return base64.b64encode(buffered.getvalue()).decode("utf-8")
+    image.save(buffered, format="PNG", optimize=True)
+    return buffered.getvalue()
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def generate_promptpay_qr(recipient: str, amount: float = None, output: str = "png") -> str:
+    """
+    QR code for a PromptPay payment, cached per (recipient, amount, output).
+    output="png" returns base64-encoded PNG, "svg" returns SVG markup.
+    """
+    payload = _generate_payload(recipient, amount)
+    if output == "svg":
+        return render_qr_svg(payload)
+    return base64.b64encode(render_qr_png(payload)).decode("utf-8")
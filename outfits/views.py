@@ -1,6 +1,7 @@
 # outfits/views.py
 import logging
 import json
+import hashlib
 from decimal import Decimal
 from datetime import date, timedelta
 
@@ -17,12 +18,28 @@ from django.views.decorators.http import require_POST
 from django.db import transaction
 from django.contrib.auth import login, get_user_model
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+from django.core.cache import cache
 
 from outfits.models import Order
 
 from .models import Outfit, Category, Order, OrderItem, UserProfile
+from .availability import unavailable_outfit_ids
+from .holds import expire_orders
+from .search import RankedResults, search_outfits
+from .fuzzy import did_you_mean, fuzzy_outfit_ids
+from .cache import active_outfit_count, category_by_slug, category_menu
+from .conditional import catalog_etag, conditional_page, outfit_etag, outfit_last_modified
+from .pagination import KeysetPaginationMixin
+from .uploads import bounded_uploads
+from .featured import featured_outfits as get_featured_outfits
+from . import autocomplete, carts, transitions
+from .carts import cart_summary
+from .reservations import OutfitUnavailable, place_order
 from .forms import (
-    CheckoutForm, CartAddItemForm, CustomUserCreationForm,
+    AvailabilityCheckForm, CheckoutForm, CartAddItemForm, CustomUserCreationForm,
     OutfitForm, PaymentSlipUploadForm, UserEditForm, UserProfileForm,
     ReturnUploadForm
 )
@@ -33,10 +50,9 @@ logger = logging.getLogger(__name__)
 
 def home(request):
     """Displays the homepage with featured outfits and categories."""
-    featured_outfits = Outfit.objects.filter(is_active=True).order_by('?')[:6] # Get 6 random active outfits
-    categories = Category.objects.all()
-    cart = request.session.get(settings.CART_SESSION_ID, {})
-    cart_outfit_ids = list(cart.keys()) # Pass IDs for checking in template
+    featured_outfits = get_featured_outfits(6)
+    categories = category_menu()
+    cart_outfit_ids = cart_summary(request)['outfit_ids'] # Pass IDs for checking in template
     context = {
         'featured_outfits': featured_outfits,
         'categories': categories,
@@ -66,8 +82,9 @@ def register_view(request):
 
 # ---------- Outfit Listing & Detail Views ----------
 
-class OutfitListView(ListView):
-    """Displays all active outfits, paginated."""
+@method_decorator(conditional_page(catalog_etag), name='dispatch')
+class OutfitListView(KeysetPaginationMixin, ListView):
+    """Displays all active outfits, paginated by cursor."""
     model = Outfit
     template_name = 'outfits/list.html'
     context_object_name = 'outfits'
@@ -77,36 +94,44 @@ class OutfitListView(ListView):
         # Optimize query by selecting related category
         return Outfit.objects.filter(is_active=True).select_related('category')
 
+    def get_total_count(self):
+        return active_outfit_count
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['categories'] = Category.objects.all()
+        context['categories'] = category_menu()
         context['title'] = "All Outfits"
-        cart = self.request.session.get(settings.CART_SESSION_ID, {})
-        context['cart_outfit_ids'] = list(cart.keys()) # For "Add to Cart" button state
+        context['cart_outfit_ids'] = cart_summary(self.request)['outfit_ids'] # For "Add to Cart" button state
         return context
 
-class OutfitByCategoryListView(ListView):
-    """Displays outfits filtered by category, paginated."""
+@method_decorator(conditional_page(catalog_etag), name='dispatch')
+class OutfitByCategoryListView(KeysetPaginationMixin, ListView):
+    """Displays outfits filtered by category, paginated by cursor."""
     model = Outfit
     template_name = 'outfits/list.html'
     context_object_name = 'outfits'
     paginate_by = 12
 
     def get_queryset(self):
-        # Get category object or raise 404 if not found
-        self.category = get_object_or_404(Category, slug=self.kwargs['category_slug'])
+        # Get category object (from the catalog cache) or raise 404 if not found
+        self.category = category_by_slug(self.kwargs['category_slug'])
+        if self.category is None:
+            raise Http404("No category matches the given query.")
         # Filter outfits by the found category and optimize query
         return Outfit.objects.filter(category=self.category, is_active=True).select_related('category')
 
+    def get_total_count(self):
+        return self.category.outfit_count
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['category'] = self.category # Pass category to template
-        context['categories'] = Category.objects.all() # For potential sidebar/filter display
+        context['categories'] = category_menu() # For potential sidebar/filter display
         context['title'] = f"Category: {self.category.name}"
-        cart = self.request.session.get(settings.CART_SESSION_ID, {})
-        context['cart_outfit_ids'] = list(cart.keys())
+        context['cart_outfit_ids'] = cart_summary(self.request)['outfit_ids']
         return context
 
+@method_decorator(conditional_page(outfit_etag, outfit_last_modified), name='dispatch')
 class OutfitDetailView(DetailView):
     """Displays details for a single active outfit."""
     model = Outfit
@@ -129,8 +154,7 @@ class OutfitDetailView(DetailView):
             ).exclude(pk=self.object.pk).select_related('category')[:4] # Limit to 4 related items
 
         # Check cart status
-        cart = self.request.session.get(settings.CART_SESSION_ID, {})
-        context['cart_outfit_ids'] = list(cart.keys())
+        context['cart_outfit_ids'] = cart_summary(self.request)['outfit_ids']
 
         # Check current availability status (for display)
         try:
@@ -144,6 +168,7 @@ class OutfitDetailView(DetailView):
 
         return context
 
+@method_decorator(conditional_page(catalog_etag), name='dispatch')
 class OutfitSearchView(ListView):
     """Handles searching for outfits."""
     model = Outfit
@@ -154,79 +179,65 @@ class OutfitSearchView(ListView):
     def get_queryset(self):
         query = self.request.GET.get('q', '').strip()
         self.query = query # Store query for context
+        self.suggestions = []
         if query:
-            # Search in name, description, and category name (case-insensitive)
-            return Outfit.objects.filter(
-                Q(name__icontains=query) |
-                Q(description__icontains=query) |
-                Q(category__name__icontains=query),
-                is_active=True
-            ).select_related('category').distinct() # Use distinct to avoid duplicates if multiple criteria match
+            # Ranked full-text search over name, description and category name
+            results = search_outfits(query)
+            if not len(results):
+                # No hits, probably a typo: show outfits with similar names instead
+                results = RankedResults(fuzzy_outfit_ids(query))
+                self.suggestions = did_you_mean(query)
+            return results
         return Outfit.objects.none() # Return empty if no query
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['query'] = self.query
-        context['categories'] = Category.objects.all()
+        context['suggestions'] = self.suggestions
+        context['categories'] = category_menu()
         context['title'] = f"Search Results for '{self.query}'" if self.query else "Search Outfits"
-        cart = self.request.session.get(settings.CART_SESSION_ID, {})
-        context['cart_outfit_ids'] = list(cart.keys())
+        context['cart_outfit_ids'] = cart_summary(self.request)['outfit_ids']
         return context
 
+def outfit_suggest_view(request):
+    """JSON search-as-you-type suggestions from the in-process prefix index."""
+    query = request.GET.get('q', '').strip()
+    try:
+        limit = min(max(int(request.GET.get('limit', 8)), 1), 20)
+    except ValueError:
+        limit = 8
+
+    results = []
+    for kind, pk, label in autocomplete.index.lookup(query, limit=limit):
+        if kind == autocomplete.CATEGORY:
+            name, slug = label
+            results.append({'type': kind, 'name': name, 'url': reverse('outfits:outfits-by-category', args=[slug])})
+        else:
+            results.append({'type': kind, 'name': label, 'url': reverse('outfits:outfit-detail', args=[pk])})
+    return JsonResponse({'query': query, 'results': results})
+
 # ---------- Cart Views ----------
 
 def get_cart_items_and_total(request):
     """Helper function to get processed cart items and subtotal."""
-    cart_session = request.session.get(settings.CART_SESSION_ID, {})
-    cart_items_data = []
-    cart_subtotal_per_day = Decimal('0.00')
-    outfit_ids = list(cart_session.keys())
-
-    # Fetch outfits in one query
-    outfits_in_cart = {str(o.id): o for o in Outfit.objects.filter(id__in=outfit_ids, is_active=True)}
-
-    valid_cart_session = {} # Build a new session dict with only valid items
-    ids_to_remove = []
-
-    for outfit_id_str in outfit_ids:
-        item_data = cart_session[outfit_id_str]
-        outfit = outfits_in_cart.get(outfit_id_str)
-
-        if outfit:
-            # Current logic assumes quantity is always 1 for rentals per item type
-            quantity = 1 # item_data.get('quantity', 1) # Use 1 for now
-            price_per_day = outfit.price
-            item_subtotal = price_per_day * quantity
-            cart_subtotal_per_day += item_subtotal
-            cart_items_data.append({
-                'outfit': outfit,
-                'quantity': quantity,
-                'price_per_day': price_per_day,
-                'item_subtotal': item_subtotal
-            })
-            valid_cart_session[outfit_id_str] = {'quantity': quantity} # Add valid item to new session data
-        else:
-            # Mark ID for removal if outfit not found or inactive
-            ids_to_remove.append(outfit_id_str)
-
-    # Update session only if changes were made (invalid items removed)
-    session_changed = False
-    if ids_to_remove:
-        session_changed = True
-        logger.info(f"Removing invalid outfit IDs from cart: {ids_to_remove}")
-
-    if session_changed or set(valid_cart_session.keys()) != set(cart_session.keys()):
-        request.session[settings.CART_SESSION_ID] = valid_cart_session
-        request.session.modified = True
-
-    return cart_items_data, cart_subtotal_per_day
+    return carts.cart_lines(carts.get_cart(request))
 
 def cart_detail(request):
-    """Displays the contents of the shopping cart."""
+    """Displays the contents of the shopping cart, optionally checked against rental dates."""
     cart_items, cart_subtotal_per_day = get_cart_items_and_total(request)
+    dates_form = AvailabilityCheckForm(request.GET or None)
+    if cart_items and dates_form.is_valid():
+        unavailable_ids = unavailable_outfit_ids(
+            {item['outfit'].id: item['quantity'] for item in cart_items},
+            dates_form.cleaned_data['rental_start_date'],
+            dates_form.cleaned_data['rental_end_date']
+        )
+        for item in cart_items:
+            item['is_available'] = item['outfit'].id not in unavailable_ids
     context = {
         'cart_items': cart_items,
-        'cart_subtotal_per_day': cart_subtotal_per_day
+        'cart_subtotal_per_day': cart_subtotal_per_day,
+        'dates_form': dates_form
     }
     return render(request, 'outfits/cart_detail.html', context)
 
@@ -234,15 +245,15 @@ def cart_detail(request):
 def add_to_cart(request, outfit_id):
     """Adds an outfit to the cart."""
     outfit = get_object_or_404(Outfit, id=outfit_id, is_active=True)
-    cart = request.session.get(settings.CART_SESSION_ID, {})
-    outfit_key = str(outfit_id)
 
-    if outfit_key in cart:
+    try:
+        quantity = max(1, int(request.POST.get('quantity', 1)))
+    except ValueError:
+        quantity = 1
+
+    if carts.add_item(carts.get_cart(request, create=True), outfit, quantity, request=request) is None:
         messages.warning(request, f"'{outfit.name}' is already in your cart.")
     else:
-        cart[outfit_key] = {'quantity': 1}
-        request.session[settings.CART_SESSION_ID] = cart
-        request.session.modified = True
         messages.success(request, f"Added '{outfit.name}' to your cart.")
 
     redirect_url = request.POST.get('next', reverse('outfits:cart_detail'))
@@ -251,18 +262,13 @@ def add_to_cart(request, outfit_id):
 @require_POST
 def remove_from_cart(request, outfit_id):
     """Removes an outfit from the cart."""
-    cart = request.session.get(settings.CART_SESSION_ID, {})
-    outfit_key = str(outfit_id)
+    cart = carts.get_cart(request)
 
-    if outfit_key in cart:
+    if cart is not None and carts.remove_item(cart, outfit_id, request=request):
         try:
             outfit_name = Outfit.objects.get(id=outfit_id).name
         except Outfit.DoesNotExist:
             outfit_name = f"Item ID {outfit_id}"
-
-        del cart[outfit_key]
-        request.session[settings.CART_SESSION_ID] = cart
-        request.session.modified = True
         messages.success(request, f"Removed '{outfit_name}' from your cart.")
     else:
         messages.warning(request, "Item not found in your cart.")
@@ -286,58 +292,34 @@ def checkout_view(request):
             start_date = form.cleaned_data['rental_start_date']
             end_date = form.cleaned_data['rental_end_date']
 
-            unavailable_items = []
-            for item_data in cart_items:
-                if not item_data['outfit'].is_available(start_date, end_date, quantity=item_data['quantity']):
-                    unavailable_items.append(item_data['outfit'].name)
-
-            if unavailable_items:
+            order = Order(
+                user=request.user,
+                first_name=form.cleaned_data['first_name'],
+                last_name=form.cleaned_data['last_name'],
+                email=form.cleaned_data['email'],
+                phone=form.cleaned_data['phone'],
+                address=form.cleaned_data['address'],
+                rental_start_date=start_date,
+                rental_end_date=end_date,
+                payment_method='Bank Transfer'
+            )
+            try:
+                place_order(order, cart_items)
+            except OutfitUnavailable as e:
+                unavailable_items = [outfit.name for outfit in e.outfits]
                 messages.error(request, f"Sorry, the following items are not available for the selected dates: {', '.join(unavailable_items)}. Please adjust dates or remove items.")
                 context = {'form': form, 'cart_items': cart_items, 'cart_subtotal_per_day': cart_subtotal_per_day}
                 return render(request, 'outfits/checkout.html', context)
-
-            try:
-                with transaction.atomic():
-                    order = Order(
-                        user=request.user,
-                        first_name=form.cleaned_data['first_name'],
-                        last_name=form.cleaned_data['last_name'],
-                        email=form.cleaned_data['email'],
-                        phone=form.cleaned_data['phone'],
-                        address=form.cleaned_data['address'],
-                        rental_start_date=start_date,
-                        rental_end_date=end_date,
-                        status='pending',
-                        payment_method='Bank Transfer'
-                    )
-                    order.save()
-
-                    order_items_to_create = []
-                    for item_data in cart_items:
-                        order_items_to_create.append(OrderItem(
-                            order=order,
-                            outfit=item_data['outfit'],
-                            quantity=item_data['quantity'],
-                            price_per_day=item_data['outfit'].price
-                        ))
-                    OrderItem.objects.bulk_create(order_items_to_create)
-
-                    order_from_db = Order.objects.get(pk=order.pk)
-                    order_from_db.total_amount = order_from_db.calculate_total_amount()
-                    order_from_db.total_amount += order_from_db.shipping_cost
-                    order_from_db.save()
-
-                    del request.session[settings.CART_SESSION_ID]
-                    request.session.modified = True
-                    request.session['latest_order_id'] = order_from_db.id
-
-                    return redirect('outfits:payment_process', order_id=order_from_db.id)
-
             except Exception as e:
                 logger.error(f"Error creating order for user {request.user.id}: {e}", exc_info=True)
                 messages.error(request, f"An unexpected error occurred while creating your order. Please try again. Error: {e}")
                 context = {'form': form, 'cart_items': cart_items, 'cart_subtotal_per_day': cart_subtotal_per_day}
                 return render(request, 'outfits/checkout.html', context)
+
+            carts.clear(carts.get_cart(request), request=request)
+            request.session['latest_order_id'] = order.id
+
+            return redirect('outfits:payment_process', order_id=order.id)
         else:
             messages.error(request, "Please correct the errors in the form below.")
             context = {'form': form, 'cart_items': cart_items, 'cart_subtotal_per_day': cart_subtotal_per_day}
@@ -367,29 +349,30 @@ def checkout_view(request):
         return render(request, 'outfits/checkout.html', context)
 
 @login_required
+@bounded_uploads
 def payment_process_view(request, order_id):
     """Handles the submission of payment proof (slip upload) and displays PromptPay QR."""
     try:
-        from .utils.qr import generate_promptpay_qr
+        from .utils.qr import promptpay_payload
     except ImportError:
-        generate_promptpay_qr = None # Set to None if import fails
-        logger.error("CRITICAL: Failed to import generate_promptpay_qr from .utils.qr at function level. Module may not be installed correctly.")
-        # It's better to show a generic error and not proceed with payment if QR util is missing
-        # messages.error(request, "QR generation utility is currently unavailable. Please contact support immediately.")
-        # For now, let the code proceed and handle generate_promptpay_qr being None
+        promptpay_payload = None # Set to None if import fails
+        logger.error("CRITICAL: Failed to import promptpay_payload from .utils.qr at function level. Module may not be installed correctly.")
 
     order = get_object_or_404(Order, id=order_id, user=request.user)
     form = None
-    promptpay_qr_base64 = None
+    promptpay_qr_url = None
+
+    if order.status == Order.STATUS_PENDING and order.is_hold_expired:
+        # The sweeper may not have run yet; release the hold now
+        expire_orders([order.pk])
+        order.refresh_from_db()
 
-    if order.status == 'pending':
+    if order.status == Order.STATUS_PENDING:
         if request.method == 'POST':
-            form = PaymentSlipUploadForm(request.POST, request.FILES, instance=order)
+            form = PaymentSlipUploadForm(request.POST, request.FILES, instance=order, rejected_uploads=request.rejected_uploads)
             if form.is_valid():
                 try:
-                    updated_order = form.save(commit=False)
-                    updated_order.status = 'waiting_for_approval'
-                    updated_order.save()
+                    transitions.transition(form.save(commit=False), Order.STATUS_WAITING_FOR_APPROVAL, user=request.user)
                     messages.success(request, f"Payment proof for Order #{order.id} submitted successfully. Awaiting approval.")
                     return redirect('outfits:order_detail', order_id=order.id)
                 except Exception as e:
@@ -400,36 +383,26 @@ def payment_process_view(request, order_id):
         else: # GET request
             form = PaymentSlipUploadForm()
 
-            # ---- START DEBUG ----
-            actual_promptpay_id = getattr(settings, 'PROMPTPAY_ID', 'PROMPTPAY_ID_NOT_FOUND_IN_SETTINGS')
-            print(f"DEBUG views.py: settings.PROMPTPAY_ID = '{actual_promptpay_id}' (type: {type(actual_promptpay_id)})")
-            logger.info(f"DEBUG views.py: settings.PROMPTPAY_ID = '{actual_promptpay_id}' (type: {type(actual_promptpay_id)})")
-            # ---- END DEBUG ----
-
-            if generate_promptpay_qr and actual_promptpay_id and actual_promptpay_id != 'PROMPTPAY_ID_NOT_FOUND_IN_SETTINGS' and order.total_amount > 0:
+            promptpay_id = getattr(settings, 'PROMPTPAY_ID', '')
+            if promptpay_payload and promptpay_id and order.total_amount > 0:
                 try:
-                    promptpay_qr_base64 = generate_promptpay_qr(
-                        recipient=str(actual_promptpay_id), # Ensure it's a string
-                        amount=float(order.total_amount)
-                    )
-                except ValueError as e: # This is for invalid ID format from pypromptpay
-                    logger.error(f"Invalid PromptPay ID ('{actual_promptpay_id}') format for QR generation for order {order.id}: {e}")
+                    # Validates the configured ID; the image itself is served (and cached) by payment_qr_view
+                    promptpay_payload(str(promptpay_id), float(order.total_amount))
+                    promptpay_qr_url = reverse('outfits:payment_qr', args=[order.id, 'png'])
+                except ValueError as e: # Invalid PromptPay ID format
+                    logger.error(f"Invalid PromptPay ID ('{promptpay_id}') format for QR generation for order {order.id}: {e}")
                     messages.error(request, "Could not generate QR code: The configured PromptPay ID is invalid. Please contact support.")
-                except Exception as e: # Other errors from generate_promptpay_qr or pypromptpay
-                    logger.error(f"Unexpected error generating PromptPay QR for order {order.id} with ID '{actual_promptpay_id}': {e}", exc_info=True)
-                    messages.error(request, "An unexpected error occurred while generating the payment QR code. Please try again or contact support.")
-            elif not generate_promptpay_qr :
+            elif not promptpay_payload:
                 # This message is if the import itself failed
                 messages.error(request, "QR code generation system is currently unavailable. Please proceed with manual bank transfer details or contact support.")
-                logger.error(f"generate_promptpay_qr is None for order {order.id}. QR util import failed.")
-            elif not actual_promptpay_id or actual_promptpay_id == 'PROMPTPAY_ID_NOT_FOUND_IN_SETTINGS':
-                logger.warning(f"PROMPTPAY_ID not set or not found in settings. Cannot generate QR for order {order.id}.")
+                logger.error(f"promptpay_payload is None for order {order.id}. QR util import failed.")
+            elif not promptpay_id:
+                logger.warning(f"PROMPTPAY_ID not set in settings. Cannot generate QR for order {order.id}.")
                 messages.warning(request, "PromptPay QR code generation is not configured (ID missing). Please contact support.")
-            # Consider adding an else for order.total_amount <= 0 if that's a case to handle for QR
     
-    elif order.status == 'waiting_for_approval':
+    elif order.status == Order.STATUS_WAITING_FOR_APPROVAL:
         messages.info(request, f"Order #{order.id} is already awaiting payment approval.")
-    elif order.status == 'failed':
+    elif order.status == Order.STATUS_FAILED:
         messages.error(request, f"Payment for Order #{order.id} failed previously. Reason: {order.admin_payment_note or 'Not specified'}. Please contact support if needed.")
     else:
         messages.info(request, f"Payment cannot be submitted for Order #{order.id} (Status: {order.get_status_display()}).")
@@ -445,10 +418,45 @@ def payment_process_view(request, order_id):
         'order': order,
         'form': form,
         'bank_details': bank_details,
-        'promptpay_qr_base64': promptpay_qr_base64
+        'promptpay_qr_url': promptpay_qr_url
     }
     return render(request, 'outfits/payment_process.html', context)
 
+QR_CONTENT_TYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+QR_CACHE_TIMEOUT = 24 * 60 * 60
+
+@login_required
+def payment_qr_view(request, order_id, fmt):
+    """Serves the PromptPay QR of a pending order as PNG or SVG, with a strong ETag derived from the payload."""
+    from .utils.qr import promptpay_payload, render_qr_png, render_qr_svg
+
+    if fmt not in QR_CONTENT_TYPES:
+        raise Http404("Unknown QR format.")
+    order = get_object_or_404(Order, id=order_id, user=request.user, status=Order.STATUS_PENDING)
+    if order.is_hold_expired:
+        raise Http404("The payment deadline of this order has passed.")
+    promptpay_id = getattr(settings, 'PROMPTPAY_ID', '')
+    if not promptpay_id or order.total_amount <= 0:
+        raise Http404("No PromptPay QR for this order.")
+    try:
+        payload = promptpay_payload(str(promptpay_id), float(order.total_amount))
+    except ValueError:
+        raise Http404("PromptPay is not configured correctly.")
+
+    # Same recipient and amount -> same payload -> same image, so the payload identifies the bytes
+    digest = hashlib.sha256(f'{fmt}:{payload}'.encode()).hexdigest()[:32]
+    etag = quote_etag(digest)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        # Rendered once per payload and shared by all workers through the cache
+        key = f'outfits:promptpay-qr:{fmt}:{digest}'
+        render = (lambda: render_qr_png(payload)) if fmt == 'png' else (lambda: render_qr_svg(payload).encode())
+        response = HttpResponse(cache.get_or_set(key, render, QR_CACHE_TIMEOUT), content_type=QR_CONTENT_TYPES[fmt])
+    response['ETag'] = etag
+    # The URL stays the same when the total changes, so browsers must revalidate every time (a cheap 304)
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
 @login_required
 def payment_result_view(request):
     """Displays a generic payment result/status page, often after redirection."""
@@ -462,11 +470,11 @@ def payment_result_view(request):
             pass 
 
     if order:
-        if order.status == 'waiting_for_approval':
+        if order.status == Order.STATUS_WAITING_FOR_APPROVAL:
             messages.info(request, f"Payment proof for Order #{order.id} submitted. Awaiting approval.")
-        elif order.status == 'processing':
+        elif order.status == Order.STATUS_PROCESSING:
             messages.success(request, f"Payment for Order #{order.id} confirmed and is being processed.")
-        elif order.status == 'failed':
+        elif order.status == Order.STATUS_FAILED:
             messages.error(request, f"Payment for Order #{order.id} failed or was rejected.")
         else:
             messages.info(request, f"Current status for Order #{order.id}: {order.get_status_display()}.")
@@ -529,13 +537,12 @@ def user_profile_view(request):
 
 
 @login_required
+@bounded_uploads
 def initiate_return_view(request, order_id):
     """Handles the submission of return information (tracking, slip)."""
-    order = get_object_or_404(Order, id=order_id, user=request.user)
-
-    allowed_statuses_for_return = ['rented', 'shipped']
+    order = get_object_or_404(Order.objects.prefetch_related('items__outfit'), id=order_id, user=request.user)
 
-    if order.status not in allowed_statuses_for_return:
+    if not order.can_transition(order.status, Order.STATUS_RETURN_SHIPPED):
         messages.error(request, f"Cannot initiate return for Order #{order.id} with status '{order.get_status_display()}'.")
         return redirect('outfits:order_detail', order_id=order.id)
 
@@ -544,13 +551,12 @@ def initiate_return_view(request, order_id):
         return redirect('outfits:order_detail', order_id=order.id)
 
     if request.method == 'POST':
-        form = ReturnUploadForm(request.POST, request.FILES, instance=order)
+        form = ReturnUploadForm(request.POST, request.FILES, instance=order, rejected_uploads=request.rejected_uploads)
         if form.is_valid():
             try:
                 return_info = form.save(commit=False)
-                return_info.status = 'return_shipped'
                 return_info.return_initiated_at = timezone.now()
-                return_info.save()
+                transitions.transition(return_info, Order.STATUS_RETURN_SHIPPED, user=request.user)
                 messages.success(request, f"Return information for Order #{order.id} submitted successfully.")
                 return redirect('outfits:order_detail', order_id=order.id)
             except Exception as e:
@@ -569,7 +575,7 @@ def about_us_view(request):
 
 
 def about_us_view(request):
-    outfits_rented = Order.objects.filter(status__in=['completed', 'return_received']).count()
+    outfits_rented = Order.objects.filter(status__in=[Order.STATUS_COMPLETED, Order.STATUS_RETURN_RECEIVED]).count()
 
     # คำนวณตามสมมติฐาน 1 เช่า ≈ 0.8 ชุดที่ไม่ต้องผลิตใหม่
     new_clothes_saved = round(outfits_rented * 0.8, 2)